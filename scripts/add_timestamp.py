@@ -3,9 +3,13 @@
 Script para agregar el campo last_updated al archivo JSON existente
 """
 
-import json
+import os
+import sys
 from datetime import datetime, timezone, timedelta
 
+sys.path.append(os.path.dirname(__file__))
+from json_io import load, write_json
+
 # Archivo a modificar
 TOURNAMENT_FILE = "tournament-viewer/data/tournament_extended.json"
 
@@ -13,8 +17,7 @@ def add_timestamp():
     """Agrega el campo last_updated al archivo JSON"""
     try:
         # Cargar datos existentes
-        with open(TOURNAMENT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load(TOURNAMENT_FILE)
         
         # Agregar timestamp si no existe
         if 'last_updated' not in data:
@@ -23,9 +26,8 @@ def add_timestamp():
         else:
             print(f"ℹ️  Timestamp ya existe: {data['last_updated']}")
         
-        # Guardar archivo actualizado
-        with open(TOURNAMENT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Guardar archivo actualizado (escritura atómica, en streaming)
+        write_json(TOURNAMENT_FILE, data)
         
         print(f"✅ Archivo actualizado: {TOURNAMENT_FILE}")
         
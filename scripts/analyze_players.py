@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
 import os
 import re
 from difflib import SequenceMatcher
 import unicodedata
 
+# Caché de resoluciones playerId -> jugador de ranking y correcciones manuales
+RESOLUTION_CACHE_FILE = 'player_resolution_cache.json'
+OVERRIDES_FILE = 'player_overrides.json'
+RESOLUTION_CACHE_VERSION = 2
+
 def normalize_name(name):
     """
     Normaliza un nombre para comparación:
@@ -42,39 +48,153 @@ def similarity_score(name1, name2):
     # Usar SequenceMatcher para calcular similitud
     return SequenceMatcher(None, norm1, norm2).ratio()
 
-def find_player_in_rankings(player_name, rankings_data):
+SIMILARITY_THRESHOLD = 0.7  # Umbral de similitud
+
+def _padded_bigrams(norm_name):
     """
-    Busca un jugador en todos los rankings disponibles
+    Bigramas del nombre con marcas de inicio y fin.
+    Dos nombres con similitud > 0.7 siempre comparten al menos uno: si no
+    compartieran ninguno, todos los bloques coincidentes tendrían longitud 1,
+    separados entre sí y de los extremos, y la similitud sería < 2/3.
     """
-    best_match = None
-    best_score = 0
-    best_ranking = None
+    padded = f"^{norm_name}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+def _char_counts(norm_name):
+    counts = {}
+    for char in norm_name:
+        counts[char] = counts.get(char, 0) + 1
+    return counts
+
+def build_ranking_index(rankings_data):
+    """
+    Precalcula un índice de los nombres de todos los rankings:
+    - exact: nombre normalizado -> primera entrada con ese nombre
+    - tokens: palabra (nombre/apellido) -> entradas que la contienen
+    - bigrams: bigrama -> entradas que lo contienen (generación de candidatos)
+    Cada nombre se normaliza una sola vez.
+    """
+    entries = []
+    exact = {}
+    tokens = {}
+    bigrams = {}
     
     for ranking_name, ranking_data in rankings_data.items():
         for player in ranking_data['jugadores']:
-            score = similarity_score(player_name, player['nombre'])
-            
-            if score > best_score and score > 0.7:  # Umbral de similitud
-                best_score = score
-                best_match = player
-                best_ranking = ranking_name
+            position = len(entries)
+            norm = normalize_name(player['nombre'])
+            entries.append({
+                'norm': norm,
+                'counts': _char_counts(norm),
+                'player': player,
+                'ranking': ranking_name
+            })
+            exact.setdefault(norm, position)
+            for token in set(norm.split()):
+                tokens.setdefault(token, []).append(position)
+            for bigram in _padded_bigrams(norm):
+                bigrams.setdefault(bigram, []).append(position)
+    
+    return {'entries': entries, 'exact': exact, 'tokens': tokens, 'bigrams': bigrams}
+
+def _upper_bound(query_norm, query_counts, entry):
+    """
+    Cota superior de SequenceMatcher.ratio() (equivale a quick_ratio):
+    dos veces los caracteres en común dividido por la longitud total
+    """
+    total = len(query_norm) + len(entry['norm'])
+    if not total:
+        return 1.0
+    entry_counts = entry['counts']
+    common = sum(min(count, entry_counts[char]) for char, count in query_counts.items() if char in entry_counts)
+    return 2.0 * common / total
+
+def find_player_in_rankings(player_name, rankings_data, index=None):
+    """
+    Busca un jugador en todos los rankings disponibles
     
-    return best_match, best_ranking, best_score
+    Devuelve el mismo resultado que comparar con todos los jugadores (primer
+    jugador con la mayor similitud por encima del umbral), pero solo ejecuta
+    SequenceMatcher sobre los candidatos del índice que pueden superar al mejor.
+    """
+    if index is None:
+        index = build_ranking_index(rankings_data)
+    entries = index['entries']
+    norm = normalize_name(player_name)
+    
+    # Coincidencia exacta tras normalizar
+    position = index['exact'].get(norm)
+    if position is not None:
+        entry = entries[position]
+        return entry['player'], entry['ranking'], 1.0
+    
+    best_position = None
+    best_score = 0
+    query_counts = _char_counts(norm)
+    
+    def evaluate(position, bound):
+        nonlocal best_position, best_score
+        if bound <= SIMILARITY_THRESHOLD or bound < best_score:
+            return
+        if bound == best_score and position > best_position:
+            return
+        score = SequenceMatcher(None, norm, entries[position]['norm']).ratio()
+        if score <= SIMILARITY_THRESHOLD:
+            return
+        if score > best_score or (score == best_score and position < best_position):
+            best_score = score
+            best_position = position
+    
+    # Primero los jugadores que comparten nombre o apellido (bloqueo por tokens)
+    evaluated = set()
+    for token in set(norm.split()):
+        for position in index['tokens'].get(token, []):
+            if position not in evaluated:
+                evaluated.add(position)
+                evaluate(position, _upper_bound(norm, query_counts, entries[position]))
+    
+    # Después el resto de candidatos por bigramas, de mayor a menor cota
+    candidates = set()
+    for bigram in _padded_bigrams(norm):
+        candidates.update(index['bigrams'].get(bigram, []))
+    candidates -= evaluated
+    
+    bounded = sorted(
+        ((_upper_bound(norm, query_counts, entries[position]), position) for position in candidates),
+        key=lambda item: (-item[0], item[1])
+    )
+    for bound, position in bounded:
+        if bound <= SIMILARITY_THRESHOLD or bound < best_score:
+            break
+        evaluate(position, bound)
+    
+    if best_position is None:
+        return None, None, 0
+    entry = entries[best_position]
+    return entry['player'], entry['ranking'], best_score
 
-def load_all_rankings():
+def is_ranking_file(filename):
+    """Indica si un archivo de jsons-agp es un ranking de liga (no el índice combinado)"""
+    return filename.endswith('_ranking.json') or filename.endswith('-ranking.json')
+
+def ranking_name_from_file(filename):
+    """Nombre de la liga de un JSON de ranking (vigo_ranking.json -> vigo)"""
+    return filename.replace('_ranking.json', '').replace('-ranking.json', '')
+
+def load_all_rankings(jsons_dir="jsons-agp"):
     """
     Carga todos los rankings de la carpeta jsons-agp
     """
     rankings = {}
-    jsons_dir = "jsons-agp"
     
     if not os.path.exists(jsons_dir):
         print(f"Error: No se encuentra la carpeta {jsons_dir}")
         return rankings
     
-    for filename in os.listdir(jsons_dir):
-        if filename.endswith('.json'):
-            ranking_name = filename.replace('_ranking.json', '').replace('-ranking.json', '')
+    # Orden alfabético para que los desempates (y la caché) sean reproducibles
+    for filename in sorted(os.listdir(jsons_dir)):
+        if is_ranking_file(filename):
+            ranking_name = ranking_name_from_file(filename)
             filepath = os.path.join(jsons_dir, filename)
             
             try:
@@ -86,13 +206,13 @@ def load_all_rankings():
     
     return rankings
 
-def load_participants_with_fix():
+def load_participants_with_fix(filepath='individual-lista-participantes.json'):
     """
     Carga los participantes del gallego manejando el problema del JSON y normaliza 'country' y 'represents'.
     Si hay error, imprime el fragmento que intenta cargar.
     """
     try:
-        with open('individual-lista-participantes.json', 'r', encoding='utf-8') as f:
+        with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
         # Reemplazar todas las apariciones de '"country": []' y '"represents": []' por objetos vacíos
         content = content.replace('"country": []', '"country": {}')
@@ -118,9 +238,203 @@ def load_participants_with_fix():
         print(f"❌ Error cargando participantes: {e}")
         return None
 
-def analyze_gallego_participants():
+ENGINES = ('sequencematcher', 'vector')
+
+def match_participants(nombres, rankings, engine='sequencematcher', threshold=None, tie_break='order'):
+    """
+    Busca todos los participantes en los rankings con el motor indicado:
+    - 'sequencematcher': find_player_in_rankings con el índice de nombres
+    - 'vector': emparejamiento por lotes con matriz de similitud (batch_matcher)
+    Devuelve una lista de (jugador_ranking, liga, similitud) por participante.
+    """
+    if engine == 'sequencematcher':
+        ranking_index = build_ranking_index(rankings)
+        return [find_player_in_rankings(nombre, rankings, ranking_index) for nombre in nombres]
+    if engine == 'vector':
+        from batch_matcher import batch_match_players, DEFAULT_THRESHOLD
+        return batch_match_players(
+            nombres, rankings,
+            threshold=DEFAULT_THRESHOLD if threshold is None else threshold,
+            tie_break=tie_break
+        )
+    raise ValueError(f"Motor no soportado: {engine}")
+
+def rankings_content_hashes(jsons_dir="jsons-agp"):
+    """
+    Hash del contenido de cada ranking de la carpeta, por liga.
+    Permite saber qué ligas se han modificado, añadido o eliminado.
+    """
+    hashes = {}
+    for filename in sorted(os.listdir(jsons_dir)):
+        if is_ranking_file(filename):
+            with open(os.path.join(jsons_dir, filename), 'rb') as f:
+                hashes[ranking_name_from_file(filename)] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+def load_overrides(filepath=OVERRIDES_FILE):
+    """
+    Carga las correcciones manuales de emparejamiento, por playerId:
+        {"31065196": {"liga": "vigo", "nombre_ranking": "MAXIMO PEGUERO SANCHEZ"},
+         "54125344": null}
+    null fuerza que el jugador quede sin ranking.
+    """
+    if not os.path.exists(filepath):
+        return {}
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Error cargando correcciones {filepath}: {e}")
+        return {}
+
+def load_resolution_cache(fingerprint, filepath=RESOLUTION_CACHE_FILE):
+    """
+    Carga la caché de resoluciones si se generó con el mismo motor.
+    Devuelve (entradas, ligas cuyo ranking ha cambiado desde entonces). Con el
+    motor 'sequencematcher' basta con revisar esas ligas; con otro motor, o si
+    cambian los parámetros, la caché se descarta entera.
+    """
+    if not os.path.exists(filepath):
+        return {}, set()
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except Exception as e:
+        print(f"⚠️  Caché de resoluciones ilegible, se ignora: {e}")
+        return {}, set()
+    cached = cache.get('fingerprint') or {}
+    if cache.get('version') != RESOLUTION_CACHE_VERSION or any(
+            cached.get(key) != value for key, value in fingerprint.items() if key != 'rankings'):
+        print("♻️  Caché de resoluciones de otra versión o motor, se invalida")
+        return {}, set()
+    before = cached.get('rankings') or {}
+    after = fingerprint['rankings']
+    changed = {liga for liga in set(before) | set(after) if before.get(liga) != after.get(liga)}
+    if changed and fingerprint['engine'] != 'sequencematcher':
+        print("♻️  Los rankings han cambiado, se invalida la caché de resoluciones")
+        return {}, set()
+    return cache.get('entries', {}), changed
+
+def _combine_matches(cached, candidate, league_order):
+    """
+    Mejor de dos coincidencias de ligas distintas con el mismo criterio que
+    find_player_in_rankings: mayor similitud y, a igualdad, la primera liga
+    """
+    if candidate[0] is None:
+        return cached
+    if cached[0] is None or candidate[2] > cached[2]:
+        return candidate
+    if candidate[2] == cached[2] and league_order[candidate[1]] < league_order[cached[1]]:
+        return candidate
+    return cached
+
+def save_resolution_cache(fingerprint, entries, filepath=RESOLUTION_CACHE_FILE):
+    """Guarda la caché de resoluciones"""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': RESOLUTION_CACHE_VERSION,
+            'fingerprint': fingerprint,
+            'entries': entries
+        }, f, ensure_ascii=False, indent=2)
+
+def _find_ranking_player(rankings, liga, nombre_ranking, posicion=None):
+    """Localiza un jugador de ranking por liga y nombre (y posición si se conoce)"""
+    ranking = rankings.get(liga)
+    if not ranking:
+        return None
+    for player in ranking['jugadores']:
+        if player['nombre'] == nombre_ranking and (posicion is None or player['posicion'] == posicion):
+            return player
+    return None
+
+def resolve_participants(participantes, rankings, engine='sequencematcher', threshold=None,
+                         tie_break='order', use_cache=True, jsons_dir="jsons-agp",
+                         cache_file=RESOLUTION_CACHE_FILE, overrides_file=OVERRIDES_FILE):
     """
-    Analiza los participantes del gallego y busca información en los rankings
+    Resuelve cada participante a (jugador_ranking, liga, similitud).
+    Orden de prioridad: correcciones manuales, caché por playerId (si el nombre
+    del participante no ha cambiado) y, solo para el resto, búsqueda difusa.
+    """
+    overrides = load_overrides(overrides_file)
+    fingerprint = {
+        'rankings': rankings_content_hashes(jsons_dir),
+        'engine': engine,
+        'threshold': threshold,
+        'tie_break': tie_break
+    }
+    cache, changed = load_resolution_cache(fingerprint, cache_file) if use_cache else ({}, set())
+    
+    resultados = [None] * len(participantes)
+    pendientes = []
+    revisar = []  # Resueltos en ligas sin cambios: solo se buscan en las ligas cambiadas
+    
+    for i, participante in enumerate(participantes):
+        key = str(participante['playerId'])
+        nombre = participante['name']
+        
+        if key in overrides:
+            override = overrides[key]
+            if override is None:
+                resultados[i] = (None, None, 0)
+                continue
+            player = _find_ranking_player(rankings, override.get('liga'), override.get('nombre_ranking'))
+            if player:
+                resultados[i] = (player, override['liga'], similarity_score(nombre, player['nombre']))
+                continue
+            print(f"⚠️  Corrección sin efecto para {nombre}: no existe {override}")
+        
+        entry = cache.get(key)
+        if entry is not None and entry.get('name') == nombre and entry.get('liga') not in changed:
+            if entry.get('liga') is None:
+                resultados[i] = (None, None, 0)
+            else:
+                player = _find_ranking_player(rankings, entry['liga'], entry['nombre_ranking'], entry.get('posicion'))
+                resultados[i] = (player, entry['liga'], entry['score']) if player else None
+            if resultados[i] is not None:
+                if changed:
+                    revisar.append(i)
+                continue
+        
+        pendientes.append(i)
+    
+    print(f"🗂️  Resueltos sin búsqueda: {len(participantes) - len(pendientes) - len(revisar)} | "
+          f"Revisados en {len(changed)} ligas cambiadas: {len(revisar)} | Pendientes: {len(pendientes)}")
+    
+    if revisar:
+        ligas_cambiadas = {liga: ranking for liga, ranking in rankings.items() if liga in changed}
+        league_order = {liga: position for position, liga in enumerate(rankings)}
+        candidatos = match_participants([participantes[i]['name'] for i in revisar], ligas_cambiadas)
+        for i, candidato in zip(revisar, candidatos):
+            resultados[i] = _combine_matches(resultados[i], candidato, league_order)
+    
+    if pendientes:
+        coincidencias = match_participants(
+            [participantes[i]['name'] for i in pendientes],
+            rankings, engine=engine, threshold=threshold, tie_break=tie_break
+        )
+        for i, coincidencia in zip(pendientes, coincidencias):
+            resultados[i] = coincidencia
+    
+    for i in pendientes + revisar:
+        player, liga, score = resultados[i]
+        cache[str(participantes[i]['playerId'])] = {
+            'name': participantes[i]['name'],
+            'liga': liga,
+            'nombre_ranking': player['nombre'] if player else None,
+            'posicion': player['posicion'] if player else None,
+            'score': score
+        }
+    
+    if use_cache and (pendientes or changed):
+        save_resolution_cache(fingerprint, cache, cache_file)
+    
+    return resultados
+
+def analyze_gallego_participants(engine='sequencematcher', threshold=None, tie_break='order', use_cache=True,
+                                 store=None):
+    """
+    Analiza los participantes del gallego y busca información en los rankings.
+    Con store (tournament_store.TournamentStore) el análisis se guarda también en SQLite.
     """
     # Cargar participantes del gallego
     participantes = load_participants_with_fix()
@@ -133,6 +447,12 @@ def analyze_gallego_participants():
         print("❌ No se pudieron cargar los rankings")
         return
     
+    # Resolver participantes (correcciones, caché y búsqueda con el motor elegido)
+    coincidencias = resolve_participants(
+        participantes, rankings, engine=engine, threshold=threshold,
+        tie_break=tie_break, use_cache=use_cache
+    )
+    
     # Analizar cada participante
     resultados = []
     encontrados = 0
@@ -141,12 +461,12 @@ def analyze_gallego_participants():
     print(f"\n🔍 Analizando participantes...")
     print("=" * 80)
     
-    for participante in participantes:
+    for participante, coincidencia in zip(participantes, coincidencias):
         nombre = participante['name']
         player_id = participante['playerId']
         
-        # Buscar en rankings
-        jugador_ranking, ranking_name, score = find_player_in_rankings(nombre, rankings)
+        # Resultado de la búsqueda en rankings
+        jugador_ranking, ranking_name, score = coincidencia
         
         if jugador_ranking:
             encontrados += 1
@@ -204,6 +524,8 @@ def analyze_gallego_participants():
     # Guardar resultados
     with open('analisis_participantes_gallego.json', 'w', encoding='utf-8') as f:
         json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if store is not None:
+        store.save_analysis(resultados)
     
     # Generar resumen
     print("=" * 80)
@@ -233,4 +555,26 @@ def analyze_gallego_participants():
     print(f"\n💾 Resultados guardados en: analisis_participantes_gallego.json")
 
 if __name__ == "__main__":
-    analyze_gallego_participants() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Busca los participantes del gallego en los rankings AGP")
+    parser.add_argument('--engine', choices=ENGINES, default='sequencematcher',
+                        help="Motor de emparejamiento de nombres")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Umbral de similitud del motor 'vector'")
+    parser.add_argument('--tie-break', choices=('order', 'sequence_matcher'), default='order',
+                        help="Desempate del motor 'vector'")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora la caché de resoluciones y repite todas las búsquedas")
+    parser.add_argument('--db', default=None,
+                        help="Base de datos SQLite donde guardar también el análisis (por defecto TOURNAMENT_DB)")
+    args = parser.parse_args()
+    # Importación diferida: tournament_store importa este módulo
+    from config import TOURNAMENT_DB
+    from tournament_store import open_store
+    store = open_store(args.db or TOURNAMENT_DB)
+    try:
+        analyze_gallego_participants(engine=args.engine, threshold=args.threshold,
+                                     tie_break=args.tie_break, use_cache=not args.no_cache, store=store)
+    finally:
+        if store is not None:
+            store.close() 
\ No newline at end of file
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escritura atómica de archivos y bloqueo entre ejecuciones
+
+Los archivos publicados se escriben en un temporal del mismo directorio, se
+hace fsync y se renombran con os.replace, así que un lector (el despliegue de
+Pages o refresh.js) ve siempre la versión anterior o la nueva completa, nunca
+un archivo a medias. Si el contenido no cambia no se escribe nada.
+
+publish_lock() toma un bloqueo consultivo (fcntl.flock) para que dos
+actualizaciones solapadas no mezclen sus escrituras. En sistemas sin fcntl
+(Windows) el bloqueo no hace nada.
+"""
+
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+sys.path.append(os.path.dirname(__file__))
+import metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_FILE_NAME = ".refresh.lock"
+FILE_MODE = 0o644
+
+def _fsync_directory(directory: str):
+    # Persiste el renombrado; no todos los sistemas permiten abrir directorios
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def file_has_content(path: str, content: bytes) -> bool:
+    """Indica si el archivo existe y contiene exactamente esos bytes"""
+    try:
+        if os.path.getsize(path) != len(content):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == content
+    except OSError:
+        return False
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+def _open_existing(path: str):
+    try:
+        return open(path, "rb")
+    except OSError:
+        return None
+
+def atomic_write_chunks(path: str, chunks: Iterable[bytes], skip_unchanged: bool = True) -> bool:
+    """
+    Escribe los fragmentos en un temporal del mismo directorio y lo renombra
+    sobre el destino (fsync + os.replace), sin juntar el contenido en memoria.
+    Devuelve False si no se ha escrito porque el contenido era el mismo.
+
+    Con skip_unchanged los fragmentos se comparan primero con el archivo
+    existente según se generan: si son iguales no se crea el temporal, y si
+    difieren el tramo inicial que coincidía se copia del archivo existente.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    chunks = iter(chunks)
+    existing = _open_existing(path) if skip_unchanged else None
+    matched = 0  # Bytes iniciales iguales a los del archivo existente
+    pending = b""  # Primer fragmento que difiere
+    try:
+        if existing is not None:
+            for chunk in chunks:
+                if existing.read(len(chunk)) != chunk:
+                    pending = chunk
+                    break
+                matched += len(chunk)
+            else:
+                if not existing.read(1):
+                    metrics.count("files_unchanged")
+                    return False
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if matched:
+                    # Mismo descriptor que en la comparación: el mismo contenido aunque se haya reemplazado
+                    existing.seek(0)
+                    while size < matched:
+                        block = existing.read(min(COPY_BLOCK_SIZE, matched - size))
+                        f.write(block)
+                        size += len(block)
+                for chunk in itertools.chain((pending,), chunks):
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, FILE_MODE)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    finally:
+        if existing is not None:
+            existing.close()
+
+    _fsync_directory(directory)
+    metrics.count("files_written")
+    metrics.count("bytes_written", size)
+    return True
+
+def atomic_write_bytes(path: str, content: bytes, skip_unchanged: bool = True) -> bool:
+    """
+    Escribe el archivo de forma atómica (temporal + fsync + os.replace).
+    Devuelve False si no se ha escrito porque el contenido era el mismo.
+    """
+    if skip_unchanged and file_has_content(path, content):
+        metrics.count("files_unchanged")
+        return False
+    return atomic_write_chunks(path, (content,), skip_unchanged=False)
+
+def atomic_write_text(path: str, text: str, skip_unchanged: bool = True) -> bool:
+    """atomic_write_bytes para texto UTF-8"""
+    return atomic_write_bytes(path, text.encode("utf-8"), skip_unchanged)
+
+def atomic_write_json(path: str, data: Any, skip_unchanged: bool = True, **dump_options) -> bool:
+    """Serializa a JSON (ensure_ascii=False por defecto) y lo escribe de forma atómica"""
+    dump_options.setdefault("ensure_ascii", False)
+    return atomic_write_text(path, json.dumps(data, **dump_options), skip_unchanged)
+
+@contextmanager
+def publish_lock(directory: str, name: str = LOCK_FILE_NAME) -> Iterator[None]:
+    """
+    Bloqueo exclusivo sobre <directory>/<name> mientras dura el bloque.
+    Si otra actualización lo tiene, se espera a que termine.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "a") as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Esperando a otra actualización en curso ({directory})...")
+            started = time.monotonic()
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            print(f"Bloqueo obtenido tras {time.monotonic() - started:.1f} s")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
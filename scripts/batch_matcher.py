@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de emparejamiento por lotes entre participantes y jugadores de los rankings
+
+Codifica todos los nombres normalizados una sola vez como vectores de bigramas
+(con marcas de inicio y fin) y calcula la matriz de similitud participantes x
+jugadores de ranking de una vez. La similitud es el coeficiente de Dice entre
+los conjuntos de bigramas: 2 * |A ∩ B| / (|A| + |B|).
+
+Si NumPy está instalado la matriz se calcula por bloques con productos de
+matrices; si no, se usa un índice invertido en Python puro con el mismo resultado.
+"""
+
+import os
+import sys
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.append(os.path.dirname(__file__))
+from analyze_players import normalize_name, _padded_bigrams
+
+DEFAULT_THRESHOLD = 0.7
+TIE_BREAKS = ("order", "sequence_matcher")
+CHUNK_SIZE = 512  # Participantes por bloque de la matriz (limita la memoria)
+
+MatchResult = Tuple[Optional[Dict[str, Any]], Optional[str], float]
+
+def flatten_rankings(rankings_data: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Lista (liga, jugador) en el mismo orden en que se recorren los rankings"""
+    return [
+        (ranking_name, player)
+        for ranking_name, ranking_data in rankings_data.items()
+        for player in ranking_data['jugadores']
+    ]
+
+def encode_names(norm_names: List[str], vocabulary: Dict[str, int]) -> List[List[int]]:
+    """Codifica cada nombre como la lista de columnas de sus bigramas, ampliando el vocabulario"""
+    encoded = []
+    for norm in norm_names:
+        columns = []
+        for bigram in _padded_bigrams(norm):
+            column = vocabulary.get(bigram)
+            if column is None:
+                column = vocabulary[bigram] = len(vocabulary)
+            columns.append(column)
+        encoded.append(columns)
+    return encoded
+
+def _dense_matrix(encoded: List[List[int]], size: int):
+    matrix = np.zeros((len(encoded), size), dtype=np.float32)
+    for row, columns in enumerate(encoded):
+        matrix[row, columns] = 1.0
+    return matrix
+
+def similarity_matrix_numpy(query_encoded: List[List[int]], ranking_encoded: List[List[int]],
+                            vocabulary_size: int, chunk_size: int = CHUNK_SIZE):
+    """Genera la matriz de Dice por bloques de participantes (NumPy)"""
+    ranking_matrix = _dense_matrix(ranking_encoded, vocabulary_size)
+    ranking_sizes = np.array([len(columns) for columns in ranking_encoded], dtype=np.float64)
+
+    for start in range(0, len(query_encoded), chunk_size):
+        chunk = query_encoded[start:start + chunk_size]
+        query_matrix = _dense_matrix(chunk, vocabulary_size)
+        query_sizes = np.array([len(columns) for columns in chunk], dtype=np.float64)
+        # Los recuentos son enteros exactos en float32; el cociente se hace en float64
+        common = (query_matrix @ ranking_matrix.T).astype(np.float64)
+        yield start, 2.0 * common / (query_sizes[:, None] + ranking_sizes[None, :])
+
+def similarity_rows_python(query_encoded: List[List[int]], ranking_encoded: List[List[int]]):
+    """Genera, para cada participante, las similitudes no nulas {posición: dice} (Python puro)"""
+    postings: Dict[int, List[int]] = {}
+    for position, columns in enumerate(ranking_encoded):
+        for column in columns:
+            postings.setdefault(column, []).append(position)
+
+    for columns in query_encoded:
+        common: Dict[int, int] = {}
+        for column in columns:
+            for position in postings.get(column, []):
+                common[position] = common.get(position, 0) + 1
+        yield {
+            position: 2.0 * count / (len(columns) + len(ranking_encoded[position]))
+            for position, count in common.items()
+        }
+
+def _pick_best(query_norm: str, scores: List[Tuple[int, float]], ranking_norms: List[str],
+               threshold: float, tie_break: str) -> Tuple[Optional[int], float]:
+    """Elige el mejor candidato por encima del umbral aplicando el desempate configurado"""
+    best_score = max((score for _, score in scores), default=0.0)
+    if best_score <= threshold:
+        return None, 0.0
+
+    tied = sorted(position for position, score in scores if score == best_score)
+    if tie_break == "sequence_matcher" and len(tied) > 1:
+        tied.sort(key=lambda position: -SequenceMatcher(None, query_norm, ranking_norms[position]).ratio())
+    return tied[0], best_score
+
+def batch_match_players(player_names: List[str], rankings_data: Dict[str, Any],
+                        threshold: float = DEFAULT_THRESHOLD, tie_break: str = "order",
+                        use_numpy: Optional[bool] = None) -> List[MatchResult]:
+    """
+    Empareja todos los participantes con los rankings en una sola pasada.
+    Devuelve, para cada nombre, (jugador, liga, similitud) como find_player_in_rankings.
+
+    tie_break:
+      - "order": ante empate gana el primer jugador en el orden de los rankings
+      - "sequence_matcher": los empates se resuelven con SequenceMatcher
+    """
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"Desempate no soportado: {tie_break}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy no está instalado")
+
+    ranking_players = flatten_rankings(rankings_data)
+    ranking_norms = [normalize_name(player['nombre']) for _, player in ranking_players]
+    query_norms = [normalize_name(name) for name in player_names]
+
+    vocabulary: Dict[str, int] = {}
+    ranking_encoded = encode_names(ranking_norms, vocabulary)
+    query_encoded = encode_names(query_norms, vocabulary)
+
+    results: List[MatchResult] = []
+
+    def add_result(query_norm: str, scores: List[Tuple[int, float]]):
+        position, score = _pick_best(query_norm, scores, ranking_norms, threshold, tie_break)
+        if position is None:
+            results.append((None, None, 0))
+        else:
+            ranking_name, player = ranking_players[position]
+            results.append((player, ranking_name, score))
+
+    if not ranking_players:
+        return [(None, None, 0) for _ in player_names]
+
+    if use_numpy:
+        for start, block in similarity_matrix_numpy(query_encoded, ranking_encoded, len(vocabulary)):
+            for offset, row in enumerate(block):
+                best = float(row.max())
+                # Solo los candidatos empatados con el máximo influyen en la elección
+                positions = np.flatnonzero(row == row.max()) if best > threshold else []
+                add_result(query_norms[start + offset], [(int(position), best) for position in positions])
+    else:
+        for query_norm, row in zip(query_norms, similarity_rows_python(query_encoded, ranking_encoded)):
+            add_result(query_norm, list(row.items()))
+
+    return results
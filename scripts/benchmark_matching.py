@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compara los motores de emparejamiento de analyze_players.py
+
+Usa los participantes de tmp/individual-lista-participantes.json y los rankings
+de jsons-agp/. Con --scale N se repite la lista de participantes N veces (con
+pequeñas variaciones) para medir cómo escala cada motor.
+
+Uso (desde la raíz del repositorio):
+    python scripts/benchmark_matching.py [--scale 10] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+from analyze_players import load_all_rankings, load_participants_with_fix, match_participants
+import batch_matcher
+
+PARTICIPANTS_FILE = "tmp/individual-lista-participantes.json"
+RANKINGS_DIR = "jsons-agp"
+
+def _vary_name(name, rng):
+    """Introduce un pequeño cambio en el nombre (tilde, letra o espacio)"""
+    if len(name) < 4:
+        return name
+    position = rng.randrange(1, len(name) - 1)
+    change = rng.choice(("drop", "swap", "accent"))
+    if change == "drop":
+        return name[:position] + name[position + 1:]
+    if change == "swap":
+        return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+    return name.replace("a", "á", 1)
+
+def build_names(participants, scale, seed=33):
+    names = [participant['name'] for participant in participants]
+    rng = random.Random(seed)
+    extra = [_vary_name(rng.choice(names), rng) for _ in range(len(names) * (scale - 1))]
+    return names + extra
+
+def time_engine(names, rankings, engine, repeat, **options):
+    """Devuelve (mejor tiempo en segundos, resultados)"""
+    best = None
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = match_participants(names, rankings, engine=engine, **options)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los motores de emparejamiento")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplicador de participantes")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por motor (se usa la mejor)")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        participants = load_participants_with_fix(PARTICIPANTS_FILE)
+        rankings = load_all_rankings(RANKINGS_DIR)
+    if not participants or not rankings:
+        print("❌ No se pudieron cargar participantes o rankings (ejecutar desde la raíz del repositorio)")
+        return
+
+    names = build_names(participants, args.scale)
+    total_ranking = sum(len(ranking['jugadores']) for ranking in rankings.values())
+    print(f"📋 {len(names)} participantes x {total_ranking} jugadores de ranking ({len(rankings)} ligas)")
+    print(f"   NumPy: {'sí' if batch_matcher.np is not None else 'no (se usa el índice en Python puro)'}")
+    print("=" * 60)
+
+    seq_time, seq_results = time_engine(names, rankings, "sequencematcher", args.repeat)
+    vec_time, vec_results = time_engine(names, rankings, "vector", args.repeat)
+
+    same_match = sum(
+        1 for (seq_player, seq_liga, _), (vec_player, vec_liga, _) in zip(seq_results, vec_results)
+        if seq_player is vec_player and seq_liga == vec_liga
+    )
+    seq_found = sum(1 for player, _, _ in seq_results if player)
+    vec_found = sum(1 for player, _, _ in vec_results if player)
+
+    print(f"sequencematcher: {seq_time:.3f}s ({seq_found} encontrados)")
+    print(f"vector:          {vec_time:.3f}s ({vec_found} encontrados)")
+    print(f"Aceleración:     {seq_time / vec_time:.1f}x")
+    print(f"Coincidencia entre motores: {same_match}/{len(names)} ({same_match / len(names) * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
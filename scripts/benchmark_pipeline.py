@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de escalado del pipeline completo con torneos sintéticos
+
+Genera un torneo sintético (ver synthetic_tournament.py) a cada escala y mide
+el tiempo y el pico de memoria (tracemalloc) de cada etapa:
+
+- extract_ranking_data: rankings HTML -> jugadores (BeautifulSoup)
+- extract_ranking_stream: lo mismo con el parser en streaming
+- find_player_in_rankings: emparejamiento de participantes con los rankings
+- create_extended_tournament: enrich_players + resumen + JSON extendido
+- merge_tournament_data: fusión (delta) de una actualización de Cuescore
+- json_save / json_load: tournament_extended.json con indent=2 (json_io, backend
+  elegido con --json-backend)
+
+Los resultados se guardan como baseline (JSON) para comparar entre commits:
+
+    python scripts/benchmark_pipeline.py --scales 1 10 --save-baseline
+    python scripts/benchmark_pipeline.py --scales 1 10 --compare
+
+Con --compare el script termina con código 1 si alguna etapa es más lenta
+que la baseline por encima de --tolerance.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+sys.path.append(os.path.dirname(__file__))
+from synthetic_tournament import generate_dataset, TEMPLATE_TOURNAMENT
+from extract_ranking import extract_ranking_data, iter_ranking_players
+from analyze_players import load_all_rankings, build_ranking_index, find_player_in_rankings
+from create_extended_tournament import create_extended_tournament
+from refresh_tournament import merge_tournament_data
+from models import encode_tournament
+import json_io
+
+DEFAULT_BASELINE = "benchmarks/pipeline_baseline.json"
+DEFAULT_SCALES = (1, 10)  # x100 tarda mucho (el emparejamiento crece más que linealmente): --scales 1 10 100
+DEFAULT_TOLERANCE = 1.3  # Más de un 30 % más lento que la baseline es una regresión
+MIN_REGRESSION_SECONDS = 0.05  # Por debajo de esta diferencia es ruido de medida
+BASELINE_VERSION = 1
+MIB = 1024 * 1024
+
+STAGES = (
+    "extract_ranking_data",
+    "extract_ranking_stream",
+    "find_player_in_rankings",
+    "create_extended_tournament",
+    "merge_tournament_data",
+    "json_save",
+    "json_load",
+)
+
+def _load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _html_files(html_dir: str) -> List[str]:
+    return [os.path.join(html_dir, name) for name in sorted(os.listdir(html_dir)) if name.endswith(".html")]
+
+def build_stages(dataset: Dict[str, Any], workdir: str) -> Dict[str, Callable[[], int]]:
+    """
+    Prepara una función por etapa. Cada función devuelve el número de
+    elementos procesados (filas, participantes, partidas o bytes).
+    """
+    paths = dataset["paths"]
+    html_files = _html_files(paths["html_dir"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        rankings = load_all_rankings(paths["json_dir"])
+    participants = _load_json(paths["participants"])
+    live = _load_json(paths["live"])
+    extended_file = os.path.join(workdir, "tournament_extended.json")
+    state: Dict[str, Any] = {}
+
+    def extract_soup() -> int:
+        return sum(len(extract_ranking_data(path)) for path in html_files)
+
+    def extract_stream() -> int:
+        return sum(sum(1 for _ in iter_ranking_players(path)) for path in html_files)
+
+    def match_players() -> int:
+        index = build_ranking_index(rankings)
+        return sum(1 for participant in participants
+                   if find_player_in_rankings(participant["name"], rankings, index)[0])
+
+    def create_extended() -> int:
+        # create_extended_tournament lee y escribe en el directorio actual, donde
+        # generate_dataset deja el análisis y el torneo con los nombres esperados
+        previous = os.getcwd()
+        os.chdir(workdir)
+        try:
+            state["extended"] = create_extended_tournament()
+        finally:
+            os.chdir(previous)
+        return len(state["extended"]["matches"])
+
+    def merge() -> int:
+        merged = merge_tournament_data(live, state["extended"], delta=True)
+        return len(merged["match_delta"]["changed"]) + len(merged["match_delta"]["added"])
+
+    def json_save() -> int:
+        json_io.write_json(extended_file, encode_tournament(state["extended"]), skip_unchanged=False)
+        return os.path.getsize(extended_file)
+
+    def json_load() -> int:
+        return len(json_io.load(extended_file)["matches"])
+
+    return {
+        "extract_ranking_data": extract_soup,
+        "extract_ranking_stream": extract_stream,
+        "find_player_in_rankings": match_players,
+        "create_extended_tournament": create_extended,
+        "merge_tournament_data": merge,
+        "json_save": json_save,
+        "json_load": json_load,
+    }
+
+def measure(stage: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """
+    Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecución
+    aparte con tracemalloc (que ralentiza y no debe contar en el tiempo)
+    """
+    best = None
+    items = 0
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            items = stage()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": round(best, 4), "peak_mib": round(peak / MIB, 2), "items": items}
+
+def run_scale(scale: int, stages: List[str], repeat: int, seed: int,
+              template: str, keep_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Genera el conjunto sintético de una escala y mide las etapas pedidas"""
+    workdir = keep_dir or tempfile.mkdtemp(prefix=f"benchmark-x{scale}-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        started = time.perf_counter()
+        dataset = generate_dataset(workdir, scale, seed, template)
+        print(f"\n📦 x{scale}: {dataset['ranking_players']} jugadores de ranking, "
+              f"{dataset['participants']} participantes, {dataset['matches']} partidas "
+              f"(generado en {time.perf_counter() - started:.1f} s)")
+
+        functions = build_stages(dataset, workdir)
+        # Las etapas posteriores necesitan los datos extendidos (y json_load el archivo)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if set(stages) & {"merge_tournament_data", "json_save", "json_load"}:
+                functions["create_extended_tournament"]()
+            if "json_load" in stages:
+                functions["json_save"]()
+
+        results = {}
+        for name in STAGES:
+            if name not in stages:
+                continue
+            results[name] = measure(functions[name], repeat)
+            result = results[name]
+            print(f"   {name:<28} {result['seconds']:>9.3f} s  {result['peak_mib']:>9.1f} MiB  ({result['items']})")
+
+        return {
+            "ranking_players": dataset["ranking_players"],
+            "participants": dataset["participants"],
+            "matches": dataset["matches"],
+            "stages": results,
+        }
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_baseline(path: str, results: Dict[str, Any], args):
+    """Guarda los resultados (y el entorno en el que se midieron) como baseline"""
+    baseline = {
+        "version": BASELINE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "json_backend": json_io.get_backend(),
+        "scales": results,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"\n💾 Baseline guardada en: {path}")
+
+def compare_with_baseline(path: str, results: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compara tiempos y memoria con la baseline.
+    Devuelve las etapas cuyo tiempo supera la tolerancia (y MIN_REGRESSION_SECONDS).
+    """
+    try:
+        baseline = _load_json(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo cargar la baseline {path}: {e}")
+        return []
+
+    print(f"\n📊 Comparación con la baseline ({baseline.get('commit') or 'sin commit'}, "
+          f"{baseline.get('created', '')}), tolerancia x{tolerance:g}")
+    regressions = []
+    for scale, scale_results in results.items():
+        baseline_stages = baseline.get("scales", {}).get(scale, {}).get("stages", {})
+        for name, result in scale_results["stages"].items():
+            reference = baseline_stages.get(name)
+            if not reference or not reference["seconds"]:
+                print(f"   x{scale} {name:<28} sin referencia")
+                continue
+            ratio = result["seconds"] / reference["seconds"]
+            memory_ratio = result["peak_mib"] / reference["peak_mib"] if reference["peak_mib"] else 1.0
+            regression = ratio > tolerance and result["seconds"] - reference["seconds"] > MIN_REGRESSION_SECONDS
+            flag = "❌" if regression else "✅"
+            print(f"   {flag} x{scale} {name:<28} tiempo x{ratio:.2f}  memoria x{memory_ratio:.2f}")
+            if regression:
+                regressions.append(f"x{scale} {name}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado del pipeline con torneos sintéticos")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="Multiplicadores del tamaño actual (por defecto 1 10)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES),
+                        help="Etapas a medir (por defecto todas)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por etapa (se usa la mejor)")
+    parser.add_argument("--seed", type=int, default=33)
+    parser.add_argument("--template", default=TEMPLATE_TOURNAMENT, help="Torneo de Cuescore usado como plantilla")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Archivo de la baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como baseline")
+    parser.add_argument("--compare", action="store_true", help="Compara con la baseline guardada")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Cociente de tiempo a partir del cual se considera regresión")
+    parser.add_argument("--json-backend", choices=json_io.available_backends(), default=json_io.get_backend(),
+                        help="Backend de json_io para json_save/json_load")
+    parser.add_argument("--keep-dir", default=None,
+                        help="Conserva los datos generados en <dir>/x<escala> en lugar de un temporal")
+    args = parser.parse_args()
+    json_io.set_backend(args.json_backend)
+
+    print(f"🏁 Benchmark del pipeline: escalas {args.scales}, {args.repeat} repeticiones, JSON: {args.json_backend}")
+    results = {}
+    for scale in args.scales:
+        keep_dir = os.path.join(args.keep_dir, f"x{scale}") if args.keep_dir else None
+        results[str(scale)] = run_scale(scale, args.stages, args.repeat, args.seed, args.template, keep_dir)
+
+    regressions = []
+    if args.compare:
+        regressions = compare_with_baseline(args.baseline, results, args.tolerance)
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args)
+
+    if regressions:
+        print(f"\n❌ Regresiones: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grafo del cuadro de doble eliminación
+
+Cada partida de Cuescore indica a qué partida pasa el ganador (winnerNext) y
+el perdedor (loserNext, vacío si queda eliminado). Con eso se construye un
+grafo indexado por matchno y se precalcula, para cada jugador, su próxima
+partida, los posibles rivales y el camino que le queda si sigue ganando.
+
+Cuando termina una partida solo se recalculan las partidas que dependen de
+ella (su subárbol por winnerNext/loserNext) y los jugadores afectados, así que
+el daemon puede actualizar el cuadro sin recorrer las 479 partidas.
+
+El resultado se publica en el formato compacto (clave "bracket") para que el
+visor responda "¿contra quién juega?" o "¿a dónde pasa el ganador?" con una
+consulta directa.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional, Set, FrozenSet
+
+sys.path.append(os.path.dirname(__file__))
+from models import Match, decode_matches
+
+WALKOVER_PLAYER_ID = 1000615  # Jugador "Walk Over" de Cuescore
+MAX_CANDIDATES = 8  # Posibles rivales que se publican; si hay más, solo el número
+BRACKET_VERSION = 1
+
+def _next_matchno(value: Any) -> Optional[int]:
+    """winnerNext/loserNext llegan como número o como cadena vacía"""
+    try:
+        matchno = int(value)
+    except (TypeError, ValueError):
+        return None
+    return matchno if matchno > 0 else None
+
+def is_real_player(player_id: int) -> bool:
+    """Excluye huecos sin decidir y el jugador Walk Over"""
+    return bool(player_id) and player_id != WALKOVER_PLAYER_ID
+
+def match_outcome(node: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """
+    Ganador y perdedor de una partida terminada ({"winner", "loser"}).
+    En los walkovers (0-0) gana el jugador que no es Walk Over.
+    """
+    if node["status"] != "finished":
+        return None
+
+    a, b = node["a"], node["b"]
+    if node["scoreA"] != node["scoreB"]:
+        winner, loser = (a, b) if node["scoreA"] > node["scoreB"] else (b, a)
+    elif b == WALKOVER_PLAYER_ID and a:
+        winner, loser = a, b
+    elif a == WALKOVER_PLAYER_ID and b:
+        winner, loser = b, a
+    else:
+        return None
+    return {"winner": winner, "loser": loser}
+
+def build_node(match: Match) -> Dict[str, Any]:
+    """Nodo del grafo con los campos de la partida que afectan al cuadro"""
+    return {
+        "matchno": match.matchno,
+        "round": match.round,
+        "roundName": match.value("roundName", ""),
+        "status": match.value("matchstatus", ""),
+        "a": match.player_id("A"),
+        "b": match.player_id("B"),
+        "aName": match.player_name("A"),
+        "bName": match.player_name("B"),
+        "scoreA": match.score_a or 0,
+        "scoreB": match.score_b or 0,
+        "winnerNext": _next_matchno(match.winner_next),
+        "loserNext": _next_matchno(match.loser_next),
+    }
+
+def _node_signature(node: Dict[str, Any]) -> tuple:
+    return (node["status"], node["a"], node["b"], node["scoreA"], node["scoreB"],
+            node["winnerNext"], node["loserNext"])
+
+class BracketGraph:
+    """Grafo del cuadro con las vistas por jugador precalculadas"""
+
+    def __init__(self, matches: List[Match]):
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        self.feeders: Dict[int, List[tuple]] = {}
+        self.names: Dict[int, str] = {}
+        self.player_matches: Dict[int, Set[int]] = {}
+        self._entrants: Dict[int, FrozenSet[int]] = {}
+        self.player_views: Dict[int, Dict[str, Any]] = {}
+
+        for match in matches:
+            node = build_node(match)
+            if node["matchno"] is not None:
+                self.nodes[node["matchno"]] = node
+        self._index_edges()
+        for node in self.nodes.values():
+            self._register_players(node)
+        for player_id in self._players_in(self.nodes):
+            self._refresh_player(player_id)
+
+    def _index_edges(self):
+        """Partidas de origen de cada partida: [(matchno, "winner"|"loser")]"""
+        self.feeders = {matchno: [] for matchno in self.nodes}
+        for matchno in sorted(self.nodes):
+            node = self.nodes[matchno]
+            for edge in ("winner", "loser"):
+                target = node[edge + "Next"]
+                if target in self.feeders:
+                    self.feeders[target].append((matchno, edge))
+
+    def _register_players(self, node: Dict[str, Any]):
+        """Actualiza los nombres y el índice jugador -> partidas"""
+        for side in ("a", "b"):
+            if is_real_player(node[side]):
+                self.names[node[side]] = node[side + "Name"]
+                self.player_matches.setdefault(node[side], set()).add(node["matchno"])
+
+    def _unregister_players(self, node: Dict[str, Any]):
+        for side in ("a", "b"):
+            self.player_matches.get(node[side], set()).discard(node["matchno"])
+
+    def _players_in(self, matchnos) -> Set[int]:
+        players = set()
+        for matchno in matchnos:
+            node = self.nodes[matchno]
+            players.update(p for p in (node["a"], node["b"]) if is_real_player(p))
+        return players
+
+    def entrants(self, matchno: int) -> FrozenSet[int]:
+        """
+        Jugadores que pueden llegar a disputar la partida: los que ya ocupan un
+        hueco más los posibles ganadores/perdedores de las partidas de origen
+        cuyo resultado todavía no se ha colocado.
+        """
+        cached = self._entrants.get(matchno)
+        if cached is not None:
+            return cached
+
+        node = self.nodes[matchno]
+        placed = {p for p in (node["a"], node["b"]) if p}
+        result = set(placed)
+        for feeder, edge in self.feeders.get(matchno, []):
+            outcome = match_outcome(self.nodes[feeder])
+            if outcome is not None:
+                # Resultado ya decidido: normalmente Cuescore ya lo ha colocado
+                if len(placed) < 2 and outcome[edge]:
+                    result.add(outcome[edge])
+                continue
+            if len(placed) < 2:
+                result.update(self.entrants(feeder))
+
+        entrants = frozenset(result)
+        self._entrants[matchno] = entrants
+        return entrants
+
+    def winner_path(self, matchno: int) -> List[int]:
+        """Partidas que quedan si se ganan todas a partir de matchno"""
+        path = []
+        while matchno is not None and matchno not in path:
+            path.append(matchno)
+            matchno = self.nodes[matchno]["winnerNext"] if matchno in self.nodes else None
+        return path
+
+    def current_match(self, player_id: int) -> Optional[int]:
+        """
+        Próxima partida del jugador: la pendiente en la que ya está colocado o,
+        si aún no se ha colocado, a la que le lleva su último resultado
+        """
+        last_finished = None
+        for matchno in sorted(self.player_matches.get(player_id, ())):
+            node = self.nodes[matchno]
+            if node["status"] != "finished":
+                return matchno
+            last_finished = matchno
+
+        if last_finished is None:
+            return None
+        node = self.nodes[last_finished]
+        outcome = match_outcome(node)
+        if outcome is None:
+            return None
+        return node["winnerNext"] if outcome["winner"] == player_id else node["loserNext"]
+
+    def _build_player_view(self, player_id: int) -> Dict[str, Any]:
+        matchno = self.current_match(player_id)
+        if matchno is None or matchno not in self.nodes:
+            return {"status": self._final_status(player_id)}
+
+        node = self.nodes[matchno]
+        view: Dict[str, Any] = {
+            "status": "playing" if node["status"] == "playing" else "pending",
+            "match": matchno,
+            "roundName": node["roundName"],
+            "ifWin": node["winnerNext"],
+            "ifLose": node["loserNext"],
+            "path": self.winner_path(matchno),
+        }
+
+        if player_id in (node["a"], node["b"]):
+            opponent = node["b"] if node["a"] == player_id else node["a"]
+        else:
+            opponent = 0
+        if opponent:
+            view["opponent"] = opponent
+        else:
+            candidates = sorted(p for p in self.entrants(matchno)
+                                if is_real_player(p) and p != player_id)
+            if len(candidates) <= MAX_CANDIDATES:
+                view["candidates"] = candidates
+            else:
+                view["candidateCount"] = len(candidates)
+        return view
+
+    def _final_status(self, player_id: int) -> str:
+        """
+        Estado de un jugador sin partidas pendientes. Las rondas de
+        clasificación tampoco tienen winnerNext (el cuadro final se sortea
+        aparte), así que solo el ganador de la última ronda es campeón.
+        """
+        matchnos = self.player_matches.get(player_id)
+        if not matchnos:
+            return "eliminated"
+
+        node = self.nodes[max(matchnos)]
+        outcome = match_outcome(node)
+        if node["winnerNext"] is None and outcome and outcome["winner"] == player_id:
+            final_round = max((other["round"] or 0 for other in self.nodes.values()), default=0)
+            return "champion" if node["round"] == final_round else "qualified"
+        return "eliminated"
+
+    def _refresh_player(self, player_id: int):
+        if not self.player_matches.get(player_id):
+            # Ya no aparece en el cuadro (cambio de inscripciones o del sorteo)
+            self.player_views.pop(player_id, None)
+            self.names.pop(player_id, None)
+            self.player_matches.pop(player_id, None)
+            return
+        self.player_views[player_id] = self._build_player_view(player_id)
+
+    def descendants(self, matchnos) -> Set[int]:
+        """Partidas alcanzables por winnerNext/loserNext (incluidas las de partida)"""
+        pending = [m for m in matchnos if m in self.nodes]
+        seen = set(pending)
+        while pending:
+            node = self.nodes[pending.pop()]
+            for target in (node["winnerNext"], node["loserNext"]):
+                if target in self.nodes and target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+        return seen
+
+    def update(self, matches: List[Match]) -> Set[int]:
+        """
+        Aplica las partidas nuevas o modificadas y recalcula solo el subárbol
+        afectado. Devuelve los matchno cuyo estado ha cambiado.
+        """
+        changed = set()
+        edges_changed = False
+        players_before = set()
+        for match in matches:
+            node = build_node(match)
+            matchno = node["matchno"]
+            if matchno is None:
+                continue
+            previous = self.nodes.get(matchno)
+            if previous is not None and _node_signature(previous) == _node_signature(node):
+                continue
+            if previous is None or (previous["winnerNext"], previous["loserNext"]) != \
+                    (node["winnerNext"], node["loserNext"]):
+                edges_changed = True
+            if previous is not None:
+                players_before.update(p for p in (previous["a"], previous["b"]) if is_real_player(p))
+                self._unregister_players(previous)
+            self.nodes[matchno] = node
+            self._register_players(node)
+            changed.add(matchno)
+
+        if not changed:
+            return changed
+        if edges_changed:
+            self._index_edges()
+
+        affected = self.descendants(changed)
+        for matchno in affected:
+            self._entrants.pop(matchno, None)
+
+        players = players_before | self._players_in(affected)
+        players.update(player_id for player_id, view in self.player_views.items()
+                       if view.get("match") in affected)
+        for player_id in players:
+            self._refresh_player(player_id)
+        return changed
+
+    def to_compact(self) -> Dict[str, Any]:
+        """
+        Estructura publicada en el formato compacto:
+        next[matchno] = [winnerNext, loserNext] (0 si no hay) y la vista de
+        cada jugador con su próxima partida, rival o candidatos y camino.
+        """
+        champion = next((player_id for player_id, view in self.player_views.items()
+                         if view["status"] == "champion"), None)
+        return {
+            "version": BRACKET_VERSION,
+            "next": {str(matchno): [node["winnerNext"] or 0, node["loserNext"] or 0]
+                     for matchno, node in sorted(self.nodes.items())},
+            "players": {str(player_id): view for player_id, view in sorted(self.player_views.items())},
+            "names": {str(player_id): name for player_id, name in sorted(self.names.items())},
+            "champion": champion,
+        }
+
+def build_bracket(matches: List[Match]) -> Dict[str, Any]:
+    """Construye el cuadro y devuelve su estructura compacta"""
+    return BracketGraph(matches).to_compact()
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python bracket.py <tournament_extended.json> [playerId]")
+        return
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    graph = BracketGraph(decode_matches(data.get("matches", [])))
+    if len(sys.argv) > 2:
+        player_id = int(sys.argv[2])
+        print(json.dumps(graph.player_views.get(player_id), ensure_ascii=False, indent=2))
+        return
+
+    statuses: Dict[str, int] = {}
+    for view in graph.player_views.values():
+        statuses[view["status"]] = statuses.get(view["status"], 0) + 1
+    print(f"🎱 Cuadro: {len(graph.nodes)} partidas, {len(graph.player_views)} jugadores")
+    print(f"   Estados: {statuses}")
+    compact = graph.to_compact()
+    if compact["champion"]:
+        print(f"🏆 Campeón: {graph.names.get(compact['champion'], compact['champion'])}")
+
+if __name__ == "__main__":
+    main()
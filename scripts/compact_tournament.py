@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formato compacto y normalizado de los datos del torneo
+
+En lugar de repetir el objeto completo de Cuescore y el ranking_info en cada
+partida, se guarda una tabla de jugadores indexada por playerId y partidas que
+solo contienen IDs y resultados. El visor reconstruye la vista combinada al
+cargar (ver expandCompactTournament en tournament-viewer/js/app.js).
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional
+
+sys.path.append(os.path.dirname(__file__))
+from create_extended_tournament import (
+    build_ranking_info, build_player_details, build_player_index, PLAYER_INDEX_STAT_FIELDS
+)
+from atomic_io import atomic_write_bytes
+from bracket import BracketGraph
+from models import Match, decode_tournament
+
+SCHEMA_NAME = "torneo-gallego-compact"
+SCHEMA_VERSION = 1
+
+# Campos de cada partida que se conservan en el formato compacto
+MATCH_FIELDS = (
+    "matchId", "matchno", "round", "branch", "scoreA", "scoreB", "raceTo",
+    "matchstatus", "curVersion", "winnerNext", "loserNext", "starttime", "stoptime"
+)
+
+# Claves de primer nivel que se generan aparte y no se copian tal cual
+NORMALIZED_KEYS = ("players", "matches", "player_index")
+
+# Claves derivadas que solo existen en el formato compacto
+DERIVED_KEYS = ("bracket",)
+
+def _player_id_key(player_id: Any) -> str:
+    """Las claves de la tabla de jugadores son strings (claves de objeto JSON)"""
+    return str(player_id)
+
+def _compact_match_player(match: Match, side: str, players: Dict[str, Dict[str, Any]],
+                          compact: Dict[str, Any]):
+    """Sustituye el jugador de un lado ('A' o 'B') por su playerId, añadiéndolo a la tabla"""
+    player_id = match.player_id(side)
+    name = match.player_name(side)
+    key_prefix = side.lower()
+    compact[key_prefix] = player_id
+
+    # Los huecos aún no decididos ("Winner of #31") llegan con playerId 0
+    if not player_id:
+        compact[key_prefix + "Name"] = name
+        return
+
+    key = _player_id_key(player_id)
+    if key not in players:
+        players[key] = {"name": name}
+    elif players[key]["name"] != name:
+        compact[key_prefix + "Name"] = name
+
+def build_compact_tournament(extended_data: Dict[str, Any],
+                             bracket: Optional[BracketGraph] = None,
+                             player_index: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Convierte los datos extendidos del torneo (ver models.decode_tournament)
+    al formato compacto normalizado. Si se pasa el cuadro (BracketGraph) o el índice de jugadores ya calculados
+    se reutilizan; si no, se construyen a partir de las partidas.
+    """
+    players: Dict[str, Dict[str, Any]] = {}
+    participants: List[int] = []
+
+    # Jugadores con análisis de rankings (lista "players" del visor)
+    for record in extended_data.get("players", []):
+        player_id = record.player_id
+        if player_id is None:
+            continue
+        entry = {key: value for key, value in record.items()
+                 if key not in ("player_id", "nombre_gallego")}
+        players[_player_id_key(player_id)] = {"name": record.value("nombre_gallego", ""), **entry}
+        participants.append(player_id)
+
+    rounds: Dict[str, str] = {}
+    disciplines: Dict[str, int] = {}
+    matches = []
+
+    for match in extended_data.get("matches", []):
+        compact = {field: match.value(field) for field in MATCH_FIELDS}
+        rounds.setdefault(str(match.round), match.value("roundName", ""))
+        discipline = match.value("discipline", "")
+        disciplines[discipline] = disciplines.get(discipline, 0) + 1
+
+        _compact_match_player(match, "A", players, compact)
+        _compact_match_player(match, "B", players, compact)
+        matches.append(compact)
+
+    discipline = max(disciplines, key=disciplines.get) if disciplines else ""
+
+    # La tabla de jugadores hace de índice por playerId: balance, frames,
+    # próxima partida y versión de su ficha (data/players/<id>.json)
+    if player_index is None:
+        player_index = build_player_index(
+            build_player_details(extended_data.get("matches", []), extended_data.get("players", []))
+        )
+    for key, entry in player_index.items():
+        if key in players:
+            players[key].update({field: entry[field] for field in PLAYER_INDEX_STAT_FIELDS if field in entry})
+
+    compact_data = {
+        "schema": SCHEMA_NAME,
+        "schema_version": SCHEMA_VERSION,
+    }
+    for key, value in extended_data.items():
+        if key not in NORMALIZED_KEYS:
+            compact_data[key] = value
+    compact_data.update({
+        "discipline": discipline,
+        "rounds": rounds,
+        "participants": participants,
+        "players": players,
+        "matches": matches,
+    })
+    if bracket is None:
+        bracket = BracketGraph(extended_data.get("matches", []))
+    compact_data["bracket"] = bracket.to_compact()
+    return compact_data
+
+def _expand_match_player(compact: Dict[str, Any], side: str,
+                         players: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Reconstruye el jugador de una partida a partir de la tabla de jugadores"""
+    player_id = compact.get(side) or 0
+    entry = players.get(_player_id_key(player_id)) if player_id else None
+    name = compact.get(side + "Name") or (entry or {}).get("name", "")
+
+    ranking_info = None
+    if entry is not None and "liga" in entry:
+        ranking_info = build_ranking_info(entry)
+
+    elo = entry.get("elo") if entry is not None else None
+    return {"playerId": player_id, "name": name, "ranking_info": ranking_info, "elo": elo}
+
+def expand_compact_tournament(compact_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reconstruye la vista combinada (players como lista, partidas con jugadores)
+    a partir del formato compacto. Es el equivalente en Python del cargador del visor.
+    """
+    if compact_data.get("schema") != SCHEMA_NAME:
+        raise ValueError("Los datos no están en formato compacto")
+    if compact_data.get("schema_version", 0) > SCHEMA_VERSION:
+        raise ValueError(f"Versión de esquema no soportada: {compact_data.get('schema_version')}")
+
+    players = compact_data.get("players", {})
+    rounds = compact_data.get("rounds", {})
+    discipline = compact_data.get("discipline", "")
+
+    player_list = []
+    for player_id in compact_data.get("participants", []):
+        entry = {key: value for key, value in players.get(_player_id_key(player_id), {}).items()
+                 if key not in PLAYER_INDEX_STAT_FIELDS}
+        name = entry.pop("name", "")
+        player_list.append({"player_id": player_id, "nombre_gallego": name, **entry})
+
+    matches = []
+    for compact in compact_data.get("matches", []):
+        match = {field: compact.get(field) for field in MATCH_FIELDS}
+        match["roundName"] = rounds.get(str(compact.get("round")), "")
+        match["discipline"] = discipline
+        match["playerA"] = _expand_match_player(compact, "a", players)
+        match["playerB"] = _expand_match_player(compact, "b", players)
+        matches.append(match)
+
+    expanded = {key: value for key, value in compact_data.items()
+                if key not in ("schema", "schema_version", "discipline", "rounds", "participants")
+                and key not in DERIVED_KEYS}
+    expanded["players"] = player_list
+    expanded["matches"] = matches
+    return expanded
+
+def serialize_compact_tournament(compact_data: Dict[str, Any]) -> str:
+    """Serializa los datos compactos sin espacios"""
+    return json.dumps(compact_data, ensure_ascii=False, separators=(",", ":"))
+
+def save_compact_tournament(extended_data: Dict[str, Any], output_file: str) -> int:
+    """
+    Genera y guarda la versión compacta de los datos extendidos.
+    Devuelve el número de bytes escritos.
+    """
+    compact_data = build_compact_tournament(extended_data)
+    content = serialize_compact_tournament(compact_data).encode("utf-8")
+
+    atomic_write_bytes(output_file, content)
+    return len(content)
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python compact_tournament.py <tournament_extended.json> <salida.min.json>")
+        return
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        extended_data = decode_tournament(json.load(f))
+
+    size = save_compact_tournament(extended_data, sys.argv[2])
+    original_size = os.path.getsize(sys.argv[1])
+    print(f"✅ Formato compacto guardado en: {sys.argv[2]}")
+    print(f"   {original_size} bytes -> {size} bytes ({original_size / size:.1f}x más pequeño)")
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,66 @@
 """
 Configuración para el sistema de actualización del torneo
+
+Algunos valores se pueden sobrescribir con variables de entorno (por ejemplo
+para apuntar a scripts/mock_cuescore_server.py):
+CUESCORE_API_URL, CUESCORE_TOURNAMENT_ID, TOURNAMENT_DATA_DIR, TOURNAMENT_HISTORY_DIR,
+CUESCORE_CACHE_DIR, CUESCORE_RATE_LIMIT_DELAY, REFRESH_METRICS_DIR, TOURNAMENT_DB y
+ELO_STATE_FILE.
 """
+import os
+
 INDIVIDUAL_TERCERA_TORNEO_ID = "63505243"
 # ID del torneo en Cuescore
 # Este es el ID que aparece en la URL del torneo
-TOURNAMENT_ID = INDIVIDUAL_TERCERA_TORNEO_ID
+TOURNAMENT_ID = os.environ.get("CUESCORE_TOURNAMENT_ID", INDIVIDUAL_TERCERA_TORNEO_ID)
 
 # URL base de la API de Cuescore
-CUESCORE_API_URL = "https://api.cuescore.com/tournament"
+CUESCORE_API_URL = os.environ.get("CUESCORE_API_URL", "https://api.cuescore.com/tournament")
 
 # Archivos de datos
-TOURNAMENT_FILE = "tournament-viewer/data/tournament_extended.json"
-BACKUP_FILE = "tournament-viewer/data/tournament_backup.json"
+DATA_DIR = os.environ.get("TOURNAMENT_DATA_DIR", "tournament-viewer/data")  # Directorio publicado (artefactos con hash y manifest.json)
+TOURNAMENT_FILE = f"{DATA_DIR}/tournament_extended.json"
+# Historial de versiones (ver snapshot_journal.py): fuera del directorio publicado para no desplegarlo con el visor
+JOURNAL_DIR = os.environ.get("TOURNAMENT_HISTORY_DIR", "history")
+COMPACT_TOURNAMENT_FILE = f"{DATA_DIR}/tournament.min.json"  # Formato compacto para el visor
+CACHE_DIR = os.environ.get("CUESCORE_CACHE_DIR", ".cache/cuescore")  # Última respuesta de Cuescore y sus validadores (ETag / Last-Modified)
+
+# Torneos que se actualizan a la vez con refresh_tournament.py --all.
+# Cada torneo necesita sus propios archivos y directorio publicado.
+TOURNAMENTS = {
+    TOURNAMENT_ID: {
+        "file": TOURNAMENT_FILE,
+        "journal_dir": JOURNAL_DIR,
+        "data_dir": DATA_DIR,
+        "compact_file": COMPACT_TOURNAMENT_FILE,
+    },
+}
 
 # Configuración de actualización
 UPDATE_INTERVAL_MINUTES = 10  # Cada cuántos minutos se actualiza automáticamente
 CHECK_INTERVAL_SECONDS = 30   # Cada cuántos segundos verifica el frontend
 
+# Modo daemon (refresh_tournament.py --daemon): intervalos adaptativos
+DAEMON_LIVE_INTERVAL_SECONDS = 60      # Con partidas en juego
+DAEMON_ACTIVE_INTERVAL_SECONDS = 180   # Con partidas en espera durante el torneo
+DAEMON_IDLE_INTERVAL_SECONDS = 1800    # Fuera de horario o con el torneo terminado
+DAEMON_MAX_BACKOFF_SECONDS = 900       # Espera máxima tras errores consecutivos
+DAEMON_QUIET_BACKOFF_FACTOR = 1.5      # Alargamiento del intervalo por cada consulta sin cambios
+DAEMON_STABLE_POLLS = 3                # Consultas sin cambios tras terminar el torneo para detenerse
+
+# Historial de versiones
+JOURNAL_CHECKPOINT_INTERVAL = 20  # Cada cuántas versiones se guarda el estado completo
+
+# Almacén SQLite opcional (ver tournament_store.py); vacío = desactivado
+TOURNAMENT_DB = os.environ.get("TOURNAMENT_DB", "")
+
+# Rating Elo incremental de todos los torneos (ver elo_ratings.py); se versiona con el historial
+ELO_STATE_FILE = os.environ.get("ELO_STATE_FILE", f"{JOURNAL_DIR}/elo_state.json")
+
+# Métricas por etapa de cada actualización (refresh_tournament.py --metrics, ver metrics.py)
+METRICS_DIR = os.environ.get("REFRESH_METRICS_DIR", ".cache/metrics")
+METRICS_KEEP = 2000  # Runs que se conservan (un fin de semana de daemon a 1 por minuto)
+
 # Headers para las peticiones HTTP
 REQUEST_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (compatible; TournamentUpdater/1.0)',
@@ -30,8 +74,9 @@ NOTIFICATION_DURATION_ERROR = 5000    # 5 segundos
 
 # Configuración de rate limiting
 MIN_UPDATE_INTERVAL_SECONDS = 30  # Mínimo entre actualizaciones manuales
-API_RATE_LIMIT_DELAY = 2  # Segundos de espera entre peticiones a la API
+API_RATE_LIMIT_DELAY = float(os.environ.get("CUESCORE_RATE_LIMIT_DELAY", 2))  # Segundos de espera entre peticiones a la API
 MAX_RETRIES = 3  # Máximo de reintentos si falla la API
+API_RATE_LIMIT_BURST = 5  # Peticiones que se pueden hacer seguidas antes de aplicar API_RATE_LIMIT_DELAY
 
 # Configuración del torneo
 # Las fechas del torneo se obtienen automáticamente de la API de Cuescore 
\ No newline at end of file
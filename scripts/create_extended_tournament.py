@@ -1,17 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import argparse
+import hashlib
 import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(__file__))
+from atomic_io import atomic_write_bytes
+from json_io import load, dumps, write_json
+from bracket import build_node, match_outcome, is_real_player
+from models import RANKING_INFO_FIELDS, PlayerTable, RankingEntry, decode_matches, encode_tournament
+
+PLAYER_FILES_DIR = "players"  # data/players/<playerId>.json
+PLAYER_SCHEMA = "torneo-gallego-player"
+PLAYER_SCHEMA_VERSION = 1
+PLAYER_VERSION_LENGTH = 16
+
+# Datos de liga que se copian al índice de jugadores
+PLAYER_INDEX_LEAGUE_FIELDS = ('liga', 'posicion', 'puntos_totales', 'clasificado')
+# Estadísticas del índice que se añaden a la tabla de jugadores del formato compacto
+PLAYER_INDEX_STAT_FIELDS = ('elo', 'won', 'lost', 'framesWon', 'framesLost', 'next', 'v')
+
 def load_ranking_data():
     """
     Carga los datos de análisis de participantes con información de rankings
     """
     try:
-        with open('analisis_participantes_gallego.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load('analisis_participantes_gallego.json')
     except Exception as e:
         print(f"❌ Error cargando datos de rankings: {e}")
         return []
@@ -21,79 +38,156 @@ def load_tournament_data():
     Carga los datos del torneo de Cuescore
     """
     try:
-        with open('individual-match-data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load('individual-match-data.json')
     except Exception as e:
         print(f"❌ Error cargando datos del torneo: {e}")
         return {}
 
-def create_player_lookup(ranking_data):
+def create_player_lookup(rankings):
     """
-    Crea un diccionario de búsqueda de jugadores por playerId
+    Crea un diccionario de búsqueda de jugadores (RankingEntry) por playerId
     """
     lookup = {}
-    for player in ranking_data:
-        if player.get('player_id'):
-            lookup[player['player_id']] = player
+    for entry in rankings:
+        if entry.player_id:
+            lookup[entry.player_id] = entry
     return lookup
 
-def enrich_match_data(match, player_lookup):
-    """
-    Enriquece los datos de una partida con información de rankings
-    """
-    enriched_match = match.copy()
-    
-    # Enriquecer playerA
-    if match['playerA']['playerId'] in player_lookup:
-        player_data = player_lookup[match['playerA']['playerId']]
-        enriched_match['playerA']['ranking_info'] = {
-            'liga': player_data.get('liga'),
-            'posicion_liga': player_data.get('posicion'),
-            'puntos_totales': player_data.get('puntos_totales'),
-            'puntos_base': player_data.get('puntos_base'),
-            'partidas_favor': player_data.get('partidas_favor'),
-            'partidas_contra': player_data.get('partidas_contra'),
-            'diferencia_partidas': player_data.get('diferencia_partidas'),
-            'clasificado': player_data.get('clasificado'),
-            'agp': player_data.get('agp'),
-            'pruebas_jugadas': player_data.get('pruebas_jugadas')
-        }
-    else:
-        enriched_match['playerA']['ranking_info'] = None
-    
-    # Enriquecer playerB
-    if match['playerB']['playerId'] in player_lookup:
-        player_data = player_lookup[match['playerB']['playerId']]
-        enriched_match['playerB']['ranking_info'] = {
-            'liga': player_data.get('liga'),
-            'posicion_liga': player_data.get('posicion'),
-            'puntos_totales': player_data.get('puntos_totales'),
-            'puntos_base': player_data.get('puntos_base'),
-            'partidas_favor': player_data.get('partidas_favor'),
-            'partidas_contra': player_data.get('partidas_contra'),
-            'diferencia_partidas': player_data.get('diferencia_partidas'),
-            'clasificado': player_data.get('clasificado'),
-            'agp': player_data.get('agp'),
-            'pruebas_jugadas': player_data.get('pruebas_jugadas')
-        }
-    else:
-        enriched_match['playerB']['ranking_info'] = None
-    
-    return enriched_match
-
-def create_tournament_summary(tournament_data, ranking_data):
+def build_ranking_info(player_data):
+    """
+    Construye el bloque ranking_info de un jugador a partir de su análisis de
+    rankings en JSON (mismo bloque que RankingEntry.ranking_info)
+    """
+    return {key: player_data.get(field) for key, field in RANKING_INFO_FIELDS}
+
+def enrich_players(players, player_lookup):
+    """
+    Añade a cada jugador de las partidas el ranking_info de su análisis de
+    rankings (None si no está en ninguna liga). Los jugadores son compartidos
+    por sus partidas, así que se hace una vez por jugador y el JSON de
+    Cuescore de entrada no se modifica.
+    """
+    for player in players:
+        entry = player_lookup.get(player.player_id)
+        player.set_ranking_info(entry.ranking_info() if entry is not None else None)
+
+def build_player_details(matches, rankings, ratings=None):
+    """
+    Crea la ficha de cada jugador del torneo (clave: playerId como string):
+    datos de liga, rating Elo (si se pasan los ratings, ver elo_ratings.py),
+    partidas y frames ganados/perdidos, rivales, próxima partida e historial
+    de partidas. Se recorre la lista de partidas una sola vez.
+    """
+    player_lookup = create_player_lookup(rankings)
+    details = {}
+
+    def get_detail(player_id, name):
+        key = str(player_id)
+        if key not in details:
+            detail = {
+                'schema': PLAYER_SCHEMA,
+                'schema_version': PLAYER_SCHEMA_VERSION,
+                'playerId': player_id,
+                'name': name,
+            }
+            ranking = player_lookup.get(player_id)
+            if ranking:
+                detail['name'] = ranking.nombre_gallego or name
+                for field in PLAYER_INDEX_LEAGUE_FIELDS:
+                    detail[field] = getattr(ranking, field)
+            if ratings and key in ratings:
+                detail['elo'] = ratings[key]
+            detail.update({'won': 0, 'lost': 0, 'framesWon': 0, 'framesLost': 0,
+                           'next': None, 'opponents': [], 'history': []})
+            details[key] = detail
+        return details[key]
+
+    for match in sorted(matches, key=lambda m: m.matchno or 0):
+        outcome = match_outcome(build_node(match))
+        scores = {'A': match.score_a or 0, 'B': match.score_b or 0}
+        sides = (('A', 'B'), ('B', 'A'))
+        for side, other in sides:
+            player_id = match.player_id(side)
+            if not is_real_player(player_id):
+                continue
+            opponent_id = match.player_id(other)
+            detail = get_detail(player_id, match.player_name(side))
+            own_score = scores[side]
+            opponent_score = scores[other]
+
+            result = None
+            if outcome is not None:
+                result = 'W' if outcome['winner'] == player_id else 'L'
+                # Los walkovers no cuentan como partidas jugadas
+                if is_real_player(opponent_id):
+                    detail['won' if result == 'W' else 'lost'] += 1
+                    detail['framesWon'] += own_score
+                    detail['framesLost'] += opponent_score
+            elif detail['next'] is None:
+                detail['next'] = match.matchno
+
+            if is_real_player(opponent_id) and opponent_id not in detail['opponents']:
+                detail['opponents'].append(opponent_id)
+
+            detail['history'].append({
+                'matchno': match.matchno,
+                'roundName': match.value('roundName', ''),
+                'opponent': opponent_id,
+                'opponentName': match.player_name(other),
+                'score': [own_score, opponent_score],
+                'raceTo': match.race_to,
+                'status': match.status,
+                'result': result,
+            })
+
+    return details
+
+def build_player_index(player_details, versions=None):
+    """
+    Índice de jugadores por playerId: la ficha sin el historial. Si se pasan
+    las versiones de los archivos por jugador se añaden como "v".
+    """
+    index = {}
+    for key, detail in player_details.items():
+        entry = {field: value for field, value in detail.items()
+                 if field not in ('schema', 'schema_version', 'playerId', 'history')}
+        if versions and key in versions:
+            entry['v'] = versions[key]
+        index[key] = entry
+    return index
+
+def write_player_files(player_details, output_dir):
+    """
+    Escribe data/players/<playerId>.json para cada jugador (solo los que han
+    cambiado) y elimina las fichas de jugadores que ya no están en el torneo.
+    Devuelve la versión (hash del contenido) de cada ficha.
+    """
+    players_dir = os.path.join(output_dir, PLAYER_FILES_DIR)
+    versions = {}
+    for key, detail in player_details.items():
+        content = dumps(detail, separators=(',', ':'))
+        versions[key] = hashlib.sha256(content).hexdigest()[:PLAYER_VERSION_LENGTH]
+        atomic_write_bytes(os.path.join(players_dir, f"{key}.json"), content)
+
+    if os.path.isdir(players_dir):
+        for filename in os.listdir(players_dir):
+            if filename.endswith('.json') and filename[:-len('.json')] not in player_details:
+                os.remove(os.path.join(players_dir, filename))
+    return versions
+
+def create_tournament_summary(tournament_data, rankings):
     """
     Crea un resumen del torneo con estadísticas
     """
     total_matches = len(tournament_data.get('matches', []))
-    total_players = len(ranking_data)
-    players_with_ranking = sum(1 for p in ranking_data if p.get('liga'))
+    total_players = len(rankings)
+    players_with_ranking = sum(1 for p in rankings if p.liga)
     
     # Estadísticas por liga
     ligas_stats = {}
-    for player in ranking_data:
-        if player.get('liga'):
-            liga = player['liga']
+    for player in rankings:
+        if player.liga:
+            liga = player.liga
             if liga not in ligas_stats:
                 ligas_stats[liga] = {
                     'total_players': 0,
@@ -103,14 +197,14 @@ def create_tournament_summary(tournament_data, ranking_data):
                 }
             
             ligas_stats[liga]['total_players'] += 1
-            if player.get('clasificado'):
+            if player.clasificado:
                 ligas_stats[liga]['clasificados'] += 1
             
-            if player.get('puntos_totales'):
-                ligas_stats[liga]['puntos_promedio'] += player['puntos_totales']
+            if player.puntos_totales:
+                ligas_stats[liga]['puntos_promedio'] += player.puntos_totales
             
-            if player.get('posicion'):
-                ligas_stats[liga]['mejor_posicion'] = min(ligas_stats[liga]['mejor_posicion'], player['posicion'])
+            if player.posicion:
+                ligas_stats[liga]['mejor_posicion'] = min(ligas_stats[liga]['mejor_posicion'], player.posicion)
     
     # Calcular promedios
     for liga in ligas_stats:
@@ -130,9 +224,11 @@ def create_tournament_summary(tournament_data, ranking_data):
         'ligas_stats': ligas_stats
     }
 
-def create_extended_tournament():
+def create_extended_tournament(store=None, tournament_id=None, player_files=False):
     """
-    Crea el JSON extendido del torneo con toda la información combinada
+    Crea el JSON extendido del torneo con toda la información combinada.
+    Con store (tournament_store.TournamentStore) se guarda también en SQLite
+    y con player_files se escriben también las fichas de players/.
     """
     print("🔄 Cargando datos...")
     
@@ -147,19 +243,24 @@ def create_extended_tournament():
     print(f"✅ Cargados {len(ranking_data)} jugadores con ranking")
     print(f"✅ Cargadas {len(tournament_data.get('matches', []))} partidas del torneo")
     
+    # Modelo en memoria: jugadores AGP y partidas con jugadores compartidos
+    rankings = [RankingEntry.decode(record) for record in ranking_data]
+    players = PlayerTable()
+    matches = decode_matches(tournament_data.get('matches', []), players)
+    
     # Crear lookup de jugadores
-    player_lookup = create_player_lookup(ranking_data)
+    player_lookup = create_player_lookup(rankings)
     print(f"✅ Creado lookup con {len(player_lookup)} jugadores")
     
     # Crear resumen del torneo
-    tournament_summary = create_tournament_summary(tournament_data, ranking_data)
+    tournament_summary = create_tournament_summary(tournament_data, rankings)
     
     # Enriquecer partidas
     print("🔄 Enriqueciendo datos de partidas...")
-    enriched_matches = []
-    for match in tournament_data.get('matches', []):
-        enriched_match = enrich_match_data(match, player_lookup)
-        enriched_matches.append(enriched_match)
+    enrich_players(players, player_lookup)
+    
+    # Fichas por jugador (índice por playerId + historial)
+    player_details = build_player_details(matches, rankings)
     
     # Crear JSON extendido
     extended_tournament = {
@@ -176,19 +277,35 @@ def create_extended_tournament():
             'owner': tournament_data.get('owner')
         },
         'summary': tournament_summary,
-        'players': ranking_data,
-        'matches': enriched_matches,
+        'players': rankings,
+        'player_index': build_player_index(player_details),
+        'matches': matches,
         'generated_at': datetime.now().isoformat(),
         'version': '1.0'
     }
     
-    # Guardar JSON extendido
+    # Guardar JSON extendido (en streaming y de forma atómica)
     output_file = 'tournament_extended.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(extended_tournament, f, ensure_ascii=False, indent=2)
+    write_json(output_file, encode_tournament(extended_tournament))
     
     print(f"✅ JSON extendido guardado en: {output_file}")
     
+    if store is not None:
+        tournament_id = str(tournament_id or tournament_data.get('tournamentId'))
+        counts = store.upsert_tournament(tournament_id, encode_tournament(extended_tournament))
+        print(f"✅ Base de datos actualizada: {counts['matches']} partidas y {counts['players']} jugadores escritos")
+    
+    # Guardar también la versión compacta (tabla de jugadores + referencias)
+    from compact_tournament import save_compact_tournament
+    compact_file = 'tournament.min.json'
+    compact_size = save_compact_tournament(extended_tournament, compact_file)
+    print(f"✅ JSON compacto guardado en: {compact_file} ({compact_size} bytes)")
+    
+    # Fichas por jugador opcionales para la carga bajo demanda del visor
+    if player_files:
+        versions = write_player_files(player_details, '.')
+        print(f"✅ Fichas de jugadores guardadas en: {PLAYER_FILES_DIR}/ ({len(versions)} jugadores)")
+    
     # Mostrar resumen
     print("\n📊 RESUMEN DEL TORNEO EXTENDIDO:")
     print("=" * 50)
@@ -207,5 +324,20 @@ def create_extended_tournament():
     
     return extended_tournament
 
+def main():
+    from config import TOURNAMENT_ID, TOURNAMENT_DB
+    from tournament_store import open_store
+    parser = argparse.ArgumentParser(description="Crea el JSON extendido del torneo (partidas + rankings AGP)")
+    parser.add_argument('--player-files', action='store_true', help=f"Escribe también las fichas por jugador en {PLAYER_FILES_DIR}/")
+    parser.add_argument('--db', default=TOURNAMENT_DB, help="Base de datos SQLite donde guardar también el torneo (por defecto config.TOURNAMENT_DB)")
+    args = parser.parse_args()
+    
+    store = open_store(args.db)
+    try:
+        create_extended_tournament(store, TOURNAMENT_ID, player_files=args.player_files)
+    finally:
+        if store is not None:
+            store.close()
+
 if __name__ == "__main__":
-    create_extended_tournament() 
\ No newline at end of file
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente de la API de Cuescore con peticiones condicionales
+
+Usa una requests.Session persistente (reutiliza la conexión y las cabeceras) y
+guarda en CACHE_DIR el último cuerpo descargado de cada torneo junto a sus
+validadores (ETag / Last-Modified). Las peticiones siguientes envían
+If-None-Match / If-Modified-Since: si Cuescore responde 304 no se descarga ni se
+procesa nada. Si la API no devuelve validadores se compara el hash del cuerpo
+con el de la caché.
+
+La caché solo se actualiza con store() cuando el llamador ha aplicado los datos,
+para que un fallo al guardar no deje la caché por delante de los datos publicados.
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(__file__))
+from config import CUESCORE_API_URL, REQUEST_HEADERS, API_RATE_LIMIT_DELAY, MAX_RETRIES, CACHE_DIR
+from atomic_io import atomic_write_bytes, atomic_write_json
+from json_io import loads
+import metrics
+
+REQUEST_TIMEOUT = 30  # Segundos
+
+# Respuestas HTTP que merece la pena reintentar (rate limit y errores del servidor)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Errores de red que se reintentan; ValueError cubre cuerpos JSON truncados
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ValueError,
+)
+
+def content_sha256(content: bytes) -> str:
+    """Calcula el sha256 del cuerpo de una respuesta"""
+    return hashlib.sha256(content).hexdigest()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convierte la cabecera Retry-After (segundos o fecha HTTP) en segundos de espera"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def get_retry_delay(error: Exception, attempt: int, base_delay: float = API_RATE_LIMIT_DELAY,
+                    rng: Optional[random.Random] = None) -> Optional[float]:
+    """
+    Segundos de espera antes de reintentar una petición que ha fallado con `error`
+    (attempt empieza en 0). Devuelve None si el error no se debe reintentar.
+    Se respeta Retry-After; si no, backoff exponencial con jitter.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        if response is None or response.status_code not in RETRY_STATUS_CODES:
+            return None
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+    elif not isinstance(error, RETRY_EXCEPTIONS):
+        return None
+
+    backoff = base_delay * 2 ** attempt
+    return (rng or random).uniform(backoff / 2, backoff)
+
+class CuescoreClient:
+    """Cliente HTTP de Cuescore con caché de respuestas y rate limiting"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, rate_limit_delay: float = API_RATE_LIMIT_DELAY,
+                 session: Optional[requests.Session] = None, pool_size: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.rate_limit_delay = rate_limit_delay
+        self.session = session or requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        if pool_size:
+            # Conexiones reutilizables para peticiones concurrentes desde varios hilos
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self._last_request = None
+
+    def tournament_url(self, tournament_id: str) -> str:
+        return f"{CUESCORE_API_URL}/?id={tournament_id}"
+
+    def _cache_paths(self, tournament_id: str):
+        base = os.path.join(self.cache_dir, f"tournament-{tournament_id}")
+        return base + ".json", base + ".meta.json"
+
+    def load_cache_meta(self, tournament_id: str) -> Dict[str, Any]:
+        """Carga los validadores guardados (vacío si no hay caché completa)"""
+        body_path, meta_path = self._cache_paths(tournament_id)
+        if not os.path.exists(body_path):
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def load_cached_data(self, tournament_id: str) -> Optional[Dict[str, Any]]:
+        """Devuelve el último cuerpo guardado del torneo"""
+        body_path, _ = self._cache_paths(tournament_id)
+        try:
+            with open(body_path, "rb") as f:
+                return loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def store(self, tournament_id: str, result: Dict[str, Any]):
+        """Guarda el cuerpo y los validadores de una respuesta 200 ya aplicada"""
+        if result.get("not_modified") or result.get("content") is None:
+            return
+
+        body_path, meta_path = self._cache_paths(tournament_id)
+        atomic_write_bytes(body_path, result["content"])
+
+        meta = {
+            "url": result.get("url"),
+            "etag": result.get("etag"),
+            "last_modified": result.get("last_modified"),
+            "sha256": result.get("sha256"),
+            "stored_at": datetime.now().isoformat(),
+        }
+        atomic_write_json(meta_path, meta, indent=2)
+
+    def _wait_rate_limit(self):
+        # Solo se espera si la petición anterior de este cliente fue hace poco
+        if self._last_request is None:
+            return
+        elapsed = time.monotonic() - self._last_request
+        if elapsed < self.rate_limit_delay:
+            time.sleep(self.rate_limit_delay - elapsed)
+            metrics.add_time("rate_limit_wait", self.rate_limit_delay - elapsed)
+
+    def fetch_tournament(self, tournament_id: str, conditional: bool = True) -> Dict[str, Any]:
+        """
+        Descarga los datos de un torneo.
+
+        Devuelve un dict con:
+          - not_modified: True si Cuescore respondió 304 o el cuerpo es idéntico al de la caché
+          - data: datos del torneo (los de la caché si no han cambiado)
+          - status, url, etag, last_modified, sha256 y content (cuerpo en bytes)
+
+        Lanza requests.exceptions.RequestException o ValueError (JSON no válido).
+        """
+        url = self.tournament_url(tournament_id)
+        meta = self.load_cache_meta(tournament_id) if conditional else {}
+
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        self._wait_rate_limit()
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        finally:
+            self._last_request = time.monotonic()
+            metrics.add_time("network", time.perf_counter() - started)
+        metrics.set_info("http_status", response.status_code)
+
+        result = {
+            "status": response.status_code,
+            "url": url,
+            "etag": response.headers.get("ETag") or meta.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or meta.get("last_modified"),
+            "not_modified": False,
+            "content": None,
+            "sha256": None,
+            "data": None,
+        }
+
+        if response.status_code == 304:
+            result["not_modified"] = True
+            result["sha256"] = meta.get("sha256")
+            result["data"] = self.load_cached_data(tournament_id)
+            return result
+
+        response.raise_for_status()
+
+        content = response.content
+        metrics.count("response_bytes", len(content))
+        result["content"] = content
+        result["sha256"] = content_sha256(content)
+        started = time.perf_counter()
+        result["data"] = loads(content)
+        metrics.add_time("decode", time.perf_counter() - started)
+        # Sin validadores en la respuesta, un cuerpo idéntico cuenta como "sin cambios"
+        result["not_modified"] = bool(meta) and meta.get("sha256") == result["sha256"]
+        return result
+
+    def fetch_tournament_with_retries(self, tournament_id: str, conditional: bool = True,
+                                      max_retries: int = MAX_RETRIES) -> Dict[str, Any]:
+        """fetch_tournament reintentando hasta max_retries veces los errores transitorios"""
+        attempt = 0
+        while True:
+            try:
+                return self.fetch_tournament(tournament_id, conditional=conditional)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                delay = get_retry_delay(e, attempt, self.rate_limit_delay) if attempt < max_retries else None
+                if delay is None:
+                    raise
+                attempt += 1
+                print(f"Error al descargar {tournament_id} ({e}), reintento {attempt}/{max_retries} en {delay:.1f} s")
+                metrics.count("retries")
+                time.sleep(delay)
+                metrics.add_time("retry_wait", delay)
+
+    def close(self):
+        self.session.close()
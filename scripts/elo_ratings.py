@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rating Elo de los jugadores a partir de las partidas de Cuescore
+
+El rating se calcula de forma incremental: cada actualización solo procesa las
+partidas que han terminado desde la anterior (por orden de stoptime), sin
+recalcular el historial. El estado (rating de cada jugador y partidas ya
+contadas) se guarda en ELO_STATE_FILE y es compartido por todos los torneos de
+la temporada.
+
+Resultado de cada partida para el jugador A, entre 0 y 1:
+
+    S = (1 - ELO_FRAME_WEIGHT) * victoria + ELO_FRAME_WEIGHT * scoreA / (scoreA + scoreB)
+
+y la variación es K * (S - E), con E la probabilidad esperada según la
+diferencia de rating y K escalado por la distancia de la partida (raceTo):
+una partida a 7 mueve más el rating que una a 3. Lo que gana un jugador lo
+pierde el otro. Los walkovers, los huecos sin decidir y los 0-0 no cuentan.
+
+Si Cuescore corrige el resultado de una partida ya contada, se deshace su
+variación y se aplica la nueva; el resto de partidas no se recalculan.
+Para recalcularlo todo desde cero:
+
+    python scripts/elo_ratings.py --rebuild tournament-viewer/data/tournament_extended.json
+"""
+
+import argparse
+import math
+import os
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from config import ELO_STATE_FILE
+from bracket import is_real_player
+from models import Match, decode_tournament
+from json_io import load, dumps, COMPACT_SEPARATORS
+from atomic_io import atomic_write_bytes
+
+ELO_STATE_VERSION = 1
+ELO_INITIAL_RATING = 1500.0
+ELO_K_FACTOR = 32.0           # K de una partida a ELO_REFERENCE_RACE_TO
+ELO_REFERENCE_RACE_TO = 4
+ELO_FRAME_WEIGHT = 0.5        # Peso de la proporción de frames frente a la victoria
+ELO_PRECISION = 4             # Decimales guardados (las variaciones se deshacen exactas)
+
+def expected_score(rating_a: float, rating_b: float) -> float:
+    """Probabilidad de que gane A según la diferencia de rating"""
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+def match_score(score_a: int, score_b: int) -> float:
+    """Resultado de la partida para A: victoria y proporción de frames"""
+    win = 1.0 if score_a > score_b else 0.0 if score_a < score_b else 0.5
+    return (1 - ELO_FRAME_WEIGHT) * win + ELO_FRAME_WEIGHT * score_a / (score_a + score_b)
+
+def k_factor(race_to: Optional[int], score_a: int, score_b: int) -> float:
+    """K escalado por la distancia de la partida (sin raceTo, el marcador del ganador)"""
+    race = race_to or max(score_a, score_b)
+    return ELO_K_FACTOR * math.sqrt(race / ELO_REFERENCE_RACE_TO)
+
+def _sort_key(match: Match) -> Tuple[str, int]:
+    # Orden en que terminaron; las partidas sin hora, por número de partida
+    return (match.stoptime or match.starttime or '', match.matchno or 0)
+
+class EloRatings:
+    """
+    Estado del rating Elo: ratings[playerId] = [rating, partidas] y
+    matches["torneo:matchId"] = [jugador A, jugador B, scoreA, scoreB, raceTo, variación]
+    (variación None si la partida terminó pero no cuenta)
+    """
+
+    def __init__(self, state_file: str = ELO_STATE_FILE):
+        self.state_file = state_file
+        self.ratings: Dict[str, List[float]] = {}
+        self.matches: Dict[str, List[Any]] = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            state = load(self.state_file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Estado Elo ilegible ({e}), se empieza de cero")
+            return
+        if state.get('version') != ELO_STATE_VERSION:
+            print(f"⚠️  Versión del estado Elo distinta ({state.get('version')}), se empieza de cero")
+            return
+        self.ratings = state.get('ratings', {})
+        self.matches = state.get('matches', {})
+
+    def save(self) -> bool:
+        """Guarda el estado si ha cambiado. Devuelve True si se ha escrito"""
+        if not self.changed or not self.state_file:
+            return False
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {'version': ELO_STATE_VERSION, 'ratings': self.ratings, 'matches': self.matches}
+        atomic_write_bytes(self.state_file, dumps(state, separators=COMPACT_SEPARATORS))
+        self.changed = False
+        return True
+
+    def rating(self, player_id: Any) -> float:
+        entry = self.ratings.get(str(player_id))
+        return entry[0] if entry else ELO_INITIAL_RATING
+
+    def _apply(self, player_a: int, player_b: int, delta: float, sign: int):
+        # sign=1 aplica la variación de una partida y sign=-1 la deshace
+        for player_id, change in ((player_a, delta), (player_b, -delta)):
+            entry = self.ratings.setdefault(str(player_id), [ELO_INITIAL_RATING, 0])
+            entry[0] = round(entry[0] + sign * change, ELO_PRECISION)
+            entry[1] += sign
+            if entry[1] == 0:
+                del self.ratings[str(player_id)]
+
+    def _undo(self, key: str):
+        record = self.matches.pop(key)
+        if record[5] is not None:
+            self._apply(record[0], record[1], record[5], -1)
+        self.changed = True
+
+    def _rate(self, key: str, record: List[Any]):
+        player_a, player_b, score_a, score_b, race_to = record[:5]
+        delta = None
+        if is_real_player(player_a) and is_real_player(player_b) and score_a + score_b > 0:
+            expected = expected_score(self.rating(player_a), self.rating(player_b))
+            delta = round(k_factor(race_to, score_a, score_b) * (match_score(score_a, score_b) - expected),
+                          ELO_PRECISION)
+            self._apply(player_a, player_b, delta, 1)
+        self.matches[key] = record + [delta]
+        self.changed = True
+
+    def update(self, tournament_id: str, matches: List[Match]) -> Dict[str, int]:
+        """
+        Aplica las partidas terminadas que aún no se han contado (o cuyo
+        resultado ha cambiado). Devuelve {"rated", "skipped", "corrected"}.
+        """
+        counts = {"rated": 0, "skipped": 0, "corrected": 0}
+        prefix = f"{tournament_id}:"
+        seen = set()
+        pending = []
+        for match in matches:
+            key = prefix + str(match.match_id)
+            seen.add(key)
+            previous = self.matches.get(key)
+            if match.status != 'finished':
+                # Partida reabierta en Cuescore: deja de contar hasta que termine
+                if previous is not None:
+                    self._undo(key)
+                    counts["corrected"] += 1
+                continue
+            record = [match.player_id('A'), match.player_id('B'),
+                      match.score_a or 0, match.score_b or 0, match.race_to]
+            if previous is not None:
+                if previous[:5] == record:
+                    continue
+                self._undo(key)
+                counts["corrected"] += 1
+            pending.append((_sort_key(match), key, record))
+
+        # Partidas que ya no están en el torneo
+        for key in [key for key in self.matches if key.startswith(prefix) and key not in seen]:
+            self._undo(key)
+            counts["corrected"] += 1
+
+        pending.sort(key=lambda item: item[0])
+        for _, key, record in pending:
+            self._rate(key, record)
+            counts["rated" if self.matches[key][5] is not None else "skipped"] += 1
+        return counts
+
+    def published(self) -> Dict[str, int]:
+        """Rating redondeado de cada jugador con al menos una partida, por playerId (string)"""
+        return {player_id: int(round(entry[0])) for player_id, entry in self.ratings.items()}
+
+    def ranking(self) -> List[Tuple[str, float, int]]:
+        """(playerId, rating, partidas) de mayor a menor rating"""
+        return sorted(((player_id, entry[0], entry[1]) for player_id, entry in self.ratings.items()),
+                      key=lambda item: -item[1])
+
+def load_published_ratings(state_file: str = ELO_STATE_FILE) -> Optional[Dict[str, int]]:
+    """Ratings publicados del estado guardado (None si todavía no hay estado)"""
+    if not state_file or not os.path.exists(state_file):
+        return None
+    return EloRatings(state_file).published()
+
+def _player_names(data: Dict[str, Any]) -> Dict[str, str]:
+    names = {}
+    for match in data.get('matches', []):
+        for side in ('A', 'B'):
+            player_id = match.player_id(side)
+            if player_id:
+                names[str(player_id)] = match.player_name(side)
+    for entry in data.get('players', []):
+        if entry.player_id and entry.nombre_gallego:
+            names[str(entry.player_id)] = entry.nombre_gallego
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description="Rating Elo incremental de los jugadores")
+    parser.add_argument("files", nargs="*", help="tournament_extended.json de los torneos a procesar")
+    parser.add_argument("--state", default=ELO_STATE_FILE, help=f"Estado del rating (por defecto {ELO_STATE_FILE})")
+    parser.add_argument("--rebuild", action="store_true", help="Recalcula desde cero en lugar de continuar el estado")
+    parser.add_argument("--top", type=int, default=20, help="Jugadores que se muestran")
+    args = parser.parse_args()
+
+    ratings = EloRatings(None if args.rebuild else args.state)
+    ratings.state_file = args.state
+    names = {}
+    for path in args.files:
+        data = decode_tournament(load(path))
+        names.update(_player_names(data))
+        matches = data.get('matches', [])
+        tournament_id = next((m.tournament_id for m in matches if m.tournament_id), path)
+        counts = ratings.update(str(tournament_id), matches)
+        print(f"📊 {path}: {counts['rated']} partidas nuevas, {counts['skipped']} sin contar, "
+              f"{counts['corrected']} corregidas")
+    if args.rebuild:
+        ratings.changed = True
+    if ratings.save():
+        print(f"💾 Estado guardado en {args.state}")
+
+    print(f"\n🏆 Rating Elo ({len(ratings.ratings)} jugadores, {len(ratings.matches)} partidas terminadas)")
+    for position, (player_id, rating, played) in enumerate(ratings.ranking()[:args.top], 1):
+        print(f"{position:>3}. {names.get(player_id, player_id):<35} {rating:>7.1f}  ({played} partidas)")
+
+if __name__ == "__main__":
+    main()
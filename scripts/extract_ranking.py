@@ -1,20 +1,103 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import argparse
+import os
 import sys
-import re
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
 
-def extract_ranking_data(html_file):
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None  # Solo lo necesitan los parsers lxml y html.parser
+
+sys.path.append(os.path.dirname(__file__))
+from json_io import load, write_json
+from config import TOURNAMENT_DB
+from tournament_store import open_store
+
+# Archivo con el resumen de todas las ligas extraídas en modo lote
+RANKINGS_INDEX_FILE = 'rankings_index.json'
+
+# Extractor incremental (sin árbol de BeautifulSoup); es el que se usa por defecto
+STREAM_PARSER = 'stream'
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes de HTML que se leen en cada bloque
+TITLE_STYLE = 'font-size: 18pt'
+
+def get_parser_backend():
     """
-    Extrae los datos del ranking de billar del archivo HTML
+    Devuelve el parser de BeautifulSoup más rápido disponible:
+    lxml si está instalado, si no el html.parser de Python
+    """
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+def load_soup(html_file, parser=None):
+    """
+    Lee y parsea el archivo HTML una sola vez
     """
     with open(html_file, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Parsear el HTML
-    soup = BeautifulSoup(content, 'html.parser')
+    if BeautifulSoup is None:
+        raise ImportError("El parser con árbol necesita beautifulsoup4 (pip install beautifulsoup4); "
+                          "el extractor por defecto (stream) no lo usa")
+    return BeautifulSoup(content, parser or get_parser_backend())
+
+def build_player_data(cell_contents):
+    """
+    Convierte el contenido de las celdas de una fila en los datos del jugador.
+    Devuelve None si la fila no es de un jugador (la primera celda no es la posición).
+    """
+    # Verificar que la primera celda contiene un número (posición)
+    if not (cell_contents and cell_contents[0].isdigit()):
+        return None
+
+    try:
+        return {
+            "posicion": int(cell_contents[0]),
+            "agp": cell_contents[1],
+            "nombre": cell_contents[2],
+            "pruebas": {
+                "p1": int(cell_contents[3]) if cell_contents[3].isdigit() else 0,
+                "p2": int(cell_contents[4]) if cell_contents[4].isdigit() else 0,
+                "p3": int(cell_contents[5]) if cell_contents[5].isdigit() else 0,
+                "p4": int(cell_contents[6]) if cell_contents[6].isdigit() else 0,
+                "p5": int(cell_contents[7]) if cell_contents[7].isdigit() else 0,
+                "p6": int(cell_contents[8]) if cell_contents[8].isdigit() else 0,
+                "p7": int(cell_contents[9]) if cell_contents[9].isdigit() else 0,
+                "p8": int(cell_contents[10]) if cell_contents[10].isdigit() else 0,
+                "p9": int(cell_contents[11]) if cell_contents[11].isdigit() else 0
+            },
+            "partidas": {
+                "pf": int(cell_contents[12]) if cell_contents[12].isdigit() else 0,  # Partidas a favor
+                "pc": int(cell_contents[13]) if cell_contents[13].isdigit() else 0,  # Partidas en contra
+                "dp": int(cell_contents[14]) if cell_contents[14].isdigit() or (cell_contents[14].startswith('-') and cell_contents[14][1:].isdigit()) else 0  # Diferencia de partidas
+            },
+            "puntos": {
+                "p": int(cell_contents[15]) if cell_contents[15].isdigit() else 0,  # Puntos
+                "v": int(cell_contents[16]) if cell_contents[16].isdigit() else 0,  # Puntos extra por participar
+                "t": int(cell_contents[17]) if cell_contents[17].isdigit() else 0,  # Total (P+V)
+                "penalizaciones": int(cell_contents[18]) if cell_contents[18].isdigit() else 0,  # Penalizaciones
+                "pt": int(cell_contents[19]) if cell_contents[19].isdigit() else 0  # Puntos totales (T-P)
+            }
+        }
+    except (ValueError, IndexError) as e:
+        print(f"Error procesando fila: {e}")
+        return None
+
+def extract_ranking_data(html_file, soup=None):
+    """
+    Extrae los datos del ranking de billar del archivo HTML
+    """
+    # Parsear el HTML (si no se ha parseado ya)
+    if soup is None:
+        soup = load_soup(html_file, 'html.parser')
     
     # Encontrar todas las filas de datos (excluyendo las filas de encabezado)
     rows = soup.find_all('tr')
@@ -36,79 +119,171 @@ def extract_ranking_data(html_file):
                     cell_contents.append(cell.get_text(strip=True))
             
             # Verificar que la primera celda contiene un número (posición)
-            if cell_contents and cell_contents[0].isdigit():
-                try:
-                    player_data = {
-                        "posicion": int(cell_contents[0]),
-                        "agp": cell_contents[1],
-                        "nombre": cell_contents[2],
-                        "pruebas": {
-                            "p1": int(cell_contents[3]) if cell_contents[3].isdigit() else 0,
-                            "p2": int(cell_contents[4]) if cell_contents[4].isdigit() else 0,
-                            "p3": int(cell_contents[5]) if cell_contents[5].isdigit() else 0,
-                            "p4": int(cell_contents[6]) if cell_contents[6].isdigit() else 0,
-                            "p5": int(cell_contents[7]) if cell_contents[7].isdigit() else 0,
-                            "p6": int(cell_contents[8]) if cell_contents[8].isdigit() else 0,
-                            "p7": int(cell_contents[9]) if cell_contents[9].isdigit() else 0,
-                            "p8": int(cell_contents[10]) if cell_contents[10].isdigit() else 0,
-                            "p9": int(cell_contents[11]) if cell_contents[11].isdigit() else 0
-                        },
-                        "partidas": {
-                            "pf": int(cell_contents[12]) if cell_contents[12].isdigit() else 0,  # Partidas a favor
-                            "pc": int(cell_contents[13]) if cell_contents[13].isdigit() else 0,  # Partidas en contra
-                            "dp": int(cell_contents[14]) if cell_contents[14].isdigit() or (cell_contents[14].startswith('-') and cell_contents[14][1:].isdigit()) else 0  # Diferencia de partidas
-                        },
-                        "puntos": {
-                            "p": int(cell_contents[15]) if cell_contents[15].isdigit() else 0,  # Puntos
-                            "v": int(cell_contents[16]) if cell_contents[16].isdigit() else 0,  # Puntos extra por participar
-                            "t": int(cell_contents[17]) if cell_contents[17].isdigit() else 0,  # Total (P+V)
-                            "penalizaciones": int(cell_contents[18]) if cell_contents[18].isdigit() else 0,  # Penalizaciones
-                            "pt": int(cell_contents[19]) if cell_contents[19].isdigit() else 0  # Puntos totales (T-P)
-                        }
-                    }
-                    players.append(player_data)
-                except (ValueError, IndexError) as e:
-                    print(f"Error procesando fila: {e}")
-                    continue
+            player_data = build_player_data(cell_contents)
+            if player_data:
+                players.append(player_data)
     
     return players
 
-def get_tournament_name(html_file):
+def get_tournament_name(html_file, soup=None):
     """
     Extrae el nombre del torneo del archivo HTML
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
+    if soup is None:
+        soup = load_soup(html_file, 'html.parser')
     
     # Buscar el título del torneo
-    title_div = soup.find('div', style=lambda x: x and 'font-size: 18pt' in x)
+    title_div = soup.find('div', style=lambda x: x and TITLE_STYLE in x)
     if title_div:
         return title_div.get_text(strip=True)
     
     # Si no encuentra el título, usar el nombre del archivo
+    return get_default_tournament_name(html_file)
+
+def get_default_tournament_name(html_file):
+    """
+    Nombre del torneo a partir del nombre del archivo (si el HTML no tiene título)
+    """
     return html_file.replace('-individual.html', '').replace('_', ' ').title()
 
-def main():
-    # Verificar si se proporciona un archivo como argumento
-    if len(sys.argv) > 1:
-        html_file = sys.argv[1]
-    else:
-        print("Uso: python extract_ranking.py <archivo_html>")
-        print("Ejemplos:")
-        print("  python extract_ranking.py corunha-individual.html")
-        print("  python extract_ranking.py santiago-individual.html")
-        return
+class RankingTableParser(HTMLParser):
+    """
+    Tokenizador incremental de las páginas de ranking.
     
-    # Extraer datos del ranking
-    players = extract_ranking_data(html_file)
+    No construye ningún árbol: solo guarda el texto de las celdas de la fila
+    abierta y, al cerrarse cada <tr>, deja la lista de textos en `rows`.
+    El texto de cada celda es el mismo que en la versión con BeautifulSoup:
+    el del primer <div> de la celda (o el de la celda si no tiene), uniendo
+    los fragmentos de texto sin espacios alrededor (get_text(strip=True)).
+    """
     
-    # Obtener nombre del torneo
-    tournament_name = get_tournament_name(html_file)
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.title = None
+        self._text = []
+        self._row = None
+        self._cell = None
+        self._cell_div = None
+        self._cell_div_depth = 0
+        self._title_parts = None
+        self._title_depth = 0
     
-    # Crear el JSON final
-    ranking_data = {
+    def pop_rows(self):
+        """Devuelve las filas completas desde la última llamada"""
+        rows, self.rows = self.rows, []
+        return rows
+    
+    def _flush_text(self):
+        # Un nodo de texto termina en la siguiente etiqueta o comentario
+        if not self._text:
+            return
+        text = ''.join(self._text).strip()
+        self._text = []
+        if not text:
+            return
+        if self._cell is not None:
+            self._cell.append(text)
+            if self._cell_div_depth:
+                self._cell_div.append(text)
+        if self._title_depth:
+            self._title_parts.append(text)
+    
+    def _end_cell(self):
+        if self._cell is not None:
+            parts = self._cell_div if self._cell_div is not None else self._cell
+            self._row.append(''.join(parts))
+        self._cell = None
+        self._cell_div = None
+        self._cell_div_depth = 0
+    
+    def _end_row(self):
+        self._end_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = None
+    
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag == 'td':
+            self._end_cell()
+            if self._row is not None:
+                self._cell = []
+        elif tag == 'div':
+            if self._cell is not None:
+                if self._cell_div is None:
+                    self._cell_div = []
+                    self._cell_div_depth = 1
+                elif self._cell_div_depth:
+                    self._cell_div_depth += 1
+            if self._title_depth:
+                self._title_depth += 1
+            elif self.title is None and self._title_parts is None:
+                style = dict(attrs).get('style') or ''
+                if TITLE_STYLE in style:
+                    self._title_parts = []
+                    self._title_depth = 1
+    
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == 'div':
+            if self._cell_div_depth:
+                self._cell_div_depth -= 1
+            if self._title_depth:
+                self._title_depth -= 1
+                if not self._title_depth:
+                    self.title = ''.join(self._title_parts)
+        elif tag == 'td':
+            self._end_cell()
+        elif tag in ('tr', 'table'):
+            self._end_row()
+    
+    def handle_data(self, data):
+        self._text.append(data)
+    
+    def handle_comment(self, data):
+        self._flush_text()
+    
+    def close(self):
+        super().close()
+        self._flush_text()
+        self._end_row()
+
+def iter_ranking_rows(html_file, table_parser=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Lee el HTML por bloques y genera el texto de las celdas de cada fila
+    en cuanto se cierra su <tr>
+    """
+    if table_parser is None:
+        table_parser = RankingTableParser()
+    
+    with open(html_file, 'r', encoding='utf-8') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            table_parser.feed(chunk)
+            yield from table_parser.pop_rows()
+    
+    table_parser.close()
+    yield from table_parser.pop_rows()
+
+def iter_ranking_players(html_file, table_parser=None):
+    """
+    Genera los datos de cada jugador del ranking sin construir el árbol del HTML
+    """
+    for cell_contents in iter_ranking_rows(html_file, table_parser):
+        # Verificar que es una fila de datos (debe tener al menos 20 celdas)
+        if len(cell_contents) >= 20:
+            player_data = build_player_data(cell_contents)
+            if player_data:
+                yield player_data
+
+def build_ranking_json(players, tournament_name):
+    """
+    Crea el JSON final del ranking
+    """
+    return {
         "torneo": tournament_name,
         "descripcion": {
             "cabeza_serie": "Cabeza de serie XXXIII Campeonato Gallego 3ª Categoría",
@@ -118,16 +293,166 @@ def main():
         },
         "jugadores": players
     }
+
+def get_ranking_json_filename(html_file, output_dir=None):
+    """
+    Nombre del JSON de salida a partir del HTML (vigo-individual.html -> vigo_ranking.json).
+    En un directorio de salida se reutiliza el nombre existente con guion si lo hay
+    (p. ej. corunha-ranking.json) para no duplicar ligas.
+    """
+    if output_dir is None:
+        return html_file.replace('-individual.html', '_ranking.json')
+    
+    liga = os.path.basename(html_file).replace('-individual.html', '')
+    legacy = os.path.join(output_dir, f"{liga}-ranking.json")
+    if os.path.exists(legacy):
+        return legacy
+    return os.path.join(output_dir, f"{liga}_ranking.json")
+
+def parse_ranking_file(html_file, parser=None):
+    """
+    Parsea el HTML una sola vez y devuelve (jugadores, nombre del torneo).
+    Por defecto usa el extractor incremental; con parser='lxml' o 'html.parser'
+    se usa BeautifulSoup.
+    """
+    if parser is None or parser == STREAM_PARSER:
+        table_parser = RankingTableParser()
+        players = list(iter_ranking_players(html_file, table_parser))
+        if table_parser.title is None:
+            return players, get_default_tournament_name(html_file)
+        return players, table_parser.title
+    
+    soup = load_soup(html_file, parser)
+    return extract_ranking_data(html_file, soup), get_tournament_name(html_file, soup)
+
+def save_ranking_json(ranking_data, json_filename):
+    """
+    Guarda el JSON del ranking
+    """
+    write_json(json_filename, ranking_data)
+
+def process_ranking_file(html_file, output_dir, parser=None):
+    """
+    Extrae un archivo HTML y guarda su JSON (se ejecuta en un proceso del pool)
+    """
+    players, tournament_name = parse_ranking_file(html_file, parser)
+    json_filename = get_ranking_json_filename(html_file, output_dir)
+    save_ranking_json(build_ranking_json(players, tournament_name), json_filename)
+    
+    return {
+        "liga": os.path.basename(html_file).replace('-individual.html', ''),
+        "torneo": tournament_name,
+        "html": os.path.basename(html_file),
+        "json": os.path.basename(json_filename),
+        "jugadores": len(players)
+    }
+
+def write_rankings_index(results, output_dir):
+    """Escribe el índice combinado de las ligas extraídas y devuelve su ruta"""
+    index = {
+        "generado": datetime.now().isoformat(),
+        "total_jugadores": sum(result['jugadores'] for result in results),
+        "ligas": results
+    }
+    index_file = os.path.join(output_dir, RANKINGS_INDEX_FILE)
+    write_json(index_file, index)
+    return index_file
+
+def extract_all_rankings(input_dir, output_dir, workers=None, parser=None, store=None):
+    """
+    Extrae todos los HTML de rankings de un directorio en paralelo.
+    Cada archivo se parsea una sola vez y se reparte entre los núcleos disponibles.
+    Además de los JSON por liga escribe un índice combinado y, con store
+    (tournament_store.TournamentStore), actualiza las ligas que han cambiado.
+    """
+    html_files = sorted(
+        os.path.join(input_dir, filename)
+        for filename in os.listdir(input_dir)
+        if filename.endswith('-individual.html')
+    )
+    if not html_files:
+        print(f"No se encontraron archivos *-individual.html en {input_dir}")
+        return []
+    
+    os.makedirs(output_dir, exist_ok=True)
+    parser = parser or STREAM_PARSER
+    workers = workers or os.cpu_count() or 1
+    
+    print(f"Extrayendo {len(html_files)} rankings con {workers} procesos (parser: {parser})")
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            process_ranking_file,
+            html_files,
+            [output_dir] * len(html_files),
+            [parser] * len(html_files)
+        ))
+    
+    for result in results:
+        print(f"  {result['liga']}: {result['jugadores']} jugadores -> {result['json']}")
+    
+    index_file = write_rankings_index(results, output_dir)
+    print(f"Índice combinado generado: {index_file}")
+    
+    if store is not None:
+        updated = [result['liga'] for result in results
+                   if store.upsert_ranking(result['liga'], load(os.path.join(output_dir, result['json'])))]
+        print(f"Base de datos: {len(updated)} ligas actualizadas{': ' + ', '.join(updated) if updated else ''}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrae rankings AGP de archivos HTML a JSON")
+    parser.add_argument('html_file', nargs='?', help="Archivo HTML de un ranking")
+    parser.add_argument('--dir', dest='input_dir', help="Directorio con todos los *-individual.html (modo lote)")
+    parser.add_argument('--out', dest='output_dir', default='jsons-agp', help="Directorio de salida del modo lote")
+    parser.add_argument('--workers', type=int, default=None, help="Número de procesos (por defecto, núcleos disponibles)")
+    parser.add_argument('--parser', dest='backend', default=None, help="Parser: stream (por defecto, sin árbol), lxml o html.parser (BeautifulSoup)")
+    parser.add_argument('--db', default=TOURNAMENT_DB, help="Base de datos SQLite donde guardar también los rankings (por defecto config.TOURNAMENT_DB)")
+    args = parser.parse_args()
+    if args.backend not in (None, STREAM_PARSER) and BeautifulSoup is None:
+        parser.error(f"--parser {args.backend} necesita beautifulsoup4 (pip install beautifulsoup4)")
+    
+    if args.input_dir:
+        store = open_store(args.db)
+        try:
+            extract_all_rankings(args.input_dir, args.output_dir, args.workers, args.backend, store)
+        finally:
+            if store is not None:
+                store.close()
+        return
+    
+    # Verificar si se proporciona un archivo como argumento
+    if args.html_file:
+        html_file = args.html_file
+    else:
+        print("Uso: python extract_ranking.py <archivo_html>")
+        print("     python extract_ranking.py --dir htmls-agp --out jsons-agp")
+        print("Ejemplos:")
+        print("  python extract_ranking.py corunha-individual.html")
+        print("  python extract_ranking.py santiago-individual.html")
+        return
+    
+    # Extraer datos del ranking y nombre del torneo (un único parseo)
+    players, tournament_name = parse_ranking_file(html_file, args.backend)
+    
+    # Crear el JSON final
+    ranking_data = build_ranking_json(players, tournament_name)
     
     # Generar nombre del archivo JSON basado en el archivo HTML
-    json_filename = html_file.replace('-individual.html', '_ranking.json')
+    json_filename = get_ranking_json_filename(html_file)
     
     # Guardar el JSON
-    with open(json_filename, 'w', encoding='utf-8') as f:
-        json.dump(ranking_data, f, ensure_ascii=False, indent=2)
+    save_ranking_json(ranking_data, json_filename)
     
     print(f"Se han extraído {len(players)} jugadores del ranking")
     print(f"Archivo JSON generado: {json_filename}")
+    
+    store = open_store(args.db)
+    if store is not None:
+        with store:
+            liga = os.path.basename(html_file).replace('-individual.html', '')
+            if store.upsert_ranking(liga, ranking_data):
+                print(f"Base de datos actualizada: {liga}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
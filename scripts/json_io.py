@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Capa de serialización JSON compartida por los scripts
+
+Usa orjson (o msgspec para leer) si está instalado y, si no, el módulo json
+de la biblioteca estándar, con el mismo resultado byte a byte: UTF-8 sin
+escapar (ensure_ascii=False) y los dos formatos que usa el repositorio,
+indent=2 y compacto (separators=(",", ":")). Cualquier otro formato, o un
+dato que el backend rápido no admite al escribir (claves no str, enteros de
+más de 64 bits), pasa por json. Diferencias conocidas, que no aparecen en
+los datos del torneo: floats NaN/Infinity o en notación exponencial al
+escribir, y enteros de más de 64 bits, que orjson lee como float.
+
+write_json escribe el JSON indentado en fragmentos (cada elemento de
+"matches" por separado) sobre un temporal que se renombra de forma atómica,
+así que el documento completo nunca está en memoria como texto.
+
+El backend se puede forzar con la variable de entorno JSON_BACKEND
+(orjson, msgspec o json). Para comparar backends:
+
+    python scripts/json_io.py benchmark tournament-viewer/data/tournament_extended.json
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(__file__))
+from atomic_io import atomic_write_chunks
+import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+JSON_BACKEND_ENV = "JSON_BACKEND"
+BACKENDS = ("orjson", "msgspec", "json")
+STREAM_KEY = "matches"
+COMPACT_SEPARATORS = (",", ":")
+
+_FAST_ERRORS: Tuple[type, ...] = (TypeError, ValueError, OverflowError)
+if msgspec is not None:
+    _FAST_ERRORS += (msgspec.MsgspecError,)
+
+def available_backends() -> Tuple[str, ...]:
+    """Backends instalados, del más rápido al más lento"""
+    installed = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    return tuple(name for name in BACKENDS if installed[name])
+
+def _initial_backend() -> str:
+    requested = os.environ.get(JSON_BACKEND_ENV, "").strip().lower()
+    if requested in available_backends():
+        return requested
+    return available_backends()[0]
+
+_backend = _initial_backend()
+
+def get_backend() -> str:
+    return _backend
+
+def set_backend(name: str):
+    """Cambia el backend (por ejemplo, "json" para comparar con la biblioteca estándar)"""
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"Backend JSON no disponible: {name} (instalados: {', '.join(available_backends())})")
+    _backend = name
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Decodifica JSON (bytes o str) con el backend activo"""
+    if _backend != "json":
+        try:
+            if _backend == "orjson":
+                return orjson.loads(content)
+            return msgspec.json.decode(content.encode("utf-8") if isinstance(content, str) else content)
+        except _FAST_ERRORS:
+            # Lo que el backend rápido rechaza lo decide json (mismo resultado o mismo error)
+            pass
+    return json.loads(content)
+
+def load(path: str) -> Any:
+    """Lee y decodifica un archivo JSON"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+def _orjson_option(indent: Optional[int], separators: Optional[Tuple[str, str]],
+                   sort_keys: bool) -> Optional[int]:
+    # Opciones de orjson equivalentes a json.dumps o None si no hay equivalente
+    if indent == 2:
+        option = orjson.OPT_INDENT_2
+    elif indent is None and separators is not None and tuple(separators) == COMPACT_SEPARATORS:
+        option = 0
+    else:
+        return None
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return option
+
+def dumps(data: Any, indent: Optional[int] = None, separators: Optional[Tuple[str, str]] = None,
+          sort_keys: bool = False) -> bytes:
+    """
+    Serializa a JSON UTF-8 con el backend activo.
+    Mismos argumentos y resultado que json.dumps(..., ensure_ascii=False).encode("utf-8").
+    """
+    if _backend == "orjson":
+        option = _orjson_option(indent, separators, sort_keys)
+        if option is not None:
+            try:
+                return orjson.dumps(data, option=option)
+            except _FAST_ERRORS:
+                pass
+    return json.dumps(data, ensure_ascii=False, indent=indent, separators=separators,
+                      sort_keys=sort_keys).encode("utf-8")
+
+def _nested(content: bytes, prefix: bytes) -> bytes:
+    # Indenta un valor serializado con indent=2 para colocarlo dentro de otro
+    # (los saltos de línea dentro de cadenas siempre van escapados)
+    return content.replace(b"\n", b"\n" + prefix)
+
+def iter_json_chunks(data: Any, stream_key: str = STREAM_KEY) -> Iterator[bytes]:
+    """
+    Fragmentos de dumps(data, indent=2): cada clave de primer nivel por
+    separado y cada elemento de data[stream_key] por separado.
+    """
+    items = data.get(stream_key) if isinstance(data, dict) else None
+    if not items or not isinstance(items, list) or not all(isinstance(key, str) for key in data):
+        yield dumps(data, indent=2)
+        return
+
+    yield b"{"
+    for position, (key, value) in enumerate(data.items()):
+        yield (b"\n  " if position == 0 else b",\n  ") + dumps(key) + b": "
+        if key != stream_key:
+            yield _nested(dumps(value, indent=2), b"  ")
+            continue
+        for index, item in enumerate(value):
+            yield (b"[\n    " if index == 0 else b",\n    ") + _nested(dumps(item, indent=2), b"    ")
+        yield b"\n  ]"
+    yield b"\n}"
+
+def _timed_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # Separa en las métricas el tiempo de serializar del de escribir
+    serializing = 0.0
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        serializing += time.perf_counter() - started
+        if chunk is None:
+            break
+        yield chunk
+    metrics.add_time("serialize", serializing)
+
+def write_json(path: str, data: Any, skip_unchanged: bool = True, stream_key: str = STREAM_KEY) -> bool:
+    """
+    Escribe data con indent=2 de forma atómica y en streaming.
+    Devuelve False si el archivo ya tenía ese contenido.
+    """
+    return atomic_write_chunks(path, _timed_chunks(iter_json_chunks(data, stream_key)), skip_unchanged)
+
+def _measure(function) -> Tuple[float, float]:
+    # Mejor tiempo de 5 ejecuciones y pico de memoria (MiB) de una más
+    best = min(_timed(function) for _ in range(5))
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+def _timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def benchmark(path: str, output_path: str) -> Dict[str, Dict[str, Tuple[float, float]]]:
+    """Compara carga y guardado de un archivo con cada backend instalado"""
+    with open(path, "rb") as f:
+        content = f.read()
+    reference = json.dumps(json.loads(content), ensure_ascii=False, indent=2).encode("utf-8")
+    previous = get_backend()
+    results = {}
+    try:
+        for name in available_backends():
+            set_backend(name)
+            data = loads(content)
+            write_json(output_path, data, skip_unchanged=False)
+            with open(output_path, "rb") as f:
+                identical = f.read() == reference
+            results[name] = {
+                "load": _measure(lambda: loads(content)),
+                "dumps": _measure(lambda: dumps(data, indent=2)),
+                "write_json": _measure(lambda: write_json(output_path, data, skip_unchanged=False)),
+                "identical": identical,
+            }
+    finally:
+        set_backend(previous)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return results
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "benchmark":
+        print("Uso: python json_io.py benchmark <archivo.json>")
+        return
+
+    path = sys.argv[2]
+    print(f"📊 {path} ({os.path.getsize(path)} bytes), backends: {', '.join(available_backends())}")
+    results = benchmark(path, f"{path}.benchmark.tmp")
+    baseline = results["json"]
+    for name, result in results.items():
+        print(f"\n{'✅' if result['identical'] else '❌'} {name} (salida idéntica a json: {'sí' if result['identical'] else 'no'})")
+        for operation in ("load", "dumps", "write_json"):
+            seconds, peak = result[operation]
+            speedup = baseline[operation][0] / seconds if seconds else 0
+            print(f"   {operation:<11} {seconds * 1000:>8.1f} ms  x{speedup:<5.1f} {peak:>7.1f} MiB")
+
+if __name__ == "__main__":
+    main()
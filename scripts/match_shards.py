@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+División de las partidas en shards por ronda y cuadro (ganadores/perdedores)
+
+Cuescore indica el cuadro con el signo de `round` (positivo: cuadro de ganadores,
+negativo: cuadro de perdedores) y el `branch`. Cada shard se guarda en
+data/matches/<id>.json y un índice (data/matches/index.json) lista los shards
+con la versión (hash del contenido) de cada uno. En cada actualización solo se
+reescriben los shards cuya versión ha cambiado.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Any, List, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from compact_tournament import SCHEMA_NAME, SCHEMA_VERSION
+from atomic_io import atomic_write_bytes
+
+SHARDS_DIR_NAME = "matches"
+SHARD_INDEX_NAME = "index.json"
+SHARD_INDEX_VERSION = 1
+VERSION_LENGTH = 16
+
+def _serialize(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def get_bracket(match: Dict[str, Any]) -> str:
+    """Devuelve el cuadro de una partida según el signo de su ronda"""
+    return "losers" if (match.get("round") or 0) < 0 else "winners"
+
+def get_shard_id(match: Dict[str, Any]) -> str:
+    """Identificador del shard de una partida: <cuadro>-r<ronda>[-b<branch>]"""
+    shard_id = f"{get_bracket(match)}-r{abs(match.get('round') or 0)}"
+    branch = match.get("branch")
+    if branch not in (None, 1):
+        shard_id += f"-b{branch}"
+    return shard_id
+
+def _match_is_pending(match: Dict[str, Any]) -> bool:
+    return match.get("matchstatus") != "finished"
+
+def build_match_shards(compact_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, bytes]]:
+    """
+    Agrupa las partidas compactas en shards.
+    Devuelve las entradas del índice (en orden de juego) y el contenido de cada shard.
+    """
+    rounds = compact_data.get("rounds", {})
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for match in compact_data.get("matches", []):
+        groups.setdefault(get_shard_id(match), []).append(match)
+
+    entries = []
+    contents = {}
+    for shard_id, matches in groups.items():
+        matches.sort(key=lambda match: match.get("matchno") or 0)
+        first = matches[0]
+        shard = {
+            "schema": SCHEMA_NAME,
+            "schema_version": SCHEMA_VERSION,
+            "shard": shard_id,
+            "matches": matches,
+        }
+        content = _serialize(shard)
+        contents[shard_id] = content
+
+        statuses: Dict[str, int] = {}
+        for match in matches:
+            status = match.get("matchstatus") or "unknown"
+            statuses[status] = statuses.get(status, 0) + 1
+
+        entries.append({
+            "id": shard_id,
+            "file": f"{shard_id}.json",
+            "bracket": get_bracket(first),
+            "branch": first.get("branch"),
+            "round": first.get("round"),
+            "roundName": rounds.get(str(first.get("round")), ""),
+            "count": len(matches),
+            "first_matchno": first.get("matchno") or 0,
+            "statuses": statuses,
+            "version": hashlib.sha256(content).hexdigest()[:VERSION_LENGTH],
+        })
+
+    entries.sort(key=lambda entry: entry["first_matchno"])
+    return entries, contents
+
+def get_current_shard(entries: List[Dict[str, Any]]) -> str:
+    """El shard actual es el primero, en orden de juego, con partidas sin terminar"""
+    for entry in entries:
+        if any(status != "finished" for status in entry["statuses"]):
+            return entry["id"]
+    return entries[-1]["id"] if entries else ""
+
+def load_shard_index(shards_dir: str) -> Dict[str, Any]:
+    """Carga el índice de shards existente"""
+    try:
+        with open(os.path.join(shards_dir, SHARD_INDEX_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def publish_match_shards(compact_data: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    """
+    Escribe los shards que han cambiado y el índice.
+    Devuelve la información para el manifest (ruta del índice y su versión).
+    """
+    shards_dir = os.path.join(output_dir, SHARDS_DIR_NAME)
+    os.makedirs(shards_dir, exist_ok=True)
+
+    entries, contents = build_match_shards(compact_data)
+    previous = {entry["id"]: entry for entry in load_shard_index(shards_dir).get("shards", [])}
+
+    written = []
+    for entry in entries:
+        path = os.path.join(shards_dir, entry["file"])
+        old_entry = previous.get(entry["id"])
+        if old_entry and old_entry.get("version") == entry["version"] and os.path.exists(path):
+            continue
+        if atomic_write_bytes(path, contents[entry["id"]]):
+            written.append(entry["id"])
+
+    # Eliminar shards que ya no existen
+    current_ids = {entry["id"] for entry in entries}
+    for shard_id, old_entry in previous.items():
+        if shard_id not in current_ids:
+            path = os.path.join(shards_dir, old_entry.get("file", f"{shard_id}.json"))
+            if os.path.exists(path):
+                os.remove(path)
+
+    index = {
+        "index_version": SHARD_INDEX_VERSION,
+        "current": get_current_shard(entries),
+        "shards": entries,
+    }
+    index_content = _serialize(index)
+    index_path = os.path.join(shards_dir, SHARD_INDEX_NAME)
+    if written or load_shard_index(shards_dir) != index:
+        atomic_write_bytes(index_path, index_content)
+
+    print(f"Shards de partidas: {len(entries)} ({len(written)} reescritos)")
+
+    return {
+        "index": f"{SHARDS_DIR_NAME}/{SHARD_INDEX_NAME}",
+        "version": hashlib.sha256(index_content).hexdigest()[:VERSION_LENGTH],
+        "current": index["current"],
+    }
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas por etapa del pipeline de actualización
+
+Cada ejecución (una actualización de refresh_tournament.py) es un run con:
+- stages: tiempo, llamadas y, con trace_memory, pico de memoria (tracemalloc,
+  MiB por encima de la memoria al empezar la etapa) de cada etapa. tracemalloc
+  ralentiza mucho la serialización, así que por defecto solo se miden tiempos
+  y la memoria se mide en una ejecución aparte. Las etapas anidadas y los
+  tiempos añadidos con add_time llevan el nombre de la etapa que los contiene
+  como prefijo ("fetch.network", "write.serialize")
+- counters: partidas añadidas/modificadas, bytes escritos, reintentos...
+- info: estado final, torneo, backend JSON...
+
+El JSON del run se escribe en METRICS_DIR al empezar y tras cada etapa de
+primer nivel, así que si la ejecución se corta (timeout del workflow) queda
+la última etapa completada. Opcionalmente se guarda un perfil de cProfile.
+
+Sin configure() todas las funciones son no-ops baratas, así que los módulos
+se pueden instrumentar sin depender de que haya un run activo:
+
+    with metrics.stage("merge"):
+        ...
+    metrics.count("bytes_written", len(content))
+
+Resumen de varios runs (p50/p95/máx de cada etapa):
+
+    python scripts/metrics.py summary .cache/metrics --budget fetch=10 --budget total=60
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Any, List, Optional, Iterator
+
+METRICS_VERSION = 1
+MIB = 1024 * 1024
+
+_config: Dict[str, Any] = {"directory": None, "trace_memory": False, "profile": None, "keep": None}
+_current: Optional["RunMetrics"] = None
+_local = threading.local()
+
+def configure(directory: Optional[str], trace_memory: bool = False, profile: Optional[str] = None,
+              keep: Optional[int] = None):
+    """
+    Activa las métricas: un JSON por run en `directory` (se conservan los
+    `keep` más recientes), la memoria con tracemalloc si trace_memory y, si se
+    indica, el perfil de cProfile en `profile`
+    """
+    _config.update(directory=directory, trace_memory=trace_memory, profile=profile, keep=keep)
+
+def is_enabled() -> bool:
+    return bool(_config["directory"] or _config["profile"])
+
+def _stack() -> List[Dict[str, Any]]:
+    # Etapas abiertas en este hilo (las descargas de --all van en hilos)
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def _tracing() -> bool:
+    return tracemalloc.is_tracing() and threading.current_thread() is threading.main_thread()
+
+class RunMetrics:
+    """Métricas de una ejecución"""
+
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.started = datetime.now(timezone.utc)
+        self.started_clock = time.perf_counter()
+        self.status = "running"
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, float] = {}
+        self.info: Dict[str, Any] = {}
+        self.peak_mib: Optional[float] = None
+
+    def add_stage(self, name: str, seconds: float, peak_mib: Optional[float] = None):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        if peak_mib is not None:
+            entry["peak_mib"] = max(entry.get("peak_mib", 0.0), peak_mib)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": METRICS_VERSION,
+            "name": self.name,
+            "status": self.status,
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self.started_clock, 4),
+            "peak_mib": self.peak_mib,
+            "python": platform.python_version(),
+            "stages": {name: {key: round(value, 4) if isinstance(value, float) else value
+                              for key, value in entry.items()}
+                       for name, entry in self.stages.items()},
+            "counters": self.counters,
+            "info": self.info,
+        }
+
+    def save(self):
+        if self.path:
+            _write_json(self.path, self.to_dict())
+
+def _write_json(path: str, data: Dict[str, Any]):
+    # Las métricas no se publican: basta con temporal + os.replace
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+def _prune(directory: str, name: str, keep: Optional[int]):
+    # Conserva solo los `keep` runs más recientes (el nombre empieza por la fecha)
+    if not keep:
+        return
+    files = sorted(filename for filename in os.listdir(directory)
+                   if filename.startswith(f"{name}-") and filename.endswith(".json"))
+    for filename in files[:-keep]:
+        os.remove(os.path.join(directory, filename))
+
+@contextmanager
+def run(name: str) -> Iterator[Optional[RunMetrics]]:
+    """
+    Registra una ejecución completa. El estado final es el que se fije con
+    set_status, o "error" si sale una excepción.
+    """
+    global _current
+    if not is_enabled() or _current is not None:
+        yield _current
+        return
+
+    path = None
+    if _config["directory"]:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        path = os.path.join(_config["directory"], f"{name}-{stamp}.json")
+    metrics = _current = RunMetrics(name, path)
+    started_tracing = _config["trace_memory"] and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if _config["profile"] else None
+    metrics.save()
+
+    if profiler:
+        profiler.enable()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.status = "error"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(_config["profile"])
+            metrics.info["profile"] = _config["profile"]
+        if tracemalloc.is_tracing():
+            metrics.peak_mib = round(tracemalloc.get_traced_memory()[1] / MIB, 2)
+        if started_tracing:
+            tracemalloc.stop()
+        if metrics.status == "running":
+            metrics.status = "ok"
+        _current = None
+        metrics.save()
+        if path:
+            _prune(_config["directory"], name, _config["keep"])
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mide el tiempo (y el pico de memoria) de un bloque"""
+    metrics = _current
+    if metrics is None:
+        yield
+        return
+
+    stack = _stack()
+    tracing = _tracing()
+    frame = {"name": f"{stack[-1]['name']}.{name}" if stack else name, "peak": 0}
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # reset_peak es global: se guarda el pico que llevaba la etapa que contiene a esta
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame["base"] = current
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        peak_mib = None
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            peak_mib = round((peak - frame["base"]) / MIB, 2)
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        metrics.add_stage(frame["name"], elapsed, peak_mib)
+        if not stack:
+            metrics.save()
+
+def timed(name: str):
+    """Decorador equivalente a envolver la función en stage(name)"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def add_time(name: str, seconds: float):
+    """Suma tiempo medido fuera de stage() (red, esperas) dentro de la etapa actual"""
+    if _current is not None:
+        stack = _stack()
+        _current.add_stage(f"{stack[-1]['name']}.{name}" if stack else name, seconds)
+
+def count(name: str, value: float = 1):
+    """Incrementa un contador del run actual"""
+    if _current is not None:
+        _current.counters[name] = _current.counters.get(name, 0) + value
+
+def set_info(name: str, value: Any):
+    """Guarda un dato descriptivo del run actual (torneo, backend, estado HTTP...)"""
+    if _current is not None:
+        _current.info[name] = value
+
+def set_status(status: str):
+    """Estado final del run (saved, not_modified, unchanged, error...)"""
+    if _current is not None:
+        _current.status = status
+
+def load_runs(paths: List[str]) -> List[Dict[str, Any]]:
+    """Carga los JSON de métricas de los archivos o directorios indicados"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".json"))
+        else:
+            files.append(path)
+    runs = []
+    for filename in files:
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                runs.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  {filename}: {e}")
+    return runs
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """p50, p95 y máximo de segundos por etapa ("total" es el run completo)"""
+    seconds: Dict[str, List[float]] = {"total": [run.get("seconds", 0.0) for run in runs]}
+    for metrics in runs:
+        for name, entry in metrics.get("stages", {}).items():
+            seconds.setdefault(name, []).append(entry["seconds"])
+    return {name: {"runs": len(values), "p50": percentile(values, 0.5),
+                   "p95": percentile(values, 0.95), "max": max(values)}
+            for name, values in seconds.items() if values}
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de las métricas de las actualizaciones")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("paths", nargs="+", help="Archivos JSON de métricas o directorios")
+    parser.add_argument("--budget", action="append", default=[], metavar="ETAPA=SEGUNDOS",
+                        help="Termina con código 1 si el p95 de la etapa supera los segundos indicados")
+    args = parser.parse_args()
+
+    runs = load_runs(args.paths)
+    if not runs:
+        print("No hay métricas")
+        return
+
+    statuses: Dict[str, int] = {}
+    for metrics in runs:
+        statuses[metrics.get("status", "?")] = statuses.get(metrics.get("status", "?"), 0) + 1
+    print(f"📊 {len(runs)} runs: {statuses}")
+
+    summary = summarize(runs)
+    print(f"   {'etapa':<32} {'runs':>5} {'p50 (s)':>9} {'p95 (s)':>9} {'máx (s)':>9}")
+    for name, entry in summary.items():
+        print(f"   {name:<32} {entry['runs']:>5} {entry['p50']:>9.3f} {entry['p95']:>9.3f} {entry['max']:>9.3f}")
+
+    exceeded = []
+    for budget in args.budget:
+        name, _, limit = budget.partition("=")
+        if name in summary and summary[name]["p95"] > float(limit):
+            exceeded.append(f"{name} (p95 {summary[name]['p95']:.2f} s > {float(limit):g} s)")
+    if exceeded:
+        print(f"❌ Presupuesto superado: {', '.join(exceeded)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
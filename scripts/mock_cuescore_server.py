@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita el endpoint api.cuescore.com/tournament/?id=
+
+Sirve una instantánea grabada de Cuescore o reproduce la evolución de un
+torneo a velocidad acelerada entre una instantánea inicial y una final:
+cada partida pasa de `waiting` a `playing` en su starttime real y a
+`finished` en su stoptime real, y el curVersion (común a todo el torneo, como
+en Cuescore) aumenta con cada cambio.
+
+También puede simular latencia, respuestas 304 (ETag / Last-Modified),
+429 con Retry-After y cuerpos truncados, para probar refresh_tournament.py sin
+consultar cuescore.com:
+
+    python scripts/mock_cuescore_server.py --speed 600 --latency 0.2 --rate-429 0.05
+    CUESCORE_API_URL=http://127.0.0.1:8080/tournament python scripts/refresh_tournament.py
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_INITIAL_SNAPSHOT = "tmp/individual-match-data.json"
+DEFAULT_FINAL_SNAPSHOT = "tournament-viewer/data/tournament_extended.json"
+DEFAULT_PORT = 8080
+DEFAULT_SPEED = 600.0  # Segundos de torneo por segundo real
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """Carga una instantánea de Cuescore (o un tournament_extended.json)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _parse_time(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _strip_agp_fields(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Quita los campos añadidos por el pipeline AGP para servir la partida como Cuescore"""
+    match = copy.deepcopy(match)
+    for side in ("playerA", "playerB"):
+        if isinstance(match.get(side), dict):
+            match[side].pop("ranking_info", None)
+    return match
+
+class TournamentReplay:
+    """
+    Estado del torneo en función del tiempo virtual.
+
+    Sin instantánea final se sirve siempre la inicial. Con instantánea final,
+    los eventos (inicio y fin de cada partida) se aplican en orden según el
+    reloj virtual = primer evento + segundos reales transcurridos * speed.
+    """
+
+    def __init__(self, initial: Dict[str, Any], final: Optional[Dict[str, Any]] = None,
+                 speed: float = DEFAULT_SPEED, clock=time.monotonic):
+        self.initial = initial
+        self.speed = speed
+        self.clock = clock
+        self.started = clock()
+        self.base_version = max((match.get("curVersion") or 0 for match in initial.get("matches", [])), default=0)
+        self.final_matches = {}
+        self.events: List[Tuple[datetime, int, str]] = []
+
+        if final is not None:
+            for match in final.get("matches", []):
+                self.final_matches[match["matchId"]] = _strip_agp_fields(match)
+            self.events = self._build_events()
+
+        self.virtual_start = self.events[0][0] - timedelta(seconds=1) if self.events else None
+        self._cache_key = None
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def _build_events(self) -> List[Tuple[datetime, int, str]]:
+        initial_status = {match["matchId"]: match.get("matchstatus") for match in self.initial.get("matches", [])}
+        events = []
+        for match_id, match in self.final_matches.items():
+            if initial_status.get(match_id) == match.get("matchstatus"):
+                continue
+            start = _parse_time(match.get("starttime", ""))
+            stop = _parse_time(match.get("stoptime", ""))
+            if start is not None:
+                events.append((start, match_id, "playing"))
+            if stop is not None or start is not None:
+                events.append((stop or start, match_id, "finished"))
+        events.sort(key=lambda event: (event[0], event[2] == "finished", event[1]))
+        return events
+
+    def virtual_now(self) -> Optional[datetime]:
+        if self.virtual_start is None:
+            return None
+        return self.virtual_start + timedelta(seconds=(self.clock() - self.started) * self.speed)
+
+    def applied_events(self) -> int:
+        """Número de eventos ya ocurridos en el reloj virtual"""
+        now = self.virtual_now()
+        if now is None:
+            return 0
+        count = 0
+        for event_time, _, _ in self.events:
+            if event_time > now:
+                break
+            count += 1
+        return count
+
+    def is_complete(self) -> bool:
+        return self.applied_events() == len(self.events)
+
+    def snapshot(self) -> Tuple[bytes, datetime, int]:
+        """Devuelve (cuerpo JSON, fecha del último cambio, versión) del estado actual"""
+        applied = self.applied_events()
+        with self._lock:
+            if self._cache_key == applied:
+                return self._cache
+            self._cache_key = applied
+            self._cache = self._render(applied)
+            return self._cache
+
+    def _render(self, applied: int) -> Tuple[bytes, datetime, int]:
+        data = self.state(applied)
+        version = self.base_version + applied
+        if applied:
+            last_change = self.events[applied - 1][0]
+        else:
+            last_change = self.virtual_start or datetime(2025, 1, 1, tzinfo=timezone.utc)
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        return body, last_change, version
+
+    def state(self, applied: int) -> Dict[str, Any]:
+        """Datos del torneo tal como los sirve Cuescore tras los primeros `applied` eventos"""
+        status: Dict[int, str] = {}
+        for _, match_id, new_status in self.events[:applied]:
+            status[match_id] = new_status
+
+        version = self.base_version + applied
+        data = {key: value for key, value in self.initial.items() if key != "matches"}
+        matches = []
+        for match in self.initial.get("matches", []):
+            match_id = match["matchId"]
+            if status.get(match_id) == "finished":
+                match = copy.deepcopy(self.final_matches[match_id])
+            elif status.get(match_id) == "playing":
+                final_match = self.final_matches[match_id]
+                match = copy.deepcopy(match)
+                match.update({
+                    "playerA": copy.deepcopy(final_match["playerA"]),
+                    "playerB": copy.deepcopy(final_match["playerB"]),
+                    "starttime": final_match.get("starttime", ""),
+                    "matchstatus": "playing",
+                })
+            else:
+                match = dict(match)
+            match["curVersion"] = version
+            matches.append(match)
+        data["matches"] = matches
+        return data
+
+class MockCuescoreHandler(BaseHTTPRequestHandler):
+    """Atiende GET /tournament/?id=<id> con los fallos configurados en el servidor"""
+
+    server_version = "MockCuescore/1.0"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+              content_length: Optional[int] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body) if content_length is None else content_length))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+
+        query = parse_qs(urlparse(self.path).query)
+        tournament_id = (query.get("id") or [""])[0]
+        if tournament_id != str(server.tournament_id):
+            server.count("404")
+            self._send(404, b'{"error":"Tournament not found"}')
+            return
+
+        if server.latency:
+            time.sleep(server.latency + server.rng.uniform(0, server.jitter))
+
+        if server.rng.random() < server.rate_429:
+            server.count("429")
+            self._send(429, b'{"error":"Too many requests"}', {"Retry-After": str(server.retry_after)})
+            return
+
+        body, last_change, version = server.replay.snapshot()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        last_modified = format_datetime(last_change.astimezone(timezone.utc), usegmt=True)
+
+        if server.validators:
+            if self.headers.get("If-None-Match") == etag:
+                server.count("304")
+                self._send(304, headers={"ETag": etag, "Last-Modified": last_modified})
+                return
+            since = self.headers.get("If-Modified-Since")
+            if since and not self.headers.get("If-None-Match"):
+                try:
+                    if last_change.replace(microsecond=0) <= parsedate_to_datetime(since):
+                        server.count("304")
+                        self._send(304, headers={"ETag": etag, "Last-Modified": last_modified})
+                        return
+                except (TypeError, ValueError):
+                    pass
+
+        headers = {"Content-Type": "application/json; charset=utf-8", "X-Mock-Version": str(version)}
+        if server.validators:
+            headers.update({"ETag": etag, "Last-Modified": last_modified})
+
+        if server.rng.random() < server.rate_truncated:
+            # Se anuncia la longitud completa pero solo se envía la mitad
+            server.count("truncated")
+            self._send(200, body[:len(body) // 2], headers, content_length=len(body))
+            self.close_connection = True
+            return
+
+        server.count("200")
+        self._send(200, body, headers)
+
+class MockCuescoreServer(ThreadingHTTPServer):
+    """Servidor HTTP con el estado de la reproducción y la configuración de fallos"""
+
+    daemon_threads = True
+
+    def __init__(self, address, replay: TournamentReplay, tournament_id: Any,
+                 latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: int = 1, rate_truncated: float = 0.0, validators: bool = True,
+                 seed: Optional[int] = None, quiet: bool = True):
+        super().__init__(address, MockCuescoreHandler)
+        self.replay = replay
+        self.tournament_id = tournament_id
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_truncated = rate_truncated
+        self.validators = validators
+        self.rng = random.Random(seed)
+        self.quiet = quiet
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    @property
+    def api_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/tournament"
+
+def start_mock_server(initial_path: str = DEFAULT_INITIAL_SNAPSHOT, final_path: Optional[str] = None,
+                      host: str = "127.0.0.1", port: int = 0, speed: float = DEFAULT_SPEED,
+                      **options) -> MockCuescoreServer:
+    """
+    Arranca el servidor en un hilo (port=0 elige un puerto libre).
+    Devuelve el servidor; su api_url se usa como CUESCORE_API_URL.
+    """
+    initial = load_snapshot(initial_path)
+    final = load_snapshot(final_path) if final_path else None
+    replay = TournamentReplay(initial, final, speed=speed)
+    server = MockCuescoreServer((host, port), replay, initial.get("tournamentId"), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de torneos de Cuescore")
+    parser.add_argument("--snapshot", default=DEFAULT_INITIAL_SNAPSHOT, help="Instantánea inicial de Cuescore")
+    parser.add_argument("--final", default=DEFAULT_FINAL_SNAPSHOT,
+                        help="Instantánea final para reproducir la evolución del torneo")
+    parser.add_argument("--static", action="store_true", help="Sirve la instantánea inicial sin reproducción")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="Segundos de torneo por segundo real")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia por petición en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia aleatoria adicional máxima")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probabilidad de responder 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After de las respuestas 429")
+    parser.add_argument("--rate-truncated", type=float, default=0.0, help="Probabilidad de truncar el cuerpo")
+    parser.add_argument("--no-validators", action="store_true", help="No envía ETag / Last-Modified ni responde 304")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla de los fallos aleatorios")
+    parser.add_argument("--verbose", action="store_true", help="Muestra cada petición")
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        args.snapshot, None if args.static else args.final, args.host, args.port, args.speed,
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429, retry_after=args.retry_after,
+        rate_truncated=args.rate_truncated, validators=not args.no_validators, seed=args.seed,
+        quiet=not args.verbose,
+    )
+    replay = server.replay
+    print(f"🎱 Mock de Cuescore en {server.api_url}/?id={server.tournament_id}")
+    print(f"   Eventos a reproducir: {len(replay.events)} (velocidad x{args.speed:g})")
+    print(f"   Usar con: CUESCORE_API_URL={server.api_url} python scripts/refresh_tournament.py")
+
+    try:
+        while True:
+            time.sleep(10)
+            now = replay.virtual_now()
+            print(f"   {now.isoformat() if now else '-'}: {replay.applied_events()}/{len(replay.events)} eventos, "
+                  f"peticiones: {server.stats}")
+    except KeyboardInterrupt:
+        print("Servidor detenido")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
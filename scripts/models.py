@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modelo en memoria de partidas, jugadores y datos de liga
+
+Clases con __slots__ en lugar de diccionarios anidados:
+
+- RankingEntry: un registro del análisis de participantes (analyze_players.py),
+  la lista "players" del torneo extendido
+- Player: un jugador de Cuescore; cada jugador es una única instancia
+  compartida por todas sus partidas (PlayerTable, por playerId)
+- Match: una partida de Cuescore, con referencias a los Player de cada lado
+
+Es la representación con la que trabajan la fusión de refresh_tournament.py,
+el cuadro (bracket.py), las fichas de jugadores y el rating Elo. El JSON solo
+se convierte en el borde: decode_tournament() al leer (JSON de Cuescore o ya
+publicado, sin modificar ni copiar sus diccionarios) y encode_tournament() al
+escribir, con las mismas claves y en el mismo orden. Los campos que no están
+en el esquema se conservan tal cual (extra). Cada partida y cada jugador se
+codifican como diccionarios nuevos, así que modificar la salida no afecta al
+modelo ni a otras partidas.
+
+    data = decode_tournament(load('tournament_extended.json'))
+    ...
+    write_json('tournament_extended.json', encode_tournament(data))
+"""
+
+import sys
+from operator import attrgetter
+from typing import Dict, Any, List, Optional, Tuple, Iterator, FrozenSet
+
+# (clave JSON, atributo) de cada modelo, en el orden de los datos originales
+RANKING_FIELDS = (
+    ('player_id', 'player_id'),
+    ('nombre_gallego', 'nombre_gallego'),
+    ('nombre_ranking', 'nombre_ranking'),
+    ('similitud', 'similitud'),
+    ('liga', 'liga'),
+    ('posicion', 'posicion'),
+    ('agp', 'agp'),
+    ('puntos_totales', 'puntos_totales'),
+    ('puntos_base', 'puntos_base'),
+    ('puntos_extra', 'puntos_extra'),
+    ('penalizaciones', 'penalizaciones'),
+    ('partidas_favor', 'partidas_favor'),
+    ('partidas_contra', 'partidas_contra'),
+    ('diferencia_partidas', 'diferencia_partidas'),
+    ('pruebas_jugadas', 'pruebas_jugadas'),
+    ('clasificado', 'clasificado'),
+)
+
+# Bloque ranking_info de cada jugador en las partidas: (clave, campo del análisis)
+RANKING_INFO_FIELDS = (
+    ('liga', 'liga'),
+    ('posicion_liga', 'posicion'),
+    ('puntos_totales', 'puntos_totales'),
+    ('puntos_base', 'puntos_base'),
+    ('partidas_favor', 'partidas_favor'),
+    ('partidas_contra', 'partidas_contra'),
+    ('diferencia_partidas', 'diferencia_partidas'),
+    ('clasificado', 'clasificado'),
+    ('agp', 'agp'),
+    ('pruebas_jugadas', 'pruebas_jugadas'),
+)
+
+PLAYER_FIELDS = (
+    ('playerId', 'player_id'),
+    ('name', 'name'),
+    ('firstname', 'firstname'),
+    ('lastname', 'lastname'),
+    ('url', 'url'),
+    ('image', 'image'),
+    ('country', 'country'),
+    ('livesIn', 'lives_in'),
+    ('represents', 'represents'),
+    ('ranking_info', 'ranking_info'),
+)
+
+MATCH_FIELDS = (
+    ('matchId', 'match_id'),
+    ('matchno', 'matchno'),
+    ('roundName', 'round_name'),
+    ('roundCode', 'round_code'),
+    ('round', 'round'),
+    ('playerA', 'player_a'),
+    ('playerB', 'player_b'),
+    ('scoreA', 'score_a'),
+    ('scoreB', 'score_b'),
+    ('raceTo', 'race_to'),
+    ('discipline', 'discipline'),
+    ('disciplineId', 'discipline_id'),
+    ('branch', 'branch'),
+    ('penalty', 'penalty'),
+    ('groupNo', 'group_no'),
+    ('inningsPlayerA', 'innings_player_a'),
+    ('inningsPlayerB', 'innings_player_b'),
+    ('highBreaksA', 'high_breaks_a'),
+    ('highBreaksB', 'high_breaks_b'),
+    ('runoutsA', 'runouts_a'),
+    ('runoutsB', 'runouts_b'),
+    ('lagWinner', 'lag_winner'),
+    ('table', 'table'),
+    ('tournamentId', 'tournament_id'),
+    ('challengeId', 'challenge_id'),
+    ('starttime', 'starttime'),
+    ('stoptime', 'stoptime'),
+    ('matchstatus', 'status'),
+    ('matchstatusCode', 'status_code'),
+    ('bestOfSets', 'best_of_sets'),
+    ('useInnings', 'use_innings'),
+    ('frames', 'frames'),
+    ('properties', 'properties'),
+    ('sets', 'sets'),
+    ('curVersion', 'cur_version'),
+    ('notes', 'notes'),
+    ('matchType', 'match_type'),
+    ('videoLink', 'video_link'),
+    ('comment', 'comment'),
+    ('winnerNext', 'winner_next'),
+    ('loserNext', 'loser_next'),
+)
+
+# Campos de texto que se repiten en muchas partidas: se comparte una sola cadena
+INTERNED_MATCH_FIELDS = ('roundName', 'roundCode', 'discipline', 'branch', 'matchstatus', 'matchType')
+
+class _Layout:
+    """
+    Claves JSON de un objeto en su orden original y cómo leerlas. Se comparte
+    entre todos los objetos de una clase con las mismas claves.
+    """
+
+    __slots__ = ('keys', 'key_set', 'attributes', 'missing', 'getter')
+
+    def __init__(self, model: type, keys: Tuple[str, ...]):
+        attributes = model.ATTRIBUTES
+        self.keys = keys
+        self.key_set: FrozenSet[str] = frozenset(keys)
+        self.attributes = tuple(attributes.get(key) for key in keys)
+        # Atributos del esquema que no vienen en el JSON (valen None)
+        self.missing = tuple(attribute for key, attribute in attributes.items() if key not in self.key_set)
+        # Sin campos extra, todos los valores se leen de una vez
+        self.getter = None
+        if None not in self.attributes and len(keys) > 1:
+            self.getter = attrgetter(*self.attributes)
+
+_layouts: Dict[Tuple[type, Tuple[str, ...]], _Layout] = {}
+
+def _layout(model: type, keys: Tuple[str, ...]) -> _Layout:
+    layout = _layouts.get((model, keys))
+    if layout is None:
+        layout = _layouts[(model, keys)] = _Layout(model, keys)
+    return layout
+
+class _Model:
+    """Base de los modelos: campos del esquema como atributos y el resto en extra"""
+
+    ATTRIBUTES: Dict[str, str] = {}
+    __slots__ = ('extra', 'layout')
+
+    @classmethod
+    def _decode(cls, data: Dict[str, Any]) -> Any:
+        obj = cls.__new__(cls)
+        obj.layout = layout = _layout(cls, tuple(data))
+        extra = None
+        for key, attribute, value in zip(layout.keys, layout.attributes, data.values()):
+            if attribute is not None:
+                setattr(obj, attribute, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        obj.extra = extra
+        for attribute in layout.missing:
+            setattr(obj, attribute, None)
+        return obj
+
+    def encode(self) -> Dict[str, Any]:
+        """JSON del objeto, con las claves en el orden original"""
+        layout = self.layout
+        if layout.getter is not None:
+            return dict(zip(layout.keys, layout.getter(self)))
+        extra = self.extra
+        return {key: getattr(self, attribute) if attribute is not None else extra[key]
+                for key, attribute in zip(layout.keys, layout.attributes)}
+
+    def values(self) -> Tuple[Any, ...]:
+        """Valores en el orden de layout.keys"""
+        layout = self.layout
+        if layout.getter is not None:
+            return layout.getter(self)
+        extra = self.extra
+        return tuple(getattr(self, attribute) if attribute is not None else extra[key]
+                     for key, attribute in zip(layout.keys, layout.attributes))
+
+    def value(self, key: str, default: Any = None) -> Any:
+        """Valor de una clave JSON (default si el JSON original no la tiene)"""
+        if key not in self.layout.key_set:
+            return default
+        attribute = self.ATTRIBUTES.get(key)
+        return getattr(self, attribute) if attribute is not None else self.extra[key]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Pares (clave JSON, valor) en el orden original"""
+        extra = self.extra
+        for key, attribute in zip(self.layout.keys, self.layout.attributes):
+            yield key, getattr(self, attribute) if attribute is not None else extra[key]
+
+    def _set(self, key: str, value: Any):
+        # Asigna una clave del esquema; si es nueva se añade al final, como en un dict
+        if key not in self.layout.key_set:
+            self.layout = _layout(type(self), self.layout.keys + (key,))
+        setattr(self, self.ATTRIBUTES[key], value)
+
+class RankingEntry(_Model):
+    """Datos de liga de un participante (un registro de analisis_participantes_gallego.json)"""
+
+    ATTRIBUTES = dict(RANKING_FIELDS)
+    __slots__ = tuple(ATTRIBUTES.values())
+
+    @classmethod
+    def decode(cls, data: Dict[str, Any]) -> "RankingEntry":
+        return cls._decode(data)
+
+    def ranking_info(self) -> Dict[str, Any]:
+        """Bloque ranking_info que acompaña al jugador en cada partida"""
+        return {key: getattr(self, attribute) for key, attribute in RANKING_INFO_FIELDS}
+
+class Player(_Model):
+    """Jugador de Cuescore, compartido por todas sus partidas"""
+
+    ATTRIBUTES = dict(PLAYER_FIELDS)
+    __slots__ = tuple(ATTRIBUTES.values())
+
+    @classmethod
+    def decode(cls, data: Dict[str, Any]) -> "Player":
+        return cls._decode(data)
+
+    def set_ranking_info(self, ranking_info: Optional[Dict[str, Any]]):
+        """Añade (o sustituye) el bloque ranking_info de los datos AGP"""
+        self._set('ranking_info', ranking_info)
+
+    def same_source(self, data: Dict[str, Any]) -> bool:
+        """Indica si data es el mismo jugador con los mismos datos"""
+        return self.layout.keys == tuple(data) and self.encode() == data
+
+class PlayerTable:
+    """
+    Jugadores compartidos por todas las partidas, por (playerId, nombre).
+    Si un jugador aparece con datos distintos en otra partida se crea otra
+    instancia para que la salida no cambie.
+    """
+
+    def __init__(self):
+        # Versiones de cada jugador (Cuescore no siempre manda las mismas claves)
+        # y todas las instancias creadas
+        self.players: Dict[Tuple[Any, Any], List[Player]] = {}
+        self.instances: List[Player] = []
+
+    @classmethod
+    def from_matches(cls, matches: List["Match"]) -> "PlayerTable":
+        """Tabla con los jugadores de partidas ya decodificadas"""
+        table = cls()
+        known = set()
+        for match in matches:
+            for player in (match.player_a, match.player_b):
+                if isinstance(player, Player) and id(player) not in known:
+                    known.add(id(player))
+                    table.players.setdefault((player.player_id, player.name), []).append(player)
+                    table.instances.append(player)
+        return table
+
+    def get(self, data: Any) -> Any:
+        """Player compartido para el JSON de un jugador (otros valores se devuelven tal cual)"""
+        if not isinstance(data, dict):
+            return data
+        variants = self.players.setdefault((data.get('playerId'), data.get('name')), [])
+        for player in variants:
+            if player.same_source(data):
+                return player
+        # Datos nuevos del jugador: las partidas siguientes comparten esta versión
+        player = Player.decode(data)
+        variants.append(player)
+        self.instances.append(player)
+        return player
+
+    def with_ranking_info(self, player: Player, ranking_info: Optional[Dict[str, Any]]) -> Player:
+        """El mismo jugador con ranking_info (sin modificar la instancia compartida)"""
+        data = player.encode()
+        data['ranking_info'] = ranking_info
+        return self.get(data)
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def __iter__(self) -> Iterator[Player]:
+        return iter(self.instances)
+
+class Match(_Model):
+    """Partida de Cuescore; player_a y player_b son instancias compartidas de Player"""
+
+    ATTRIBUTES = dict(MATCH_FIELDS)
+    __slots__ = tuple(ATTRIBUTES.values())
+
+    @classmethod
+    def decode(cls, data: Dict[str, Any], players: PlayerTable) -> "Match":
+        match = cls._decode(data)
+        match.player_a = players.get(data.get('playerA'))
+        match.player_b = players.get(data.get('playerB'))
+        for key in INTERNED_MATCH_FIELDS:
+            value = data.get(key)
+            if isinstance(value, str):
+                setattr(match, cls.ATTRIBUTES[key], sys.intern(value))
+        return match
+
+    def encode(self) -> Dict[str, Any]:
+        """JSON publicado de la partida, con un diccionario nuevo por jugador"""
+        data = super().encode()
+        for key in ('playerA', 'playerB'):
+            player = data.get(key)
+            if isinstance(player, Player):
+                data[key] = player.encode()
+        return data
+
+    def player(self, side: str) -> Optional[Player]:
+        """Jugador del lado 'A' o 'B' (None si el hueco no tiene jugador)"""
+        player = self.player_a if side == 'A' else self.player_b
+        return player if isinstance(player, Player) else None
+
+    def set_player(self, side: str, player: Any):
+        if side == 'A':
+            self.player_a = player
+        else:
+            self.player_b = player
+
+    def player_id(self, side: str) -> int:
+        """playerId del lado 'A' o 'B'; 0 si el hueco aún no está decidido ("Winner of #31")"""
+        player = self.player(side)
+        return (player.player_id or 0) if player is not None else 0
+
+    def player_name(self, side: str) -> str:
+        player = self.player(side)
+        return player.value('name', '') if player is not None else ''
+
+def decode_matches(matches: List[Dict[str, Any]], players: Optional[PlayerTable] = None) -> List[Match]:
+    """Partidas de Cuescore como Match (con una PlayerTable nueva si no se pasa)"""
+    players = players if players is not None else PlayerTable()
+    return [Match.decode(match, players) for match in matches]
+
+def encode_matches(matches: List[Match]) -> List[Dict[str, Any]]:
+    return [match.encode() for match in matches]
+
+def decode_tournament(data: Dict[str, Any], players: Optional[PlayerTable] = None) -> Dict[str, Any]:
+    """
+    Datos del torneo (extendido, publicado o de Cuescore) con las partidas como
+    Match y la lista de jugadores AGP como RankingEntry. El resto de claves se
+    mantiene tal cual y en el mismo orden.
+    """
+    decoded = dict(data)
+    if isinstance(data.get('matches'), list):
+        decoded['matches'] = decode_matches(data['matches'], players)
+    if isinstance(data.get('players'), list):
+        decoded['players'] = [RankingEntry.decode(record) if isinstance(record, dict) else record
+                              for record in data['players']]
+    return decoded
+
+def encode_tournament(data: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON del torneo a partir del modelo (inverso de decode_tournament)"""
+    encoded = dict(data)
+    if isinstance(data.get('matches'), list):
+        encoded['matches'] = [match.encode() if isinstance(match, Match) else match for match in data['matches']]
+    if isinstance(data.get('players'), list):
+        encoded['players'] = [record.encode() if isinstance(record, RankingEntry) else record
+                              for record in data['players']]
+    return encoded
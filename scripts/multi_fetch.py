@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descarga concurrente de varios torneos de Cuescore
+
+Cada descarga se ejecuta en un hilo (asyncio.to_thread) sobre la misma
+requests.Session con un pool de conexiones, así que N torneos tardan
+aproximadamente lo mismo que uno más el presupuesto del rate limit.
+
+Todas las peticiones, incluidos los reintentos, pasan por un token bucket
+global: API_RATE_LIMIT_BURST peticiones seguidas y después una cada
+API_RATE_LIMIT_DELAY segundos. Los errores transitorios (red, 429, 5xx,
+cuerpos truncados) se reintentan hasta MAX_RETRIES veces con backoff
+exponencial con jitter o respetando Retry-After.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, Any, List, Callable
+
+import requests
+
+sys.path.append(os.path.dirname(__file__))
+from config import API_RATE_LIMIT_DELAY, API_RATE_LIMIT_BURST, MAX_RETRIES
+from cuescore_client import CuescoreClient, get_retry_delay
+import metrics
+
+class TokenBucket:
+    """Token bucket asíncrono: `rate` peticiones por segundo con ráfagas de `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+def build_rate_limiter() -> TokenBucket:
+    """Token bucket global a partir de la configuración (crear dentro del bucle de eventos)"""
+    rate = 1 / API_RATE_LIMIT_DELAY if API_RATE_LIMIT_DELAY > 0 else float("inf")
+    return TokenBucket(rate, max(1, API_RATE_LIMIT_BURST))
+
+async def fetch_with_retries(client: CuescoreClient, bucket: TokenBucket, tournament_id: str,
+                             conditional: bool = True, max_retries: int = MAX_RETRIES) -> Dict[str, Any]:
+    """
+    Descarga un torneo respetando el rate limit y reintentando los errores
+    transitorios. Devuelve el resultado de fetch_tournament o {} si falla.
+    """
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        await bucket.acquire()
+        metrics.add_time("rate_limit_wait", time.perf_counter() - started)
+        try:
+            return await asyncio.to_thread(client.fetch_tournament, tournament_id, conditional)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            delay = get_retry_delay(e, attempt) if attempt < max_retries else None
+            if delay is None:
+                print(f"[{tournament_id}] Error al descargar datos de Cuescore: {e}")
+                return {}
+            attempt += 1
+            print(f"[{tournament_id}] Error ({e}), reintento {attempt}/{max_retries} en {delay:.1f} s")
+            metrics.count("retries")
+            await asyncio.sleep(delay)
+
+async def fetch_tournaments(client: CuescoreClient, tournament_ids: List[str],
+                            on_result: Callable[[str, Dict[str, Any]], None],
+                            conditional: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Descarga todos los torneos a la vez y llama a on_result(id, resultado)
+    en cuanto termina cada uno, para fusionar mientras siguen las demás descargas.
+    Devuelve los resultados por ID.
+    """
+    bucket = build_rate_limiter()
+
+    async def fetch(tournament_id: str):
+        print(f"[{tournament_id}] Descargando datos de: {client.tournament_url(tournament_id)}")
+        return tournament_id, await fetch_with_retries(client, bucket, tournament_id, conditional)
+
+    results = {}
+    for future in asyncio.as_completed([fetch(tournament_id) for tournament_id in tournament_ids]):
+        tournament_id, result = await future
+        results[tournament_id] = result
+        on_result(tournament_id, result)
+    return results
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline incremental de los datos del visor
+
+Encadena los scripts como un grafo de etapas (STAGES) sobre un directorio de
+trabajo con la misma estructura que usan al ejecutarse a mano:
+
+    rankings  htmls-agp/*-individual.html -> jsons-agp/ (extract_ranking.py)
+    analysis  individual-lista-participantes.json + rankings
+              -> analisis_participantes_gallego.json (analyze_players.py)
+    extended  análisis + individual-match-data.json
+              -> tournament_extended.json y tournament.min.json (create_extended_tournament.py)
+    publish   jugadores y resumen nuevos en el torneo publicado (config.TOURNAMENT_FILE),
+              conservando las partidas ya publicadas (solo con --publish)
+    refresh   partidas de Cuescore (refresh_tournament.py, solo con --refresh)
+
+Cada etapa guarda en .cache/pipeline_state.json el hash SHA-256 de sus
+entradas (incluido el código de los scripts que la ejecutan) y de sus
+salidas, y no se ejecuta si nada ha cambiado. Los rankings se extraen por
+liga (solo los HTML modificados) y el análisis solo busca los participantes
+ya resueltos en las ligas cuyo ranking ha cambiado (ver resolve_participants).
+refresh no tiene huella: la petición condicional a Cuescore ya evita el
+trabajo cuando no hay cambios.
+
+    python scripts/pipeline.py --workdir tmp             # Solo lo que ha cambiado
+    python scripts/pipeline.py --workdir tmp --dry-run   # Qué se ejecutaría y por qué
+    python scripts/pipeline.py --workdir tmp --force     # Todo desde cero
+    python scripts/pipeline.py --workdir tmp --publish --refresh
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from graphlib import TopologicalSorter
+from typing import Dict, Any, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from config import TOURNAMENT_ID, TOURNAMENT_DB
+from json_io import load, write_json
+from extract_ranking import process_ranking_file, write_rankings_index, RANKINGS_INDEX_FILE
+from analyze_players import analyze_gallego_participants, is_ranking_file, OVERRIDES_FILE
+from create_extended_tournament import create_extended_tournament
+from tournament_store import open_store
+from models import decode_tournament, encode_tournament
+import metrics
+
+PIPELINE_STATE_FILE = os.path.join(".cache", "pipeline_state.json")
+PIPELINE_STATE_VERSION = 1
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Archivos del directorio de trabajo (los nombres que esperan los scripts)
+HTML_DIR = "htmls-agp"
+JSON_DIR = "jsons-agp"
+PARTICIPANTS_FILE = "individual-lista-participantes.json"
+ANALYSIS_FILE = "analisis_participantes_gallego.json"
+MATCH_DATA_FILE = "individual-match-data.json"
+EXTENDED_FILE = "tournament_extended.json"
+COMPACT_FILE = "tournament.min.json"
+
+# Etapa -> etapas de las que depende
+STAGES = {
+    "rankings": (),
+    "analysis": ("rankings",),
+    "extended": ("analysis",),
+    "publish": ("extended",),
+    "refresh": ("publish",),
+}
+DEFAULT_STAGES = ("rankings", "analysis", "extended")
+
+# Scripts de cada etapa: si cambian, la etapa se vuelve a ejecutar
+STAGE_CODE = {
+    "rankings": ("extract_ranking.py",),
+    "analysis": ("analyze_players.py", "batch_matcher.py"),
+    "extended": ("create_extended_tournament.py", "compact_tournament.py", "bracket.py"),
+    "publish": ("refresh_tournament.py", "publish_artifacts.py", "elo_ratings.py"),
+}
+
+# Datos AGP que publish copia al torneo publicado (las partidas son de refresh)
+PUBLISHED_AGP_KEYS = ("summary", "players")
+
+def file_hash(path: str) -> Optional[str]:
+    """SHA-256 del contenido de un archivo (None si no existe)"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def code_hash(stage: str) -> str:
+    """Hash conjunto de los scripts de una etapa"""
+    digest = hashlib.sha256()
+    for name in STAGE_CODE.get(stage, ()):
+        digest.update(f"{name}:{file_hash(os.path.join(SCRIPTS_DIR, name))}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+class StageError(Exception):
+    """Una etapa no se puede ejecutar (falta una entrada obligatoria)"""
+
+class Pipeline:
+    """Estado y etapas del pipeline sobre un directorio de trabajo"""
+
+    def __init__(self, workdir: str = ".", state_file: Optional[str] = None, force: bool = False,
+                 dry_run: bool = False, verbose: bool = False, workers: Optional[int] = None,
+                 store=None):
+        self.workdir = workdir
+        self.state_file = state_file or os.path.join(workdir, PIPELINE_STATE_FILE)
+        self.force = force
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.workers = workers
+        self.store = store
+        self.state = self._load_state()
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.workdir, *parts)
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            state = load(self.state_file)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("version") != PIPELINE_STATE_VERSION:
+            state = {"version": PIPELINE_STATE_VERSION, "stages": {}, "leagues": {}}
+        return state
+
+    def save_state(self):
+        if not self.dry_run:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            write_json(self.state_file, self.state)
+
+    @contextlib.contextmanager
+    def _in_workdir(self):
+        # Los scripts leen y escriben en el directorio actual; su salida solo con --verbose
+        previous = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            if self.verbose:
+                yield
+            else:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    yield
+        finally:
+            os.chdir(previous)
+
+    # Huellas de cada etapa
+
+    def html_files(self) -> List[str]:
+        directory = self.path(HTML_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith("-individual.html")]
+
+    def ranking_files(self) -> List[str]:
+        directory = self.path(JSON_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if is_ranking_file(name)]
+
+    def _fingerprint(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        return {os.path.relpath(path, self.workdir): file_hash(path) for path in paths}
+
+    def stage_inputs(self, stage: str) -> Dict[str, Optional[str]]:
+        """Hash de las entradas de una etapa (rutas relativas al directorio de trabajo)"""
+        if stage == "rankings":
+            paths = self.html_files()
+        elif stage == "analysis":
+            paths = [self.path(PARTICIPANTS_FILE), self.path(OVERRIDES_FILE)] + self.ranking_files()
+        elif stage == "extended":
+            paths = [self.path(ANALYSIS_FILE), self.path(MATCH_DATA_FILE)]
+        elif stage == "publish":
+            paths = [self.path(EXTENDED_FILE)]
+        else:
+            return {}
+        inputs = self._fingerprint(paths)
+        inputs["code"] = code_hash(stage)
+        return inputs
+
+    def stage_outputs(self, stage: str) -> Dict[str, Optional[str]]:
+        """Hash de las salidas de una etapa (las que publish escribe cambian con cada refresh)"""
+        if stage == "rankings":
+            paths = self.ranking_files() + [self.path(JSON_DIR, RANKINGS_INDEX_FILE)]
+        elif stage == "analysis":
+            paths = [self.path(ANALYSIS_FILE)]
+        elif stage == "extended":
+            paths = [self.path(EXTENDED_FILE), self.path(COMPACT_FILE)]
+        else:
+            return {}
+        return self._fingerprint(paths)
+
+    def changes(self, stage: str) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """
+        Entradas actuales de la etapa y motivos para ejecutarla
+        (lista vacía si está al día)
+        """
+        if stage == "refresh":
+            return {}, ["consulta condicional a Cuescore"]
+        inputs = self.stage_inputs(stage)
+        record = self.state["stages"].get(stage)
+        if self.force:
+            return inputs, ["--force"]
+        if record is None:
+            return inputs, ["sin ejecuciones anteriores"]
+        reasons = [f"cambia {path}" for path in sorted(set(inputs) | set(record["inputs"]))
+                   if inputs.get(path) != record["inputs"].get(path)]
+        reasons += [f"modificado {path}" for path, digest in record["outputs"].items()
+                    if file_hash(self.path(path)) != digest]
+        return inputs, reasons
+
+    # Etapas
+
+    def run_rankings(self) -> str:
+        """Extrae solo las ligas cuyo HTML (o el extractor) ha cambiado"""
+        html_files = self.html_files()
+        if not html_files:
+            if self.ranking_files():
+                return f"sin HTML en {self.path(HTML_DIR)}: se usan los rankings de {self.path(JSON_DIR)}"
+            raise StageError(f"no hay archivos *-individual.html en {self.path(HTML_DIR)}")
+        leagues = self.state["leagues"]
+        code = code_hash("rankings")
+
+        pending = []
+        for html_file in html_files:
+            record = leagues.get(os.path.basename(html_file))
+            if (self.force or record is None or record["html"] != file_hash(html_file) or record["code"] != code
+                    or file_hash(self.path(record["json"])) != record["json_hash"]):
+                pending.append(html_file)
+        names = {os.path.basename(html_file) for html_file in html_files}
+        removed = [name for name in leagues if name not in names]
+        if self.dry_run:
+            return f"{len(pending)} ligas por extraer, {len(removed)} eliminadas"
+
+        output_dir = self.path(JSON_DIR)
+        os.makedirs(output_dir, exist_ok=True)
+        if len(pending) > 1 and (self.workers or os.cpu_count() or 1) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(process_ranking_file, pending, [output_dir] * len(pending)))
+        else:
+            results = [process_ranking_file(html_file, output_dir) for html_file in pending]
+
+        for html_file, result in zip(pending, results):
+            json_file = os.path.join(JSON_DIR, result["json"])
+            leagues[os.path.basename(html_file)] = {
+                "html": file_hash(html_file),
+                "code": code,
+                "json": json_file,
+                "json_hash": file_hash(self.path(json_file)),
+                "result": result,
+            }
+            if self.store is not None:
+                self.store.upsert_ranking(result["liga"], load(self.path(json_file)))
+        for name in removed:
+            # El JSON de una liga cuyo HTML ya no existe lo generó el pipeline: se elimina
+            json_file = self.path(leagues.pop(name)["json"])
+            if os.path.exists(json_file):
+                os.remove(json_file)
+
+        if pending or removed or not os.path.exists(self.path(JSON_DIR, RANKINGS_INDEX_FILE)):
+            write_rankings_index([leagues[name]["result"] for name in sorted(leagues)], output_dir)
+        metrics.count("leagues_extracted", len(pending))
+        return (f"{len(pending)} ligas extraídas{': ' + ', '.join(result['liga'] for result in results) if results else ''}"
+                f", {len(html_files) - len(pending)} sin cambios, {len(removed)} eliminadas")
+
+    def run_analysis(self) -> str:
+        for required in (PARTICIPANTS_FILE,):
+            if not os.path.exists(self.path(required)):
+                raise StageError(f"falta {self.path(required)}")
+        if not self.ranking_files():
+            raise StageError(f"no hay rankings en {self.path(JSON_DIR)}")
+        with self._in_workdir():
+            analyze_gallego_participants(store=self.store)
+        return f"{len(load(self.path(ANALYSIS_FILE)))} participantes analizados"
+
+    def run_extended(self) -> str:
+        for required in (ANALYSIS_FILE, MATCH_DATA_FILE):
+            if not os.path.exists(self.path(required)):
+                raise StageError(f"falta {self.path(required)}")
+        with self._in_workdir():
+            extended = create_extended_tournament(self.store, TOURNAMENT_ID)
+        if not extended:
+            raise StageError("no se pudo generar el torneo extendido")
+        return f"{len(extended['matches'])} partidas"
+
+    def run_publish(self) -> str:
+        """Publica los datos AGP nuevos sin tocar las partidas que ya mantiene refresh"""
+        if not os.path.exists(self.path(EXTENDED_FILE)):
+            raise StageError(f"falta {self.path(EXTENDED_FILE)}")
+        from atomic_io import publish_lock
+        from refresh_tournament import (get_tournament_target, load_existing_data,
+                                        save_merged_data, record_snapshot)
+        target = get_tournament_target(TOURNAMENT_ID)
+        extended = decode_tournament(load(self.path(EXTENDED_FILE)))
+        with publish_lock(target["data_dir"]):
+            published = load_existing_data(target["file"]) if os.path.exists(target["file"]) else {}
+            data = build_published_data(extended, published)
+            encoded = encode_tournament(data)
+            if not save_merged_data(data, target, encoded=encoded):
+                raise StageError(f"no se pudo publicar {target['file']}")
+            record_snapshot(encoded, encode_tournament(published), target["journal_dir"])
+            if self.store is not None:
+                self.store.upsert_tournament(TOURNAMENT_ID, encoded)
+        return target["file"]
+
+    def run_refresh(self) -> str:
+        from cuescore_client import CuescoreClient
+        from refresh_tournament import refresh_once
+        client = CuescoreClient()
+        try:
+            outcome = refresh_once(client, store=self.store)
+        finally:
+            client.close()
+        if outcome["status"] == "error":
+            raise StageError("no se pudo actualizar desde Cuescore")
+        return f"{outcome['status']} ({outcome['changes']} partidas)"
+
+    def run(self, stages: List[str]) -> bool:
+        """
+        Ejecuta las etapas pedidas en orden de dependencias, saltando las
+        que están al día. Devuelve False si alguna falla.
+        """
+        graph = {stage: [dep for dep in STAGES[stage] if dep in stages] for stage in stages}
+        failed = set()
+        executed = set()
+        for stage in TopologicalSorter(graph).static_order():
+            blocked = [dep for dep in graph[stage] if dep in failed]
+            if blocked:
+                print(f"⏭️  {stage}: no se ejecuta porque ha fallado {', '.join(blocked)}")
+                failed.add(stage)
+                continue
+
+            inputs, reasons = self.changes(stage)
+            if self.dry_run and not reasons:
+                # Sin ejecutar las etapas anteriores no se sabe si cambiarán sus salidas
+                reasons = [f"puede cambiar tras {dep}" for dep in graph[stage] if dep in executed]
+            if not reasons:
+                print(f"✅ {stage}: al día")
+                continue
+            print(f"🔄 {stage}: {'; '.join(reasons[:3])}{' ...' if len(reasons) > 3 else ''}")
+            if self.dry_run and stage != "rankings":
+                executed.add(stage)
+                continue
+
+            started = time.perf_counter()
+            try:
+                with metrics.stage(stage):
+                    summary = getattr(self, f"run_{stage}")()
+            except StageError as e:
+                print(f"❌ {stage}: {e}")
+                failed.add(stage)
+                continue
+            elapsed = time.perf_counter() - started
+            executed.add(stage)
+            print(f"   {summary + ' ' if summary else ''}({elapsed:.2f} s)")
+
+            if stage != "refresh" and not self.dry_run:
+                self.state["stages"][stage] = {
+                    "inputs": inputs,
+                    "outputs": self.stage_outputs(stage),
+                    "finished": datetime.now().isoformat(timespec="seconds"),
+                    "seconds": round(elapsed, 3),
+                }
+                self.save_state()
+        return not failed
+
+def build_published_data(extended: Dict[str, Any], published: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Torneo publicado con los jugadores y el resumen del torneo extendido.
+    Las partidas (y sus fechas) se conservan: las mantiene refresh_tournament.py.
+    """
+    if not published:
+        return extended
+    data = dict(published)
+    for key in PUBLISHED_AGP_KEYS:
+        if key in extended:
+            data[key] = extended[key]
+    return data
+
+def selected_stages(args) -> List[str]:
+    stages = list(args.stages or DEFAULT_STAGES)
+    if args.publish and "publish" not in stages:
+        stages.append("publish")
+    if args.refresh and "refresh" not in stages:
+        stages.append("refresh")
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los datos del visor ejecutando solo las etapas con cambios")
+    parser.add_argument("--workdir", default=".", help="Directorio con htmls-agp, jsons-agp y los JSON del torneo")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None,
+                        help=f"Etapas a ejecutar (por defecto {' '.join(DEFAULT_STAGES)})")
+    parser.add_argument("--publish", action="store_true", help="Publica los jugadores y el resumen en config.TOURNAMENT_FILE")
+    parser.add_argument("--refresh", action="store_true", help="Actualiza después las partidas desde Cuescore")
+    parser.add_argument("--force", action="store_true", help="Ejecuta todas las etapas aunque no haya cambios")
+    parser.add_argument("--dry-run", action="store_true", help="Solo muestra qué etapas se ejecutarían y por qué")
+    parser.add_argument("--state", default=None, help=f"Archivo de estado (por defecto <workdir>/{PIPELINE_STATE_FILE})")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para extraer rankings")
+    parser.add_argument("--db", default=TOURNAMENT_DB, help="Base de datos SQLite que se actualiza en cada etapa")
+    parser.add_argument("--metrics", action="store_true", help="Guarda las métricas de la ejecución en config.METRICS_DIR")
+    parser.add_argument("--verbose", action="store_true", help="Muestra la salida de cada script")
+    args = parser.parse_args()
+
+    if args.metrics:
+        from config import METRICS_DIR, METRICS_KEEP
+        metrics.configure(METRICS_DIR, keep=METRICS_KEEP)
+
+    stages = selected_stages(args)
+    print(f"🏗️  Pipeline en {os.path.abspath(args.workdir)}: {', '.join(stages)}{' (simulación)' if args.dry_run else ''}")
+    store = None if args.dry_run else open_store(args.db)
+    started = time.perf_counter()
+    try:
+        with metrics.run("pipeline"):
+            pipeline = Pipeline(args.workdir, args.state, force=args.force, dry_run=args.dry_run,
+                                verbose=args.verbose, workers=args.workers, store=store)
+            ok = pipeline.run(stages)
+            metrics.set_status("ok" if ok else "error")
+    finally:
+        if store is not None:
+            store.close()
+    print(f"{'🏁' if ok else '❌'} Pipeline {'completado' if ok else 'con errores'} en {time.perf_counter() - started:.2f} s")
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publicación de los datos del visor como artefactos inmutables
+
+Además de tournament.min.json se escribe una copia con el hash del contenido en
+el nombre (tournament.<sha>.json), sus versiones precomprimidas .gz y .br, y un
+manifest.json pequeño que apunta al artefacto actual. El visor solo consulta el
+manifest y descarga el artefacto cuando cambia el hash.
+
+También se publica un artefacto "core" (todo salvo las partidas), las partidas
+divididas en shards por ronda (ver match_shards.py), una ficha por jugador
+(data/players/<id>.json) y el índice de búsqueda (search.<sha>.json, ver
+search_index.py) para la carga diferida.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+sys.path.append(os.path.dirname(__file__))
+from compact_tournament import build_compact_tournament, serialize_compact_tournament
+from bracket import BracketGraph
+from create_extended_tournament import build_player_details, build_player_index, write_player_files
+from search_index import build_search_index
+from match_shards import publish_match_shards
+from atomic_io import atomic_write_bytes
+from elo_ratings import load_published_ratings
+from models import decode_tournament
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 16  # Caracteres del sha256 usados en el nombre del archivo
+KEEP_ARTIFACTS = 3  # Artefactos anteriores que se conservan para lectores en curso (historial del manifest)
+
+# Campos de los datos que se copian al manifest para no descargar el artefacto
+MANIFEST_DATA_FIELDS = ("last_updated", "tournament_start_date", "tournament_end_date")
+
+def content_hash(content: bytes) -> str:
+    """Calcula el sha256 del contenido"""
+    return hashlib.sha256(content).hexdigest()
+
+def _write_if_missing(path: str, content: bytes) -> bool:
+    """Escribe el archivo si no existe (los artefactos con hash son inmutables)"""
+    if os.path.exists(path):
+        return False
+    return atomic_write_bytes(path, content, skip_unchanged=False)
+
+def write_compressed_siblings(path: str, content: bytes) -> Dict[str, str]:
+    """
+    Escribe las versiones .gz y .br (si brotli está instalado) junto al archivo.
+    Devuelve los nombres de archivo por codificación.
+    """
+    encodings = {}
+
+    # mtime=0 para que el .gz sea reproducible a partir del mismo contenido
+    _write_if_missing(path + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+    encodings["gzip"] = os.path.basename(path) + ".gz"
+
+    if brotli is not None:
+        _write_if_missing(path + ".br", brotli.compress(content, quality=11))
+        encodings["br"] = os.path.basename(path) + ".br"
+
+    return encodings
+
+def publish_hashed_artifact(content: bytes, output_dir: str, prefix: str) -> Dict[str, Any]:
+    """
+    Publica el contenido como <prefix>.<sha>.json con sus versiones comprimidas.
+    Devuelve la entrada del manifest para el artefacto.
+    """
+    digest = content_hash(content)
+    filename = f"{prefix}.{digest[:HASH_LENGTH]}.json"
+    path = os.path.join(output_dir, filename)
+
+    os.makedirs(output_dir, exist_ok=True)
+    _write_if_missing(path, content)
+
+    return {
+        "file": filename,
+        "sha256": digest,
+        "bytes": len(content),
+        "encodings": write_compressed_siblings(path, content),
+    }
+
+def artifact_history(previous_manifest: Optional[Dict[str, Any]], kind: str, current_file: str,
+                     keep: int = KEEP_ARTIFACTS) -> List[str]:
+    """
+    Nombres de los artefactos de un tipo que se conservan, del actual al más
+    antiguo: el actual y los `keep` anteriores según el historial del manifest
+    anterior (las fechas de los archivos no sirven: actions/checkout las iguala)
+    """
+    previous: List[str] = []
+    if previous_manifest:
+        previous = list((previous_manifest.get("history") or {}).get(kind) or [])
+        if not previous:
+            # Manifest anterior sin historial: solo se conoce su artefacto actual
+            previous_artifact = (previous_manifest.get("artifacts") or {}).get(kind) or {}
+            previous = [previous_artifact["file"]] if previous_artifact.get("file") else []
+    history = [current_file]
+    for filename in previous:
+        if filename not in history:
+            history.append(filename)
+    return history[:keep + 1]
+
+def prune_old_artifacts(output_dir: str, prefix: str, history: List[str]) -> List[str]:
+    """
+    Elimina los artefactos con hash de un prefijo que no están en el historial
+    del manifest (el actual y los anteriores que aún pueden usar los lectores)
+    """
+    removed = []
+    for filename in sorted(os.listdir(output_dir)):
+        if not (filename.startswith(prefix + ".") and filename.endswith(".json")) or filename in history:
+            continue
+        parts = filename.split(".")
+        if len(parts) != 3 or len(parts[1]) != HASH_LENGTH:
+            continue
+        for suffix in ("", ".gz", ".br"):
+            path = os.path.join(output_dir, filename + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        removed.append(filename)
+    return removed
+
+def load_manifest(output_dir: str) -> Optional[Dict[str, Any]]:
+    """Carga el manifest actual si existe"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def write_manifest(output_dir: str, manifest: Dict[str, Any]) -> bool:
+    """Escribe el manifest solo si su contenido ha cambiado"""
+    if load_manifest(output_dir) == manifest:
+        return False
+    content = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return atomic_write_bytes(os.path.join(output_dir, MANIFEST_NAME), content, skip_unchanged=False)
+
+def publish_tournament_artifacts(extended_data: Dict[str, Any], output_dir: str,
+                                 compact_file: str, bracket: Optional[BracketGraph] = None,
+                                 ratings: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Genera el formato compacto a partir del modelo del torneo (ver
+    models.decode_tournament) y publica tournament.min.json, los artefactos con
+    hash (completo y core), sus versiones comprimidas, los shards de partidas,
+    las fichas por jugador y el manifest. Devuelve el manifest. ratings es el
+    rating Elo de cada jugador (ver elo_ratings.py), que va en su ficha y en la
+    tabla de jugadores.
+    """
+    # Fichas por jugador primero: la tabla compacta incluye su versión
+    player_details = build_player_details(extended_data.get("matches", []), extended_data.get("players", []),
+                                          ratings)
+    player_versions = write_player_files(player_details, output_dir)
+
+    compact_data = build_compact_tournament(
+        extended_data, bracket, build_player_index(player_details, player_versions)
+    )
+    content = serialize_compact_tournament(compact_data).encode("utf-8")
+
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write_bytes(compact_file, content)
+
+    artifact = publish_hashed_artifact(content, output_dir, "tournament")
+
+    # Core: todo salvo las partidas, que se cargan por shards
+    core_data = {key: value for key, value in compact_data.items() if key != "matches"}
+    core_content = serialize_compact_tournament(core_data).encode("utf-8")
+    core_artifact = publish_hashed_artifact(core_content, output_dir, "core")
+
+    # Índice de búsqueda de los filtros, se descarga con la primera búsqueda
+    search_content = serialize_compact_tournament(build_search_index(compact_data)).encode("utf-8")
+    search_artifact = publish_hashed_artifact(search_content, output_dir, "search")
+
+    shards = publish_match_shards(compact_data, output_dir)
+
+    artifacts = {"tournament": artifact, "core": core_artifact, "search": search_artifact}
+    previous_manifest = load_manifest(output_dir)
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "current": artifact["file"],
+        "artifacts": artifacts,
+        "shards": shards,
+        # Artefactos que se conservan, del actual al más antiguo
+        "history": {kind: artifact_history(previous_manifest, kind, entry["file"])
+                    for kind, entry in artifacts.items()},
+    }
+    for field in MANIFEST_DATA_FIELDS:
+        manifest[field] = extended_data.get(field)
+
+    # El manifest se escribe el último: apunta a artefactos que ya están completos
+    if write_manifest(output_dir, manifest):
+        print(f"Manifest actualizado: {artifact['file']} ({artifact['bytes']} bytes)")
+        removed = []
+        for kind, history in manifest["history"].items():
+            removed += prune_old_artifacts(output_dir, kind, history)
+        if removed:
+            print(f"Artefactos antiguos eliminados: {len(removed)}")
+    else:
+        print("Manifest sin cambios")
+
+    return manifest
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python publish_artifacts.py <tournament_extended.json> [directorio_salida]")
+        return
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        extended_data = decode_tournament(json.load(f))
+
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else (os.path.dirname(sys.argv[1]) or ".")
+    manifest = publish_tournament_artifacts(
+        extended_data, output_dir, os.path.join(output_dir, "tournament.min.json"),
+        ratings=load_published_ratings()
+    )
+    print(f"✅ Artefacto actual: {manifest['current']}")
+    if brotli is None:
+        print("ℹ️  brotli no está instalado, solo se genera la versión .gz")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador adaptativo del modo daemon de refresh_tournament.py
+
+Elige el intervalo hasta la siguiente consulta a Cuescore según el estado del
+torneo:
+  - partidas en juego (`playing`): intervalo mínimo
+  - partidas en espera dentro del horario del torneo: intervalo activo
+  - antes del inicio: se espera hasta la hora de inicio (como mucho el intervalo inactivo)
+  - torneo terminado o fuera de horario: intervalo inactivo
+Si las últimas consultas no traen cambios el intervalo se alarga
+progresivamente, y tras un error se espera con backoff exponencial con jitter.
+El daemon se detiene cuando el torneo ha terminado y varias consultas
+seguidas no traen cambios.
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List, Optional
+
+sys.path.append(os.path.dirname(__file__))
+from config import (
+    DAEMON_LIVE_INTERVAL_SECONDS, DAEMON_ACTIVE_INTERVAL_SECONDS, DAEMON_IDLE_INTERVAL_SECONDS,
+    DAEMON_MAX_BACKOFF_SECONDS, DAEMON_QUIET_BACKOFF_FACTOR, DAEMON_STABLE_POLLS
+)
+from models import Match
+
+# Consultas recientes que se tienen en cuenta para la tasa de cambios
+CHANGE_HISTORY = 5
+
+# Las fechas sin zona horaria se interpretan en hora de Madrid (como is_tournament_finished)
+DEFAULT_TIMEZONE = timezone(timedelta(hours=1))
+
+def parse_tournament_time(value: str) -> Optional[datetime]:
+    """Convierte una fecha de la API de Cuescore en datetime con zona horaria"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=DEFAULT_TIMEZONE)
+    return parsed
+
+def count_match_statuses(matches: List[Match]) -> Dict[str, int]:
+    """Cuenta las partidas por matchstatus (playing, waiting, finished...)"""
+    counts: Dict[str, int] = {}
+    for match in matches:
+        status = match.status or "unknown"
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+def is_event_finished(data: Dict[str, Any], now: datetime) -> bool:
+    """
+    El torneo ha terminado si ya pasó la fecha de fin o si todas las partidas
+    están terminadas
+    """
+    end = parse_tournament_time(data.get("tournament_end_date", ""))
+    if end is not None and now > end:
+        return True
+
+    counts = count_match_statuses(data.get("matches", []))
+    return bool(counts) and set(counts) == {"finished"}
+
+class RefreshScheduler:
+    """Estado del daemon: últimos datos, historial de cambios y errores consecutivos"""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self.data: Dict[str, Any] = {}
+        self.changes: List[int] = []
+        self.errors = 0
+        self.stable_polls = 0
+        self.reason = ""
+
+    def record_success(self, data: Dict[str, Any], changes: int, now: Optional[datetime] = None):
+        """Registra una consulta correcta con el número de partidas que han cambiado"""
+        now = now or datetime.now(timezone.utc)
+        self.data = data or self.data
+        self.errors = 0
+        self.changes = (self.changes + [changes])[-CHANGE_HISTORY:]
+
+        if changes == 0 and is_event_finished(self.data, now):
+            self.stable_polls += 1
+        else:
+            self.stable_polls = 0
+
+    def record_error(self):
+        """Registra una consulta fallida"""
+        self.errors += 1
+
+    def should_stop(self) -> bool:
+        """El torneo ha terminado y varias consultas seguidas no traen cambios"""
+        return self.stable_polls >= DAEMON_STABLE_POLLS
+
+    def quiet_polls(self) -> int:
+        """Consultas consecutivas más recientes sin cambios"""
+        quiet = 0
+        for changes in reversed(self.changes):
+            if changes:
+                break
+            quiet += 1
+        return quiet
+
+    def base_interval(self, now: datetime) -> float:
+        """Intervalo según el estado del torneo (sin tener en cuenta la tasa de cambios)"""
+        if is_event_finished(self.data, now):
+            self.reason = "torneo terminado"
+            return DAEMON_IDLE_INTERVAL_SECONDS
+
+        counts = count_match_statuses(self.data.get("matches", []))
+        if counts.get("playing"):
+            self.reason = f"{counts['playing']} partidas en juego"
+            return DAEMON_LIVE_INTERVAL_SECONDS
+
+        start = parse_tournament_time(self.data.get("tournament_start_date", ""))
+        if start is not None and now < start:
+            self.reason = "antes del inicio del torneo"
+            seconds_to_start = (start - now).total_seconds()
+            return min(DAEMON_IDLE_INTERVAL_SECONDS, max(DAEMON_LIVE_INTERVAL_SECONDS, seconds_to_start))
+
+        if counts.get("waiting"):
+            self.reason = f"{counts['waiting']} partidas en espera"
+            return DAEMON_ACTIVE_INTERVAL_SECONDS
+
+        self.reason = "sin partidas pendientes"
+        return DAEMON_IDLE_INTERVAL_SECONDS
+
+    def next_interval(self, now: Optional[datetime] = None) -> float:
+        """Segundos hasta la siguiente consulta"""
+        now = now or datetime.now(timezone.utc)
+
+        if self.errors:
+            # Backoff exponencial con jitter para no sincronizar reintentos
+            backoff = min(DAEMON_MAX_BACKOFF_SECONDS, DAEMON_LIVE_INTERVAL_SECONDS * 2 ** (self.errors - 1))
+            self.reason = f"{self.errors} errores seguidos"
+            return self.rng.uniform(backoff / 2, backoff)
+
+        interval = self.base_interval(now)
+
+        # Sin cambios recientes se consulta cada vez menos, hasta el intervalo inactivo
+        quiet = self.quiet_polls()
+        if quiet > 1 and interval < DAEMON_IDLE_INTERVAL_SECONDS:
+            interval = min(DAEMON_IDLE_INTERVAL_SECONDS, interval * DAEMON_QUIET_BACKOFF_FACTOR ** (quiet - 1))
+            self.reason += f", {quiet} consultas sin cambios"
+
+        return interval
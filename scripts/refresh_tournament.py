@@ -4,61 +4,207 @@ Script para actualizar datos del torneo desde Cuescore
 Mantiene los datos de AGP y actualiza solo partidas y resultados
 """
 
-import json
+import argparse
+import asyncio
+from contextlib import ExitStack
 import requests
 import os
+import sqlite3
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 # Importar configuración
 import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 from config import *
+from publish_artifacts import publish_tournament_artifacts
+from cuescore_client import CuescoreClient
+from multi_fetch import fetch_tournaments
+from snapshot_journal import SnapshotJournal
+from atomic_io import publish_lock
+from json_io import load, write_json, get_backend
+import metrics
+from bracket import BracketGraph
+from elo_ratings import EloRatings
+from models import Match, Player, PlayerTable, decode_matches, decode_tournament, encode_tournament
+from tournament_store import TournamentStore, open_store
+from refresh_scheduler import RefreshScheduler, count_match_statuses, parse_tournament_time
 
-def load_existing_data() -> Dict[str, Any]:
-    """Carga los datos existentes del torneo"""
+def get_tournament_target(tournament_id: str = TOURNAMENT_ID) -> Dict[str, str]:
+    """Archivos de un torneo configurado en TOURNAMENTS"""
+    if tournament_id not in TOURNAMENTS:
+        raise KeyError(f"Torneo no configurado en TOURNAMENTS: {tournament_id}")
+    return TOURNAMENTS[tournament_id]
+
+def load_existing_data(tournament_file: str = TOURNAMENT_FILE) -> Dict[str, Any]:
+    """Carga los datos existentes del torneo como modelo (ver models.decode_tournament)"""
     try:
-        with open(TOURNAMENT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return decode_tournament(load(tournament_file))
     except FileNotFoundError:
-        print(f"Error: No se encontró el archivo {TOURNAMENT_FILE}")
+        print(f"Error: No se encontró el archivo {tournament_file}")
         return {}
 
-def backup_current_data():
-    """Crea una copia de seguridad de los datos actuales"""
-    if os.path.exists(TOURNAMENT_FILE):
-        import shutil
-        shutil.copy2(TOURNAMENT_FILE, BACKUP_FILE)
-        print(f"Backup creado: {BACKUP_FILE}")
+def record_snapshot(data: Dict[str, Any], previous_data: Dict[str, Any], journal_dir: str = JOURNAL_DIR):
+    """
+    Añade la versión guardada al historial (delta respecto a la anterior).
+    Los datos van en formato JSON (ver models.encode_tournament).
+    """
+    try:
+        entry = SnapshotJournal(journal_dir).append(data, previous_data)
+        changes = ", ".join(f"{key}: {count}" for key, count in entry["changes"].items())
+        print(f"Historial: versión {entry['seq']} ({entry['type']}{', ' + changes if changes else ''})")
+    except (OSError, ValueError) as e:
+        print(f"Error al guardar el historial: {e}")
 
-def fetch_cuescore_data() -> Dict[str, Any]:
-    """Descarga datos actualizados de Cuescore"""
+def fetch_tournament_update(client: CuescoreClient, conditional: bool = True,
+                            tournament_id: str = TOURNAMENT_ID) -> Dict[str, Any]:
+    """
+    Descarga los datos del torneo con una petición condicional,
+    reintentando los errores transitorios hasta MAX_RETRIES veces.
+    Devuelve el resultado de CuescoreClient.fetch_tournament o {} si falla.
+    """
     try:
-        # URL del torneo específico
-        url = f"{CUESCORE_API_URL}/?id={TOURNAMENT_ID}"
-        
-        headers = REQUEST_HEADERS
-        
-        print(f"Descargando datos de: {url}")
+        print(f"Descargando datos de: {client.tournament_url(tournament_id)}")
+        result = client.fetch_tournament_with_retries(tournament_id, conditional=conditional)
+        if result["not_modified"]:
+            print(f"Datos sin cambios en Cuescore (HTTP {result['status']})")
+        else:
+            print(f"Datos descargados exitosamente")
+        return result
         
-        # Rate limiting: esperar 2 segundos entre peticiones
-        import time
-        time.sleep(2)
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        print(f"Datos descargados exitosamente")
-        return data
-        
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error al descargar datos de Cuescore: {e}")
         return {}
 
-def merge_tournament_data(cuescore_data: Dict[str, Any], existing_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Fusiona datos de Cuescore con datos AGP existentes"""
+def fetch_cuescore_data() -> Dict[str, Any]:
+    """Descarga datos actualizados de Cuescore"""
+    client = CuescoreClient()
+    try:
+        result = fetch_tournament_update(client)
+        return result.get("data") or {}
+    finally:
+        client.close()
+
+def _match_version(match: Match) -> int:
+    """Devuelve el curVersion de una partida (0 si no está disponible)"""
+    try:
+        return int(match.cur_version or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def index_matches(matches: List[Match]) -> Dict[Any, int]:
+    """Crea un índice matchId -> posición en la lista de partidas"""
+    return {match.match_id: position for position, match in enumerate(matches)}
+
+def _without_ranking_info(player: Any) -> Any:
+    if isinstance(player, Player):
+        return {key: value for key, value in player.items() if key != "ranking_info"}
+    return player
+
+def match_content_changed(existing_match: Match, new_match: Match) -> bool:
+    """
+    Indica si una partida ha cambiado sin contar curVersion (Cuescore lo
+    comparte en todo el torneo) ni el ranking_info añadido por el pipeline AGP
+    """
+    new_layout, old_layout = new_match.layout, existing_match.layout
+    if new_layout is old_layout:
+        pairs = zip(new_layout.keys, new_match.values(), existing_match.values())
+    elif new_layout.key_set - {"curVersion"} != old_layout.key_set - {"curVersion"}:
+        return True
+    else:
+        pairs = ((key, new_match.value(key), existing_match.value(key)) for key in new_layout.keys)
+    for key, new_value, old_value in pairs:
+        # Los jugadores sin cambios son la misma instancia compartida
+        if new_value is old_value or key == "curVersion":
+            continue
+        if key in ("playerA", "playerB"):
+            new_value, old_value = _without_ranking_info(new_value), _without_ranking_info(old_value)
+        if new_value != old_value:
+            return True
+    return False
+
+def compute_match_delta(existing_matches: List[Match], new_matches: List[Match]) -> Dict[str, List[Any]]:
+    """
+    Compara las partidas existentes con las de Cuescore usando matchId y curVersion.
+    Devuelve los IDs de partidas añadidas, modificadas y eliminadas. Como el
+    curVersion sube en todas las partidas con cualquier cambio del torneo, solo
+    cuentan como modificadas las de curVersion mayor cuyo contenido ha cambiado.
+    """
+    existing_index = index_matches(existing_matches)
+    added, changed = [], []
+    seen = set()
+
+    for match in new_matches:
+        match_id = match.match_id
+        seen.add(match_id)
+        position = existing_index.get(match_id)
+        if position is None:
+            added.append(match_id)
+        elif (_match_version(match) > _match_version(existing_matches[position])
+              and match_content_changed(existing_matches[position], match)):
+            changed.append(match_id)
+
+    removed = [match_id for match_id in existing_index if match_id not in seen]
+
+    return {"added": added, "changed": changed, "removed": removed}
+
+def _carry_ranking_info(old_match: Match, new_match: Match, players: PlayerTable):
+    """Conserva el ranking_info AGP de una partida si el jugador no ha cambiado"""
+    for side in ("A", "B"):
+        old_player, new_player = old_match.player(side), new_match.player(side)
+        if (old_player is not None and new_player is not None
+                and "ranking_info" in old_player.layout.key_set and "ranking_info" not in new_player.layout.key_set
+                and old_player.player_id == new_player.player_id):
+            new_match.set_player(side, players.with_ranking_info(new_player, old_player.ranking_info))
+
+def apply_match_delta(existing_matches: List[Match], new_matches: List[Match],
+                      delta: Dict[str, List[Any]], players: PlayerTable) -> List[Match]:
+    """
+    Aplica el delta sobre las partidas existentes.
+    Solo se sustituyen las partidas añadidas o modificadas; el resto se reutiliza tal cual.
+    Se respeta el orden de partidas de Cuescore. players es la tabla con la
+    que se han decodificado las partidas nuevas.
+    """
+    existing_index = index_matches(existing_matches)
+    updated_ids = set(delta["added"]) | set(delta["changed"])
+
+    matches = []
+    for match in new_matches:
+        match_id = match.match_id
+        position = existing_index.get(match_id)
+        if match_id in updated_ids or position is None:
+            if position is not None:
+                _carry_ranking_info(existing_matches[position], match, players)
+            matches.append(match)
+        else:
+            matches.append(existing_matches[position])
+
+    return matches
+
+def has_match_changes(delta: Dict[str, List[Any]]) -> bool:
+    """Indica si un delta de partidas contiene algún cambio"""
+    return bool(delta.get("added") or delta.get("changed") or delta.get("removed"))
+
+def has_data_changes(merged_data: Dict[str, Any], existing_data: Dict[str, Any]) -> bool:
+    """Indica si los datos fusionados en modo delta difieren de los existentes"""
+    if has_match_changes(merged_data.get("match_delta", {})):
+        return True
+    date_keys = ("tournament_start_date", "tournament_end_date", "tournament_display_date")
+    return any(merged_data.get(key) != existing_data.get(key) for key in date_keys)
+
+def merge_tournament_data(cuescore_data: Dict[str, Any], existing_data: Dict[str, Any],
+                          delta: bool = False) -> Dict[str, Any]:
+    """
+    Fusiona datos de Cuescore (JSON de la API) con datos AGP existentes (modelo,
+    ver load_existing_data). Las partidas de Cuescore se decodifican
+    compartiendo los Player de las partidas existentes.
+
+    En modo delta solo se aplican las partidas cuyo curVersion ha aumentado y
+    cuyo contenido ha cambiado, y el resultado incluye "match_delta" con los matchId añadidos, modificados y eliminados.
+    Si no hay cambios se conserva el last_updated anterior.
+    """
     
     if not cuescore_data:
         print("No hay datos de Cuescore para fusionar")
@@ -66,7 +212,7 @@ def merge_tournament_data(cuescore_data: Dict[str, Any], existing_data: Dict[str
     
     if not existing_data:
         print("No hay datos existentes para fusionar")
-        return cuescore_data
+        return decode_tournament(cuescore_data)
     
     # Extraer fechas del torneo desde la API de Cuescore
     tournament_start = cuescore_data.get("starttime", "")
@@ -78,19 +224,42 @@ def merge_tournament_data(cuescore_data: Dict[str, Any], existing_data: Dict[str
     print(f"  Fin: {tournament_end}")
     print(f"  Fecha mostrada: {tournament_display_date}")
     
+    last_updated = datetime.now(timezone(timedelta(hours=1))).isoformat()
+    
+    existing_matches = existing_data.get("matches", [])
+    players = PlayerTable.from_matches(existing_matches)
+    new_matches = decode_matches(cuescore_data.get("matches", []), players)
+    
+    if delta:
+        match_delta = compute_match_delta(existing_matches, new_matches)
+        matches = apply_match_delta(existing_matches, new_matches, match_delta, players)
+        
+        print(f"Delta de partidas:")
+        print(f"  Añadidas: {len(match_delta['added'])}")
+        print(f"  Modificadas: {len(match_delta['changed'])}")
+        print(f"  Eliminadas: {len(match_delta['removed'])}")
+    else:
+        matches = new_matches
+    
     # Crear nueva estructura fusionada
     merged_data = {
         "tournament_info": existing_data.get("tournament_info", {}),
         "summary": existing_data.get("summary", {}),
         "players": existing_data.get("players", {}),  # Mantener datos AGP
-        "matches": cuescore_data.get("matches", []),  # Actualizar partidas
-        "last_updated": datetime.now(timezone(timedelta(hours=1))).isoformat(),
+        "matches": matches,  # Actualizar partidas
+        "last_updated": last_updated,
         "tournament_start_date": tournament_start,
         "tournament_end_date": tournament_end,
         "tournament_display_date": tournament_display_date,
         "source": "cuescore_agp_merged"
     }
     
+    if delta:
+        merged_data["match_delta"] = match_delta
+        # Sin cambios reales se conserva la fecha de la última actualización
+        if not has_data_changes(merged_data, existing_data):
+            merged_data["last_updated"] = existing_data.get("last_updated", last_updated)
+    
     # Actualizar información de jugadores con datos de Cuescore si están disponibles
     if "players" in cuescore_data:
         for player_id, cuescore_player in cuescore_data["players"].items():
@@ -115,19 +284,78 @@ def merge_tournament_data(cuescore_data: Dict[str, Any], existing_data: Dict[str
     print(f"Datos fusionados exitosamente")
     return merged_data
 
-def save_merged_data(data: Dict[str, Any]):
-    """Guarda los datos fusionados"""
+# Cuadro de cada torneo en memoria: en el daemon y con --all solo se
+# recalculan las partidas afectadas por cada actualización
+_brackets: Dict[str, BracketGraph] = {}
+
+def get_bracket(data: Dict[str, Any], target: Dict[str, str]) -> BracketGraph:
+    """Devuelve el cuadro del torneo actualizado con las partidas de data"""
+    matches = data.get("matches", [])
+    bracket = _brackets.get(target["file"])
+    if bracket is None:
+        bracket = _brackets[target["file"]] = BracketGraph(matches)
+    else:
+        bracket.update(matches)
+    return bracket
+
+# Rating Elo en memoria, compartido por todos los torneos (ver elo_ratings.py)
+_elo_ratings: Optional[EloRatings] = None
+
+def get_elo_ratings() -> EloRatings:
+    global _elo_ratings
+    if _elo_ratings is None:
+        _elo_ratings = EloRatings(ELO_STATE_FILE)
+    return _elo_ratings
+
+def update_ratings(tournament_id: str, data: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """
+    Aplica al rating Elo las partidas terminadas desde la última actualización
+    y devuelve los ratings publicados (None si no se ha podido actualizar)
+    """
     try:
-        # Crear directorio si no existe
-        os.makedirs(os.path.dirname(TOURNAMENT_FILE), exist_ok=True)
-        
-        with open(TOURNAMENT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        ratings = get_elo_ratings()
+        counts = ratings.update(tournament_id, data.get("matches", []))
+        ratings.save()
+    except (OSError, ValueError) as e:
+        print(f"Error al actualizar el rating Elo: {e}")
+        return None
+    for key, value in counts.items():
+        metrics.count(f"elo_{key}", value)
+    if counts["rated"] or counts["corrected"]:
+        print(f"Rating Elo: {counts['rated']} partidas nuevas, {counts['corrected']} corregidas")
+    return ratings.published()
+
+def save_merged_data(data: Dict[str, Any], target: Optional[Dict[str, str]] = None,
+                     ratings: Optional[Dict[str, int]] = None,
+                     encoded: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Guarda los datos fusionados (modelo). Devuelve True si se han guardado.
+    Sin ratings se publican los del estado Elo guardado. encoded es el JSON
+    de data si el llamador ya lo tiene (ver models.encode_tournament).
+    """
+    target = target or get_tournament_target()
+    try:
+        # Escritura atómica y en streaming: los lectores nunca ven el archivo a medias
+        with metrics.stage("write"):
+            written = write_json(target["file"], encoded if encoded is not None else encode_tournament(data))
+        if written:
+            print(f"Datos guardados en: {target['file']}")
+        else:
+            print(f"Datos sin cambios en: {target['file']}")
         
-        print(f"Datos guardados en: {TOURNAMENT_FILE}")
+        # Formato compacto, artefacto con hash y manifest para el visor
+        with metrics.stage("bracket"):
+            bracket = get_bracket(data, target)
+        with metrics.stage("publish"):
+            if ratings is None:
+                ratings = get_elo_ratings().published()
+            publish_tournament_artifacts(data, target["data_dir"], target["compact_file"], bracket, ratings)
+        print(f"Datos compactos guardados en: {target['compact_file']}")
+        return True
         
     except Exception as e:
         print(f"Error al guardar datos: {e}")
+        return False
 
 def is_tournament_finished(tournament_end_date: str) -> bool:
     """Verifica si el torneo ha terminado usando la fecha de la API"""
@@ -156,27 +384,47 @@ def is_tournament_finished(tournament_end_date: str) -> bool:
         print(f"Error al verificar fecha del torneo: {e}")
         return False
 
-def main():
-    """Función principal"""
-    print(f"Iniciando actualización del torneo: {datetime.now()}")
+def apply_tournament_update(client: CuescoreClient, tournament_id: str, result: Dict[str, Any],
+                            existing_data: Dict[str, Any], full: bool = False,
+                            store: Optional[TournamentStore] = None) -> Dict[str, Any]:
+    """
+    Fusiona y guarda el resultado de una descarga de Cuescore.
+    Devuelve {"status", "data", "changes"} donde status es "error",
+    "not_modified", "unchanged" o "saved" y changes el número de partidas
+    añadidas, modificadas o eliminadas. Con store, las partidas del delta
+    se escriben también en la base de datos SQLite.
+    """
+    target = get_tournament_target(tournament_id)
     
-    # Crear backup
-    backup_current_data()
+    if not result:
+        print("No se pudieron descargar datos de Cuescore")
+        return {"status": "error", "data": existing_data, "changes": 0}
     
-    # Cargar datos existentes
-    existing_data = load_existing_data()
-    if not existing_data:
-        print("No se pudieron cargar los datos existentes")
-        return
+    # 304 o cuerpo idéntico: no hace falta fusionar ni reescribir nada
+    if result["not_modified"]:
+        print("Sin cambios en Cuescore, no se reescribe el archivo")
+        print(f"Actualización completada: {datetime.now()}")
+        return {"status": "not_modified", "data": existing_data, "changes": 0}
     
-    # Descargar datos de Cuescore
-    cuescore_data = fetch_cuescore_data()
+    cuescore_data = result["data"]
     if not cuescore_data:
         print("No se pudieron descargar datos de Cuescore")
-        return
+        return {"status": "error", "data": existing_data, "changes": 0}
     
     # Fusionar datos
-    merged_data = merge_tournament_data(cuescore_data, existing_data)
+    with metrics.stage("merge"):
+        merged_data = merge_tournament_data(cuescore_data, existing_data, delta=not full)
+    match_delta = merged_data.get("match_delta", {})
+    changes = sum(len(match_delta.get(key, [])) for key in ("added", "changed", "removed"))
+    for key in ("added", "changed", "removed"):
+        metrics.count(f"matches_{key}", len(match_delta.get(key, [])))
+    metrics.count("matches_total", len(merged_data.get("matches", [])))
+    
+    if not full and not has_data_changes(merged_data, existing_data):
+        print("Sin cambios en las partidas, no se reescribe el archivo")
+        client.store(tournament_id, result)
+        print(f"Actualización completada: {datetime.now()}")
+        return {"status": "unchanged", "data": existing_data, "changes": 0}
     
     # Verificar si el torneo ha terminado usando la fecha de la API
     tournament_end_date = merged_data.get("tournament_end_date", "")
@@ -185,10 +433,220 @@ def main():
         print("📊 Los datos finales se mantienen disponibles para consulta.")
         # Aún guardamos los datos para tener la información completa
     
-    # Guardar datos fusionados
-    save_merged_data(merged_data)
+    # Rating Elo: solo las partidas que han terminado desde la última actualización
+    with metrics.stage("ratings"):
+        ratings = update_ratings(tournament_id, merged_data)
+    
+    # El modelo se codifica una sola vez para el archivo, SQLite y el historial
+    encoded = encode_tournament(merged_data)
+    
+    # Guardar datos fusionados y, si todo ha ido bien, los validadores de la respuesta
+    if not save_merged_data(merged_data, target, ratings, encoded):
+        return {"status": "error", "data": existing_data, "changes": 0}
+    client.store(tournament_id, result)
+    
+    # Copia en SQLite: solo las filas del delta (todas con --full)
+    if store is not None:
+        with metrics.stage("store"):
+            save_to_store(store, tournament_id, encoded, None if full else match_delta)
+    
+    # Guardar la versión en el historial en lugar de copiar el archivo completo
+    with metrics.stage("snapshot"):
+        record_snapshot(encoded, encode_tournament(existing_data), target["journal_dir"])
     
     print(f"Actualización completada: {datetime.now()}")
+    return {"status": "saved", "data": merged_data, "changes": max(changes, 1)}
+
+def save_to_store(store: TournamentStore, tournament_id: str, data: Dict[str, Any],
+                  match_delta: Optional[Dict[str, Any]] = None):
+    """
+    Actualiza el torneo (en formato JSON) en la base de datos; un error no
+    impide la publicación del JSON
+    """
+    try:
+        counts = store.upsert_tournament(tournament_id, data, match_delta)
+        metrics.count("store_rows", sum(counts.values()))
+    except sqlite3.Error as e:
+        print(f"Error al actualizar la base de datos: {e}")
+
+def refresh_once(client: CuescoreClient, full: bool = False,
+                 tournament_id: str = TOURNAMENT_ID,
+                 store: Optional[TournamentStore] = None) -> Dict[str, Any]:
+    """
+    Ejecuta una actualización completa (descarga, fusión y guardado) de un torneo.
+    Devuelve el resultado de apply_tournament_update.
+    """
+    print(f"Iniciando actualización del torneo: {datetime.now()}")
+    target = get_tournament_target(tournament_id)
+    
+    # Una sola actualización a la vez sobre el mismo directorio de datos
+    with metrics.run("refresh"), publish_lock(target["data_dir"]):
+        metrics.set_info("tournament_id", tournament_id)
+        metrics.set_info("json_backend", get_backend())
+        
+        # Cargar datos existentes
+        with metrics.stage("load"):
+            existing_data = load_existing_data(target["file"])
+        if not existing_data:
+            print("No se pudieron cargar los datos existentes")
+            metrics.set_status("error")
+            return {"status": "error", "data": {}, "changes": 0}
+        
+        # Descargar datos de Cuescore (petición condicional salvo con --full)
+        with metrics.stage("fetch"):
+            result = fetch_tournament_update(client, conditional=not full, tournament_id=tournament_id)
+        outcome = apply_tournament_update(client, tournament_id, result, existing_data, full, store)
+        metrics.set_status(outcome["status"])
+        return outcome
+
+def refresh_tournaments(tournament_ids: List[str], full: bool = False,
+                        store: Optional[TournamentStore] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Actualiza varios torneos: las descargas se hacen en paralelo (ver
+    multi_fetch.py) y cada resultado se fusiona y guarda en cuanto llega
+    """
+    with ExitStack() as locks:
+        locks.enter_context(metrics.run("refresh-all"))
+        metrics.set_info("tournament_ids", tournament_ids)
+        metrics.set_info("json_backend", get_backend())
+        for data_dir in sorted({get_tournament_target(tournament_id)["data_dir"] for tournament_id in tournament_ids}):
+            locks.enter_context(publish_lock(data_dir))
+        
+        existing = {}
+        with metrics.stage("load"):
+            for tournament_id in tournament_ids:
+                existing_data = load_existing_data(get_tournament_target(tournament_id)["file"])
+                if existing_data:
+                    existing[tournament_id] = existing_data
+                else:
+                    print(f"[{tournament_id}] No se pudieron cargar los datos existentes")
+        
+        client = CuescoreClient(rate_limit_delay=0, pool_size=len(existing) or 1)
+        outcomes = {}
+        
+        def on_result(tournament_id: str, result: Dict[str, Any]):
+            print(f"[{tournament_id}] Aplicando datos de Cuescore")
+            outcomes[tournament_id] = apply_tournament_update(
+                client, tournament_id, result, existing[tournament_id], full, store
+            )
+        
+        try:
+            started = time.monotonic()
+            asyncio.run(fetch_tournaments(client, list(existing), on_result, conditional=not full))
+            print(f"{len(existing)} torneos actualizados en {time.monotonic() - started:.1f} s")
+            metrics.set_info("outcomes", {tournament_id: outcome["status"] for tournament_id, outcome in outcomes.items()})
+        finally:
+            client.close()
+    
+    return outcomes
+
+def is_finished_and_stable(data: Dict[str, Any]) -> bool:
+    """El torneo terminó según la API y todas las partidas guardadas están terminadas"""
+    end = parse_tournament_time(data.get("tournament_end_date", ""))
+    statuses = count_match_statuses(data.get("matches", []))
+    return end is not None and datetime.now(timezone.utc) > end and set(statuses) == {"finished"}
+
+def run_daemon(full: bool = False, max_runtime: Optional[float] = None,
+               store: Optional[TournamentStore] = None):
+    """
+    Modo daemon: repite la actualización con un intervalo adaptativo
+    (ver refresh_scheduler.py) hasta que el torneo termina y se estabiliza
+    """
+    client = CuescoreClient()
+    scheduler = RefreshScheduler()
+    started = time.monotonic()
+    
+    print("🔄 Modo daemon iniciado")
+    try:
+        while True:
+            outcome = refresh_once(client, full=full, store=store)
+            full = False  # Solo la primera actualización es completa
+            
+            if outcome["status"] == "error":
+                scheduler.record_error()
+            else:
+                scheduler.record_success(outcome["data"], outcome["changes"])
+            
+            if scheduler.should_stop():
+                print("🏁 Torneo terminado y sin cambios: se detiene el daemon")
+                break
+            
+            interval = scheduler.next_interval()
+            if max_runtime is not None and time.monotonic() - started + interval > max_runtime:
+                print("⏱️  Tiempo máximo de ejecución alcanzado")
+                break
+            
+            print(f"Próxima consulta en {interval:.0f} s ({scheduler.reason})")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Daemon detenido")
+    finally:
+        client.close()
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Actualiza los datos del torneo desde Cuescore")
+    parser.add_argument("--full", action="store_true",
+                        help="Reemplaza todas las partidas en lugar de aplicar solo el delta")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Consulta Cuescore continuamente con un intervalo adaptativo")
+    parser.add_argument("--max-runtime", type=float, default=None,
+                        help="Segundos máximos de ejecución del daemon")
+    parser.add_argument("--all", action="store_true",
+                        help="Actualiza en paralelo todos los torneos de config.TOURNAMENTS")
+    parser.add_argument("--tournament", action="append", dest="tournaments", default=None,
+                        help="ID de torneo de config.TOURNAMENTS a actualizar (se puede repetir)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Guarda las métricas por etapa de cada actualización en --metrics-dir")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR,
+                        help="Directorio de las métricas (por defecto config.METRICS_DIR)")
+    parser.add_argument("--memory", action="store_true",
+                        help="Mide también la memoria con tracemalloc (ralentiza las etapas)")
+    parser.add_argument("--profile", default=None, metavar="ARCHIVO",
+                        help="Guarda un perfil de cProfile de la actualización (pstats)")
+    parser.add_argument("--db", default=TOURNAMENT_DB,
+                        help="Base de datos SQLite que se actualiza con cada cambio (por defecto config.TOURNAMENT_DB)")
+    args = parser.parse_args()
+    
+    if args.metrics or args.profile:
+        metrics.configure(args.metrics_dir if args.metrics else None, trace_memory=args.memory,
+                          profile=args.profile, keep=METRICS_KEEP)
+    
+    if args.all or args.tournaments:
+        tournament_ids = list(TOURNAMENTS) if args.all else args.tournaments
+        unknown = [tournament_id for tournament_id in tournament_ids if tournament_id not in TOURNAMENTS]
+        if unknown:
+            print(f"Torneos no configurados en TOURNAMENTS: {', '.join(unknown)}")
+            return
+        with ExitStack() as stack:
+            store = open_store(args.db)
+            if store is not None:
+                stack.enter_context(store)
+            refresh_tournaments(tournament_ids, full=args.full, store=store)
+        return
+    
+    if args.daemon:
+        with ExitStack() as stack:
+            store = open_store(args.db)
+            if store is not None:
+                stack.enter_context(store)
+            run_daemon(full=args.full, max_runtime=args.max_runtime, store=store)
+        return
+    
+    # Ejecución programada: si el torneo ya terminó y los datos son definitivos
+    # no se consulta la API (--full fuerza la actualización)
+    if not args.full and is_finished_and_stable(load_existing_data()):
+        print("🏁 El torneo ha terminado y todas las partidas están cerradas, no se consulta Cuescore")
+        return
+    
+    client = CuescoreClient()
+    store = open_store(args.db)
+    try:
+        refresh_once(client, full=args.full, store=store)
+    finally:
+        client.close()
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
-    main() # Updated
+    main() # Updated
\ No newline at end of file
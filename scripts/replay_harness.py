@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproduce un torneo grabado contra el mock de Cuescore y mide el refresco
+
+Arranca scripts/mock_cuescore_server.py en un hilo, copia los datos iniciales
+a un directorio de trabajo y ejecuta refresh_once() de refresh_tournament.py
+cada --interval segundos mientras el mock reproduce el torneo. Para cada
+consulta se registra la duración y el resultado; para cada cambio del torneo,
+el retraso entre que aparece en el mock y que queda publicado en local.
+
+    python scripts/replay_harness.py --speed 1200 --interval 1 --latency 0.1 --rate-429 0.05
+
+Con --metrics se guardan las métricas por etapa de cada refresco (ver
+metrics.py) en <workdir>/metrics y se muestra su resumen.
+
+Con --check-delta no se arranca el mock: se compara el delta de partidas
+(compute_match_delta) entre cada par de instantáneas consecutivas de la
+reproducción, y entre la primera y la última, con las partidas que cambian
+de verdad. Termina con error si no coinciden.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+sys.path.append(os.path.dirname(__file__))
+from mock_cuescore_server import (start_mock_server, load_snapshot, TournamentReplay,
+                                  DEFAULT_INITIAL_SNAPSHOT, DEFAULT_FINAL_SNAPSHOT)
+
+DEFAULT_INITIAL_DATA = "tmp/tournament_extended.json"  # Datos extendidos antes del torneo
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por el método del rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(values: List[float]) -> str:
+    if not values:
+        return "-"
+    return (f"media {sum(values) / len(values):.3f}  p50 {percentile(values, 0.5):.3f}  "
+            f"p95 {percentile(values, 0.95):.3f}  máx {max(values):.3f}")
+
+def _changed_match_ids(old_matches: List[Dict[str, Any]], new_matches: List[Dict[str, Any]]) -> List[Any]:
+    # Partidas con contenido distinto, sin contar el curVersion común a todo el torneo
+    def content(match):
+        return {key: value for key, value in match.items() if key != "curVersion"}
+    old_by_id = {match.get("matchId"): match for match in old_matches}
+    return [match.get("matchId") for match in new_matches
+            if match.get("matchId") in old_by_id and content(match) != content(old_by_id[match.get("matchId")])]
+
+def check_match_delta(args) -> int:
+    """Comprueba el delta de partidas de la reproducción. Devuelve el número de errores"""
+    from refresh_tournament import compute_match_delta
+    from models import PlayerTable, decode_matches
+
+    replay = TournamentReplay(load_snapshot(args.snapshot), load_snapshot(args.final))
+    states = [replay.state(applied)["matches"] for applied in range(len(replay.events) + 1)]
+    # El delta trabaja sobre el modelo, con los jugadores compartidos como en el merge
+    players = PlayerTable()
+    models = [decode_matches(matches, players) for matches in states]
+    pairs = [(f"eventos {applied}-{applied + 1}", applied, applied + 1) for applied in range(len(replay.events))]
+    pairs.append((f"eventos 0-{len(replay.events)}", 0, len(states) - 1))
+
+    errors = 0
+    for label, old, new in pairs:
+        delta = compute_match_delta(models[old], models[new])
+        expected = _changed_match_ids(states[old], states[new])
+        if sorted(delta["changed"]) != sorted(expected) or delta["added"] or delta["removed"]:
+            errors += 1
+            print(f"❌ {label}: {len(delta['changed'])} modificadas en el delta, {len(expected)} cambian de verdad")
+
+    changed_total = len(compute_match_delta(models[0], models[-1])["changed"])
+    matches_with_events = len({match_id for _, match_id, _ in replay.events})
+    if changed_total != matches_with_events:
+        errors += 1
+        print(f"❌ Primera a última: {changed_total} modificadas, {matches_with_events} partidas con eventos")
+    print(f"{'✅' if not errors else '❌'} Delta de partidas: {len(pairs)} comparaciones, "
+          f"{changed_total} partidas modificadas de {len(states[-1])}, {errors} errores")
+    return errors
+
+def run_replay(args) -> Dict[str, Any]:
+    workdir = args.workdir or tempfile.mkdtemp(prefix="cuescore-replay-")
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    shutil.copy(args.initial_data, os.path.join(data_dir, "tournament_extended.json"))
+
+    server = start_mock_server(
+        args.snapshot, args.final, speed=args.speed,
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429,
+        rate_truncated=args.rate_truncated, validators=not args.no_validators, seed=args.seed,
+    )
+    replay = server.replay
+
+    # La configuración se lee al importar, así que el entorno se prepara antes
+    os.environ["CUESCORE_API_URL"] = server.api_url
+    os.environ["CUESCORE_TOURNAMENT_ID"] = str(server.tournament_id)
+    os.environ["TOURNAMENT_DATA_DIR"] = data_dir
+    os.environ["TOURNAMENT_HISTORY_DIR"] = os.path.join(workdir, "history")
+    os.environ["CUESCORE_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["CUESCORE_RATE_LIMIT_DELAY"] = str(args.rate_limit_delay)
+    from refresh_tournament import refresh_once
+    from tournament_store import open_store
+    from cuescore_client import CuescoreClient
+    import metrics
+    metrics_dir = os.path.join(workdir, "metrics")
+    if args.metrics:
+        metrics.configure(metrics_dir)
+
+    print(f"🎱 Reproduciendo {len(replay.events)} eventos (x{args.speed:g}) desde {server.api_url}")
+    print(f"   Directorio de trabajo: {workdir}")
+
+    # Momento real en que cada evento aparece en el mock
+    event_offsets = [(event_time - replay.virtual_start).total_seconds() / args.speed
+                     for event_time, _, _ in replay.events]
+
+    client = CuescoreClient()
+    store = open_store(args.db)
+    durations: List[float] = []
+    lags: List[float] = []
+    statuses: Dict[str, int] = {}
+    published = 0
+    polls = 0
+    last_saved = None
+
+    try:
+        while polls < args.max_polls:
+            visible = replay.applied_events()
+            started = time.monotonic()
+            with contextlib.redirect_stdout(io.StringIO()):
+                outcome = refresh_once(client, store=store)
+            finished = time.monotonic()
+            polls += 1
+
+            durations.append(finished - started)
+            statuses[outcome["status"]] = statuses.get(outcome["status"], 0) + 1
+            if outcome["status"] == "saved":
+                last_saved = finished
+            if outcome["status"] != "error" and visible > published and last_saved is not None:
+                # Sin cambios (304) los eventos visibles ya estaban en la última publicación
+                elapsed = last_saved - replay.started
+                lags.extend(max(0.0, elapsed - offset) for offset in event_offsets[published:visible])
+                published = visible
+
+            if args.verbose:
+                print(f"   consulta {polls}: {outcome['status']} ({outcome['changes']} partidas), "
+                      f"{finished - started:.3f} s, eventos {visible}/{len(replay.events)}")
+
+            if published == len(replay.events):
+                break
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        client.close()
+        if store is not None:
+            store.close()
+        server.shutdown()
+
+    print(f"\n📊 {polls} consultas: {statuses}")
+    print(f"   Peticiones al mock: {server.stats}")
+    print(f"   Duración de cada refresco (s): {summarize(durations)}")
+    print(f"   Retraso de publicación (s reales): {summarize(lags)}")
+    print(f"   Eventos publicados: {published}/{len(replay.events)}")
+    if args.metrics:
+        print(f"\n⏱️  Etapas (p50 / p95 / máx en s, métricas en {metrics_dir}):")
+        for name, entry in metrics.summarize(metrics.load_runs([metrics_dir])).items():
+            print(f"   {name:<28} {entry['p50']:.3f} / {entry['p95']:.3f} / {entry['max']:.3f}")
+
+    return {"polls": polls, "statuses": statuses, "durations": durations, "lags": lags,
+            "published": published, "events": len(replay.events), "server": server.stats}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el refresco del torneo contra el mock de Cuescore")
+    parser.add_argument("--snapshot", default=DEFAULT_INITIAL_SNAPSHOT, help="Instantánea inicial de Cuescore")
+    parser.add_argument("--final", default=DEFAULT_FINAL_SNAPSHOT, help="Instantánea final del torneo")
+    parser.add_argument("--initial-data", default=DEFAULT_INITIAL_DATA,
+                        help="tournament_extended.json de partida (antes del torneo)")
+    parser.add_argument("--speed", type=float, default=1200.0, help="Segundos de torneo por segundo real")
+    parser.add_argument("--interval", type=float, default=1.0, help="Segundos reales entre consultas")
+    parser.add_argument("--max-polls", type=int, default=1000, help="Máximo de consultas")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-truncated", type=float, default=0.0)
+    parser.add_argument("--no-validators", action="store_true")
+    parser.add_argument("--rate-limit-delay", type=float, default=0.0,
+                        help="API_RATE_LIMIT_DELAY del cliente durante la prueba")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", default=None, help="Directorio de trabajo (por defecto, uno temporal)")
+    parser.add_argument("--metrics", action="store_true", help="Guarda y resume las métricas por etapa")
+    parser.add_argument("--db", default=None, help="Actualiza también esta base de datos SQLite en cada refresco")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--check-delta", action="store_true",
+                        help="Solo comprueba el delta de partidas entre instantáneas consecutivas")
+    args = parser.parse_args()
+    if args.check_delta:
+        sys.exit(1 if check_match_delta(args) else 0)
+    run_replay(args)
+
+if __name__ == "__main__":
+    main()
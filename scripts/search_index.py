@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de búsqueda precalculado para los filtros del visor
+
+Los nombres, ligas y rondas se normalizan con analyze_players.normalize_name
+(minúsculas, sin acentos ni signos), así que "lalin" encuentra "Lalín". Para
+cada token se guardan sus prefijos (hasta PREFIX_MAX_LENGTH caracteres) con la
+lista de documentos que lo contienen, y los filtros de liga, estado y ronda se
+publican como listas de IDs. En el visor cada filtro es una intersección de
+conjuntos en lugar de recorrer todos los jugadores y partidas.
+
+Formato (claves de primer nivel):
+- people: playerId de cada documento (jugadores que aparecen en el cuadro)
+- keys: texto normalizado de cada documento (para consultas más largas que
+  PREFIX_MAX_LENGTH y como respaldo)
+- tokens: prefijo -> documentos de people
+- facets: liga / status (clasificado, no-clasificado) -> documentos de people
+- matches: byPerson (documento -> matchno), roundTokens (prefijo -> nombres de
+  ronda), round y status (-> matchno)
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Any, List
+
+sys.path.append(os.path.dirname(__file__))
+from analyze_players import normalize_name
+
+SEARCH_INDEX_VERSION = 1
+PREFIX_MAX_LENGTH = 10
+
+def tokenize(text: str) -> List[str]:
+    """Tokens normalizados (sin acentos, minúsculas) de un texto"""
+    return normalize_name(text or "").split()
+
+def add_prefix_postings(postings: Dict[str, List[Any]], text: str, doc: Any):
+    """Añade el documento a la lista de cada prefijo de cada token del texto"""
+    for token in tokenize(text):
+        for length in range(1, min(len(token), PREFIX_MAX_LENGTH) + 1):
+            docs = postings.setdefault(token[:length], [])
+            if not docs or docs[-1] != doc:
+                docs.append(doc)
+
+def _sorted_postings(postings: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    return {key: sorted(set(docs)) for key, docs in sorted(postings.items())}
+
+def build_search_index(compact_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Construye el índice de búsqueda a partir del formato compacto
+    (tabla de jugadores por playerId, participantes y partidas)
+    """
+    players = compact_data.get("players", {})
+    rounds = compact_data.get("rounds", {})
+
+    people: List[int] = []
+    keys: List[str] = []
+    tokens: Dict[str, List[int]] = {}
+    ligas: Dict[str, List[int]] = {}
+    status: Dict[str, List[int]] = {"clasificado": [], "no-clasificado": []}
+    doc_by_player: Dict[str, int] = {}
+
+    participants = set(compact_data.get("participants", []))
+    for key, entry in players.items():
+        player_id = int(key)
+        doc = len(people)
+        doc_by_player[key] = doc
+        people.append(player_id)
+
+        name = entry.get("name", "")
+        liga = entry.get("liga") or ""
+        keys.append(" ".join(tokenize(f"{name} {liga}")))
+        add_prefix_postings(tokens, name, doc)
+        add_prefix_postings(tokens, liga, doc)
+
+        if player_id in participants:
+            if liga:
+                ligas.setdefault(liga, []).append(doc)
+            status["clasificado" if entry.get("clasificado") else "no-clasificado"].append(doc)
+
+    by_person: List[List[int]] = [[] for _ in people]
+    round_tokens: Dict[str, List[str]] = {}
+    match_rounds: Dict[str, List[int]] = {}
+    match_status: Dict[str, List[int]] = {}
+
+    for round_name in rounds.values():
+        add_prefix_postings(round_tokens, round_name, round_name)
+
+    for match in compact_data.get("matches", []):
+        matchno = match.get("matchno")
+        for side in ("a", "b"):
+            doc = doc_by_player.get(str(match.get(side) or 0))
+            if doc is not None:
+                by_person[doc].append(matchno)
+        round_name = rounds.get(str(match.get("round")), "")
+        match_rounds.setdefault(round_name, []).append(matchno)
+        match_status.setdefault(match.get("matchstatus") or "", []).append(matchno)
+
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "prefixMax": PREFIX_MAX_LENGTH,
+        "people": people,
+        "keys": keys,
+        "tokens": _sorted_postings(tokens),
+        "facets": {
+            "liga": {liga: docs for liga, docs in sorted(ligas.items())},
+            "status": status,
+        },
+        "matches": {
+            "byPerson": [sorted(set(matchnos)) for matchnos in by_person],
+            "roundTokens": _sorted_postings(round_tokens),
+            "round": {name: sorted(matchnos) for name, matchnos in match_rounds.items()},
+            "status": {name: sorted(matchnos) for name, matchnos in match_status.items()},
+        },
+    }
+
+def search_people(index: Dict[str, Any], query: str) -> List[int]:
+    """
+    playerId de los jugadores cuyo nombre o liga contiene un token que empieza
+    por cada uno de los tokens de la consulta. Es el equivalente en Python de
+    searchPeople en filters.js.
+    """
+    result = None
+    for token in tokenize(query):
+        docs = set(index["tokens"].get(token[:index["prefixMax"]], []))
+        if len(token) > index["prefixMax"]:
+            docs = {doc for doc in docs
+                    if any(word.startswith(token) for word in index["keys"][doc].split())}
+        result = docs if result is None else result & docs
+    if result is None:
+        return list(index["people"])
+    return [index["people"][doc] for doc in sorted(result)]
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python search_index.py <tournament.min.json> <consulta>")
+        return
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        compact_data = json.load(f)
+
+    index = build_search_index(compact_data)
+    size = len(json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    print(f"🔎 Índice: {len(index['people'])} jugadores, {len(index['tokens'])} prefijos, {size} bytes")
+
+    players = compact_data.get("players", {})
+    for player_id in search_people(index, " ".join(sys.argv[2:])):
+        entry = players.get(str(player_id), {})
+        print(f"   {player_id}: {entry.get('name', '')} ({entry.get('liga') or 'sin liga'})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Historial de versiones del torneo como diario de solo escritura
+
+Cada actualización guardada añade una entrada a <journal_dir>/journal.jsonl.
+La entrada apunta a un objeto direccionado por contenido en
+<journal_dir>/objects/<sha>.json.gz, que es o bien un checkpoint (el estado
+completo) o un delta respecto a la versión anterior: partidas y jugadores
+añadidos, modificados o eliminados y campos de primer nivel cambiados. Cada
+JOURNAL_CHECKPOINT_INTERVAL entradas se guarda un checkpoint, así que
+reconstruir cualquier versión solo aplica unos pocos deltas.
+
+    python scripts/snapshot_journal.py list
+    python scripts/snapshot_journal.py restore 12 --output tournament_extended.json
+    python scripts/snapshot_journal.py compact --keep 50
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from config import JOURNAL_DIR, JOURNAL_CHECKPOINT_INTERVAL
+from atomic_io import atomic_write_bytes
+from json_io import dumps, COMPACT_SEPARATORS
+
+JOURNAL_NAME = "journal.jsonl"
+OBJECTS_DIR_NAME = "objects"
+HASH_LENGTH = 16
+
+# Colecciones que se comparan elemento a elemento y su clave
+COLLECTION_KEYS = {"matches": "matchId", "players": "player_id"}
+
+def canonical_json(data: Any) -> bytes:
+    """Serialización determinista (claves ordenadas, sin espacios)"""
+    return dumps(data, separators=COMPACT_SEPARATORS, sort_keys=True)
+
+def _serialize_object(data: Any) -> bytes:
+    # Los objetos conservan el orden de las claves para restaurar el archivo tal cual
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def state_hash(state: Dict[str, Any]) -> str:
+    """Hash del contenido de un estado completo del torneo"""
+    return hashlib.sha256(canonical_json(state)).hexdigest()[:HASH_LENGTH]
+
+def _item_key(item: Any, key_field: str, position: Any) -> str:
+    if isinstance(item, dict) and key_field in item:
+        return str(item[key_field])
+    return f"#{position}"
+
+def _index_collection(collection: Any, key_field: str) -> Tuple[List[str], Dict[str, Any]]:
+    """Devuelve (orden de claves, elemento por clave) de una lista o un dict"""
+    if isinstance(collection, dict):
+        return list(collection), dict(collection)
+    keys = [_item_key(item, key_field, position) for position, item in enumerate(collection or [])]
+    return keys, dict(zip(keys, collection or []))
+
+def diff_item(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """
+    Cambios de un elemento a nivel de campo ({"set": {...}, "unset": [...]}).
+    Devuelve None si no son dos objetos y hay que guardar el elemento completo.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None
+    patch: Dict[str, Any] = {}
+    changed = {field: value for field, value in new.items() if field not in old or old[field] != value}
+    unset = [field for field in old if field not in new]
+    if changed:
+        patch["set"] = changed
+    if unset:
+        patch["unset"] = unset
+    # Orden de los campos solo si un campo nuevo no va al final
+    expected = [field for field in old if field in new] + [field for field in changed if field not in old]
+    if list(new) != expected:
+        patch["order"] = list(new)
+    return patch
+
+def apply_item_patch(old: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    item = {field: value for field, value in old.items() if field not in patch.get("unset", [])}
+    item.update(patch.get("set", {}))
+    if "order" in patch:
+        item = {field: item[field] for field in patch["order"]}
+    return item
+
+def diff_collection(old: Any, new: Any, key_field: str) -> Optional[Dict[str, Any]]:
+    """
+    Delta de una colección: elementos nuevos (completos), campos cambiados de
+    los existentes, elementos eliminados y orden si cambia
+    """
+    old_keys, old_items = _index_collection(old, key_field)
+    new_keys, new_items = _index_collection(new, key_field)
+
+    upsert: Dict[str, Any] = {}
+    patch: Dict[str, Any] = {}
+    for key in new_keys:
+        new_item = new_items[key]
+        if key not in old_items:
+            upsert[key] = new_item
+        elif old_items[key] != new_item:
+            item_patch = diff_item(old_items[key], new_item)
+            if item_patch is None:
+                upsert[key] = new_item
+            else:
+                patch[key] = item_patch
+
+    remove = [key for key in old_keys if key not in new_items]
+    delta: Dict[str, Any] = {}
+    if upsert:
+        delta["upsert"] = upsert
+    if patch:
+        delta["patch"] = patch
+    if remove:
+        delta["remove"] = remove
+    # Solo se guarda el orden si no es el que resulta de aplicar el delta
+    if new_keys != _default_order(old_keys, new_items, upsert):
+        delta["order"] = new_keys
+    if type(old) is not type(new):
+        delta["kind"] = "dict" if isinstance(new, dict) else "list"
+    return delta or None
+
+def _default_order(old_keys: List[str], items: Dict[str, Any], upsert: Dict[str, Any]) -> List[str]:
+    """Orden por defecto: las claves antiguas que siguen y después las nuevas"""
+    old_set = set(old_keys)
+    return [key for key in old_keys if key in items] + [key for key in upsert if key not in old_set]
+
+def apply_collection_delta(old: Any, delta: Dict[str, Any], key_field: str) -> Any:
+    """Aplica el delta de una colección"""
+    old_keys, items = _index_collection(old, key_field)
+    for key in delta.get("remove", []):
+        items.pop(key, None)
+    upsert = delta.get("upsert", {})
+    items.update(upsert)
+    for key, item_patch in delta.get("patch", {}).items():
+        items[key] = apply_item_patch(items[key], item_patch)
+
+    order = delta.get("order") or _default_order(old_keys, items, upsert)
+    kind = delta.get("kind") or ("dict" if isinstance(old, dict) else "list")
+    if kind == "dict":
+        return {key: items[key] for key in order}
+    return [items[key] for key in order]
+
+def compute_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Delta entre dos estados del torneo"""
+    delta: Dict[str, Any] = {"collections": {}, "fields": {}, "removed_fields": []}
+    for key, value in new.items():
+        if key in COLLECTION_KEYS:
+            collection_delta = diff_collection(old.get(key, []), value, COLLECTION_KEYS[key])
+            if collection_delta:
+                delta["collections"][key] = collection_delta
+        elif old.get(key) != value or key not in old:
+            delta["fields"][key] = value
+    delta["removed_fields"] = [key for key in old if key not in new]
+    return delta
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica un delta sobre un estado sin modificar el original (los elementos
+    que no cambian se comparten con él)
+    """
+    new_state = {}
+    for key, value in state.items():
+        if key in delta.get("removed_fields", []):
+            continue
+        new_state[key] = value
+    for key, collection_delta in delta.get("collections", {}).items():
+        new_state[key] = apply_collection_delta(state.get(key, []), collection_delta, COLLECTION_KEYS[key])
+    new_state.update(delta.get("fields", {}))
+    return new_state
+
+def count_delta_changes(delta: Dict[str, Any]) -> Dict[str, int]:
+    """Número de elementos cambiados por colección"""
+    return {
+        key: (len(collection_delta.get("upsert", {})) + len(collection_delta.get("patch", {}))
+              + len(collection_delta.get("remove", [])))
+        for key, collection_delta in delta.get("collections", {}).items()
+    }
+
+class SnapshotJournal:
+    """Diario de versiones de un torneo en un directorio"""
+
+    def __init__(self, journal_dir: str = JOURNAL_DIR,
+                 checkpoint_interval: int = JOURNAL_CHECKPOINT_INTERVAL):
+        self.journal_dir = journal_dir
+        self.objects_dir = os.path.join(journal_dir, OBJECTS_DIR_NAME)
+        self.journal_path = os.path.join(journal_dir, JOURNAL_NAME)
+        self.checkpoint_interval = max(1, checkpoint_interval)
+
+    # --- Objetos direccionados por contenido ---
+
+    def _object_path(self, object_id: str) -> str:
+        return os.path.join(self.objects_dir, f"{object_id}.json.gz")
+
+    def write_object(self, payload: Dict[str, Any]) -> str:
+        """Guarda un objeto (si no existe ya) y devuelve su id"""
+        content = _serialize_object(payload)
+        object_id = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        path = self._object_path(object_id)
+        if not os.path.exists(path):
+            atomic_write_bytes(path, gzip.compress(content, compresslevel=9, mtime=0), skip_unchanged=False)
+        return object_id
+
+    def read_object(self, object_id: str) -> Dict[str, Any]:
+        with open(self._object_path(object_id), "rb") as f:
+            return json.loads(gzip.decompress(f.read()))
+
+    # --- Entradas del diario ---
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Entradas del diario en orden (una línea JSON por versión)"""
+        entries = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Línea incompleta de una escritura interrumpida
+                        break
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _append_entry(self, entry: Dict[str, Any]):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, state: Dict[str, Any], previous_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Añade una versión. Se guarda como delta respecto a previous_state si este
+        es la última versión del diario; si no (o si toca), como checkpoint.
+        Si el diario está vacío y hay previous_state, se guarda primero como
+        checkpoint para poder volver a él.
+
+        Solo se guarda un delta si el hash de previous_state coincide con el de
+        la última versión: así el delta siempre se aplica sobre el estado que
+        reconstruye el diario, aunque el archivo publicado se haya editado.
+        """
+        entries = self.entries()
+        new_hash = state_hash(state)
+        previous_hash = state_hash(previous_state) if previous_state is not None else None
+
+        if not entries and previous_state is not None and previous_hash != new_hash:
+            entries.append(self._append_version(entries, previous_state, previous_hash, None))
+
+        head = entries[-1] if entries else None
+        if head is not None and head["state"] == new_hash:
+            return head
+
+        since_checkpoint = 0
+        for entry in reversed(entries):
+            if entry["type"] == "checkpoint":
+                break
+            since_checkpoint += 1
+
+        use_delta = (head is not None and previous_hash == head["state"]
+                     and since_checkpoint + 1 < self.checkpoint_interval)
+        return self._append_version(entries, state, new_hash, previous_state if use_delta else None)
+
+    def _append_version(self, entries: List[Dict[str, Any]], state: Dict[str, Any], digest: str,
+                        previous_state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if previous_state is None:
+            object_id = self.write_object({"type": "checkpoint", "state": state})
+            entry_type, changes = "checkpoint", {}
+        else:
+            delta = compute_delta(previous_state, state)
+            object_id = self.write_object({"type": "delta", "delta": delta})
+            entry_type, changes = "delta", count_delta_changes(delta)
+
+        entry = {
+            "seq": entries[-1]["seq"] + 1 if entries else 1,
+            "type": entry_type,
+            "object": object_id,
+            "state": digest,
+            "parent": entries[-1]["state"] if entries else None,
+            "recorded_at": datetime.now().isoformat(),
+            "last_updated": state.get("last_updated"),
+            "changes": changes,
+        }
+        self._append_entry(entry)
+        return entry
+
+    def reconstruct(self, seq: Optional[int] = None) -> Dict[str, Any]:
+        """Reconstruye el estado de la versión seq (por defecto la última)"""
+        entries = self.entries()
+        if not entries:
+            raise ValueError("El diario está vacío")
+        if seq is None:
+            seq = entries[-1]["seq"]
+
+        position = next((i for i, entry in enumerate(entries) if entry["seq"] == seq), None)
+        if position is None:
+            raise ValueError(f"No existe la versión {seq}")
+
+        start = position
+        while entries[start]["type"] != "checkpoint":
+            start -= 1
+            if start < 0:
+                raise ValueError(f"No hay checkpoint anterior a la versión {seq}")
+
+        state = self.read_object(entries[start]["object"])["state"]
+        for entry in entries[start + 1:position + 1]:
+            state = apply_delta(state, self.read_object(entry["object"])["delta"])
+        return state
+
+    def verify(self) -> List[int]:
+        """Reconstruye todas las versiones y devuelve las que no coinciden con su hash"""
+        bad = []
+        state = None
+        for entry in self.entries():
+            payload = self.read_object(entry["object"])
+            state = payload["state"] if entry["type"] == "checkpoint" else apply_delta(state, payload["delta"])
+            if state_hash(state) != entry["state"]:
+                bad.append(entry["seq"])
+        return bad
+
+    def compact(self, keep: int) -> int:
+        """
+        Conserva solo las últimas `keep` versiones: la más antigua conservada pasa
+        a ser un checkpoint y se borran los objetos que ya no se usan.
+        Devuelve el número de entradas eliminadas.
+        """
+        entries = self.entries()
+        if keep <= 0 or len(entries) <= keep:
+            return 0
+
+        kept = entries[-keep:]
+        first = dict(kept[0])
+        if first["type"] != "checkpoint":
+            state = self.reconstruct(first["seq"])
+            first["type"] = "checkpoint"
+            first["object"] = self.write_object({"type": "checkpoint", "state": state})
+            first["changes"] = {}
+        first["parent"] = None
+        kept[0] = first
+
+        lines = "".join(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n" for entry in kept)
+        atomic_write_bytes(self.journal_path, lines.encode("utf-8"), skip_unchanged=False)
+
+        used = {entry["object"] for entry in kept}
+        for filename in os.listdir(self.objects_dir):
+            if filename.endswith(".json.gz") and filename[:-len(".json.gz")] not in used:
+                os.remove(os.path.join(self.objects_dir, filename))
+
+        return len(entries) - keep
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de versiones del torneo")
+    parser.add_argument("--dir", default=JOURNAL_DIR, help="Directorio del diario")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Lista las versiones")
+    subparsers.add_parser("verify", help="Comprueba que todas las versiones se reconstruyen")
+    restore_parser = subparsers.add_parser("restore", help="Reconstruye una versión")
+    restore_parser.add_argument("seq", type=int)
+    restore_parser.add_argument("--output", help="Archivo de salida (por defecto, la salida estándar)")
+    compact_parser = subparsers.add_parser("compact", help="Elimina las versiones antiguas")
+    compact_parser.add_argument("--keep", type=int, required=True, help="Versiones que se conservan")
+    args = parser.parse_args()
+
+    journal = SnapshotJournal(args.dir)
+
+    if args.command == "list":
+        for entry in journal.entries():
+            changes = ", ".join(f"{key}: {count}" for key, count in entry["changes"].items()) or "-"
+            print(f"{entry['seq']:5d}  {entry['type']:10s}  {entry['state']}  {entry['last_updated'] or '-':32s}  {changes}")
+    elif args.command == "verify":
+        bad = journal.verify()
+        if bad:
+            print(f"❌ Versiones que no coinciden: {bad}")
+            sys.exit(1)
+        print(f"✅ {len(journal.entries())} versiones verificadas")
+    elif args.command == "restore":
+        state = journal.reconstruct(args.seq)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            print(f"✅ Versión {args.seq} restaurada en {args.output}")
+        else:
+            json.dump(state, sys.stdout, ensure_ascii=False, indent=2)
+    elif args.command == "compact":
+        removed = journal.compact(args.keep)
+        print(f"✅ {removed} versiones eliminadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador de torneos y rankings sintéticos para los benchmarks
+
+Produce, a N veces el tamaño actual, los mismos archivos que usa el pipeline:
+- htmls-agp/<liga>-individual.html: rankings AGP con la tabla de la web
+- jsons-agp/<liga>_ranking.json: los mismos rankings ya extraídos
+- individual-lista-participantes.json: participantes con el formato de Cuescore
+- analisis_participantes_gallego.json: participantes emparejados con su ranking
+- individual-match-data.json: torneo de Cuescore (antes de empezar)
+- individual-match-data-live.json: el mismo torneo con partidas ya jugadas
+
+El cuadro se copia N veces del torneo real (tmp/individual-match-data.json),
+como si fueran N categorías, con los matchno, winnerNext y loserNext
+desplazados. Los nombres se generan a partir de listas fijas con una semilla,
+así que el resultado es reproducible.
+
+    python scripts/synthetic_tournament.py --scale 10 --output-dir tmp/synthetic-10x
+"""
+
+import argparse
+import copy
+import html
+import json
+import os
+import random
+import sys
+from typing import Dict, Any, List, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from bracket import WALKOVER_PLAYER_ID
+
+TEMPLATE_TOURNAMENT = "tmp/individual-match-data.json"
+
+# Tamaño actual: ligas y jugadores por liga de jsons-agp, 140 participantes
+BASE_LEAGUES = {
+    "chantada": 6, "condado": 4, "corunha": 35, "costa": 9, "lugo": 33, "ordenes": 24,
+    "orense": 12, "pontevedra": 44, "salnes": 18, "santiago": 28, "vigo": 70,
+}
+BASE_PARTICIPANTS = 140
+MATCHED_FRACTION = 0.9  # Participantes que aparecen en algún ranking
+LIVE_FINISHED_FRACTION = 0.5  # Partidas pendientes que se juegan en la versión "en juego"
+
+FIRST_NAMES = (
+    "Manuel", "José", "Antonio", "Francisco", "David", "Juan", "Javier", "Daniel", "Carlos", "Jesús",
+    "Alejandro", "Miguel", "Rafael", "Pablo", "Pedro", "Ángel", "Sergio", "Fernando", "Jorge", "Luis",
+    "Alberto", "Álvaro", "Adrián", "Diego", "Raúl", "Iván", "Rubén", "Óscar", "Andrés", "Ramón",
+    "Enrique", "Vicente", "Joaquín", "Santiago", "Eduardo", "Roberto", "Marcos", "Hugo", "Xosé", "Brais",
+    "María", "Carmen", "Lucía", "Paula", "Laura", "Marta", "Sara", "Andrea", "Uxía", "Noa",
+)
+SURNAMES = (
+    "García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez", "Gómez",
+    "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Álvarez", "Romero", "Alonso", "Gutiérrez",
+    "Navarro", "Torres", "Domínguez", "Vázquez", "Ramos", "Gil", "Ramírez", "Serrano", "Blanco", "Molina",
+    "Castro", "Otero", "Pazos", "Rial", "Souto", "Varela", "Seoane", "Lorenzo", "Costas", "Iglesias",
+    "Carballo", "Outeiro", "Piñeiro", "Vilas", "Fraga", "Mosquera", "Barreiro", "Castiñeiras", "Novoa",
+)
+
+RANKING_HTML_HEADER = """<html>
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<div style="font-weight: bold; font-size: 18pt; color: #0C748D">{title}</div>
+<table border="1" width="100%">
+  <tbody>
+"""
+RANKING_HTML_FOOTER = """  </tbody>
+</table>
+</body>
+</html>
+"""
+RANKING_COLUMNS = ("", "AGP", "NOMBRE", "P1", "P2", "P3", "P4", "P5", "P6", "P7", "P8", "P9",
+                   "PF", "PC", "DP", "P", "V", "T", "-P", "PT")
+
+def _cell(value: Any, bgcolor: str = "FFFFFF") -> str:
+    return (f'      <td bgcolor="{bgcolor}" align="center">\n'
+            f'        <div style="font-size: 8pt; color: #000000">{html.escape(str(value))}</div>\n'
+            f'      </td>\n')
+
+def _unique_names(count: int, rng: random.Random) -> List[str]:
+    """Nombres completos distintos (nombre + dos apellidos)"""
+    names = set()
+    result = []
+    while len(result) < count:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)} {rng.choice(SURNAMES)}"
+        if name not in names:
+            names.add(name)
+            result.append(name)
+    return result
+
+def generate_rankings(scale: int, rng: random.Random) -> Dict[str, Dict[str, Any]]:
+    """Rankings AGP por liga con el formato de jsons-agp (scale veces más jugadores)"""
+    total = sum(BASE_LEAGUES.values()) * scale
+    names = iter(_unique_names(total, rng))
+    next_agp = 10000
+    rankings = {}
+
+    for liga, base_count in BASE_LEAGUES.items():
+        players = []
+        for position in range(1, base_count * scale + 1):
+            pruebas = {f"p{i}": rng.choice((0, 0, 2, 4, 7, 8, 10, 14)) for i in range(1, 10)}
+            pf = rng.randint(0, 150)
+            pc = rng.randint(0, 150)
+            base = sum(pruebas.values())
+            extra = sum(1 for value in pruebas.values() if value) * 2
+            penalty = rng.choice((0, 0, 0, 7))
+            players.append({
+                "posicion": position,
+                "agp": str(next_agp),
+                "nombre": next(names).upper(),
+                "pruebas": pruebas,
+                "partidas": {"pf": pf, "pc": pc, "dp": pf - pc},
+                "puntos": {"p": base, "v": extra, "t": base + extra, "penalizaciones": penalty,
+                           "pt": base + extra - penalty},
+            })
+            next_agp += 1
+        rankings[liga] = {
+            "torneo": f"RANKING {liga.upper()} INDIVIDUAL (SINTÉTICO x{scale})",
+            "descripcion": "Datos generados para benchmarks",
+            "jugadores": players,
+        }
+    return rankings
+
+def render_ranking_html(ranking: Dict[str, Any]) -> str:
+    """Tabla HTML con la misma estructura que las páginas de AGP"""
+    parts = [RANKING_HTML_HEADER.format(title=html.escape(ranking["torneo"]))]
+    parts.append("<tr>\n" + "".join(_cell(column, "#0C748D") for column in RANKING_COLUMNS) + "    </tr>\n")
+    for player in ranking["jugadores"]:
+        puntos = player["puntos"]
+        partidas = player["partidas"]
+        values = ([player["posicion"], player["agp"], player["nombre"]]
+                  + [player["pruebas"][f"p{i}"] for i in range(1, 10)]
+                  + [partidas["pf"], partidas["pc"], partidas["dp"],
+                     puntos["p"], puntos["v"], puntos["t"], puntos["penalizaciones"], puntos["pt"]])
+        parts.append("<tr>\n" + "".join(_cell(value) for value in values) + "    </tr>\n")
+    parts.append(RANKING_HTML_FOOTER)
+    return "".join(parts)
+
+def _display_name(ranking_name: str, rng: random.Random) -> str:
+    """Nombre como lo escribe el jugador en Cuescore: capitalizado y a veces incompleto"""
+    words = ranking_name.title().split()
+    if len(words) > 2 and rng.random() < 0.3:
+        words = words[:-1]
+    return " ".join(words)
+
+def generate_participants(rankings: Dict[str, Dict[str, Any]], scale: int,
+                          rng: random.Random) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Participantes con el formato de Cuescore y su análisis de rankings
+    (el formato de analisis_participantes_gallego.json)
+    """
+    ranked = [(liga, player) for liga, ranking in rankings.items() for player in ranking["jugadores"]]
+    count = BASE_PARTICIPANTS * scale
+    matched = rng.sample(ranked, min(len(ranked), int(count * MATCHED_FRACTION)))
+    unknown = _unique_names(count - len(matched) + len(ranked), rng)
+    ranked_names = {player["nombre"].title() for _, player in ranked}
+    unknown = [name for name in unknown if name not in ranked_names][:count - len(matched)]
+
+    participants = []
+    analysis = []
+    for index, entry in enumerate(matched + [(None, name) for name in unknown]):
+        player_id = 20000000 + index
+        liga, source = entry
+        name = _display_name(source["nombre"], rng) if liga else source
+        first, _, last = name.partition(" ")
+        participants.append({
+            "playerId": player_id,
+            "name": name,
+            "firstname": first,
+            "lastname": last,
+            "url": f"https://cuescore.com/player/{name.replace(' ', '+')}/{player_id}",
+            "image": "",
+            "country": [],
+            "represents": [],
+        })
+
+        record = {"player_id": player_id, "nombre_gallego": name}
+        if liga:
+            puntos = source["puntos"]
+            record.update({
+                "nombre_ranking": source["nombre"],
+                "similitud": 1.0,
+                "liga": liga,
+                "posicion": source["posicion"],
+                "agp": source["agp"],
+                "puntos_totales": puntos["pt"],
+                "puntos_base": puntos["p"],
+                "puntos_extra": puntos["v"],
+                "penalizaciones": puntos["penalizaciones"],
+                "partidas_favor": source["partidas"]["pf"],
+                "partidas_contra": source["partidas"]["pc"],
+                "diferencia_partidas": source["partidas"]["dp"],
+                "pruebas_jugadas": sum(1 for value in source["pruebas"].values() if value),
+                "clasificado": source["posicion"] <= 8,
+            })
+        else:
+            record.update({"nombre_ranking": None, "similitud": 0, "liga": None, "posicion": None})
+        analysis.append(record)
+    return participants, analysis
+
+def _shift_next(value: Any, offset: int) -> Any:
+    return value + offset if isinstance(value, int) and value > 0 else value
+
+def generate_tournament(template: Dict[str, Any], participants: List[Dict[str, Any]],
+                        scale: int) -> Dict[str, Any]:
+    """
+    Copia el cuadro de la plantilla scale veces con los participantes generados.
+    Los jugadores reales de la plantilla se sustituyen en orden de aparición.
+    """
+    base_matches = template["matches"]
+    offset_step = max(match["matchno"] for match in base_matches)
+    matches = []
+    participant_iter = iter(participants)
+
+    for copy_index in range(scale):
+        offset = copy_index * offset_step
+        replacements: Dict[int, Dict[str, Any]] = {}
+        for match in base_matches:
+            new_match = copy.deepcopy(match)
+            new_match["matchId"] = match["matchId"] + offset * 1000
+            new_match["matchno"] = match["matchno"] + offset
+            new_match["winnerNext"] = _shift_next(match.get("winnerNext"), offset)
+            new_match["loserNext"] = _shift_next(match.get("loserNext"), offset)
+            for side in ("playerA", "playerB"):
+                player_id = match[side].get("playerId") or 0
+                if not player_id or player_id == WALKOVER_PLAYER_ID:
+                    if not player_id and match[side].get("name", "").startswith(("Winner of #", "Loser of #")):
+                        label, _, number = match[side]["name"].rpartition("#")
+                        new_match[side]["name"] = f"{label}#{int(number) + offset}"
+                    continue
+                if player_id not in replacements:
+                    replacements[player_id] = next(participant_iter, match[side])
+                new_match[side] = copy.deepcopy(replacements[player_id])
+            matches.append(new_match)
+
+    tournament = {key: value for key, value in template.items() if key != "matches"}
+    tournament["name"] = f"{template.get('name', '')} (SINTÉTICO x{scale})"
+    tournament["matches"] = matches
+    return tournament
+
+def play_matches(tournament: Dict[str, Any], fraction: float, rng: random.Random) -> Dict[str, Any]:
+    """
+    Versión "en juego" del torneo: se terminan `fraction` de las partidas
+    pendientes con resultados aleatorios y sube el curVersion de todas
+    """
+    live = copy.deepcopy(tournament)
+    for match in live["matches"]:
+        match["curVersion"] = (match.get("curVersion") or 0) + 1
+        if match.get("matchstatus") == "finished" or rng.random() >= fraction:
+            continue
+        race_to = match.get("raceTo") or 4
+        loser_score = rng.randint(0, race_to - 1)
+        if rng.random() < 0.5:
+            match["scoreA"], match["scoreB"] = race_to, loser_score
+        else:
+            match["scoreA"], match["scoreB"] = loser_score, race_to
+        match["matchstatus"] = "finished"
+        match["matchstatusCode"] = 2
+    return live
+
+def _write_json(path: str, data: Any):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def generate_dataset(output_dir: str, scale: int, seed: int = 33,
+                     template_file: str = TEMPLATE_TOURNAMENT) -> Dict[str, Any]:
+    """
+    Genera todos los archivos del conjunto sintético en output_dir.
+    Devuelve las rutas y los tamaños generados.
+    """
+    rng = random.Random(seed)
+    with open(template_file, "r", encoding="utf-8") as f:
+        template = json.load(f)
+
+    rankings = generate_rankings(scale, rng)
+    participants, analysis = generate_participants(rankings, scale, rng)
+    tournament = generate_tournament(template, participants, scale)
+    live = play_matches(tournament, LIVE_FINISHED_FRACTION, rng)
+
+    html_dir = os.path.join(output_dir, "htmls-agp")
+    json_dir = os.path.join(output_dir, "jsons-agp")
+    os.makedirs(html_dir, exist_ok=True)
+    os.makedirs(json_dir, exist_ok=True)
+    for liga, ranking in rankings.items():
+        with open(os.path.join(html_dir, f"{liga}-individual.html"), "w", encoding="utf-8") as f:
+            f.write(render_ranking_html(ranking))
+        _write_json(os.path.join(json_dir, f"{liga}_ranking.json"), ranking)
+
+    paths = {
+        "html_dir": html_dir,
+        "json_dir": json_dir,
+        "participants": os.path.join(output_dir, "individual-lista-participantes.json"),
+        "analysis": os.path.join(output_dir, "analisis_participantes_gallego.json"),
+        "tournament": os.path.join(output_dir, "individual-match-data.json"),
+        "live": os.path.join(output_dir, "individual-match-data-live.json"),
+    }
+    _write_json(paths["participants"], participants)
+    _write_json(paths["analysis"], analysis)
+    _write_json(paths["tournament"], tournament)
+    _write_json(paths["live"], live)
+
+    return {
+        "scale": scale,
+        "paths": paths,
+        "leagues": len(rankings),
+        "ranking_players": sum(len(ranking["jugadores"]) for ranking in rankings.values()),
+        "participants": len(participants),
+        "matches": len(tournament["matches"]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un torneo sintético para benchmarks")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplicador del tamaño actual")
+    parser.add_argument("--output-dir", required=True, help="Directorio de salida")
+    parser.add_argument("--seed", type=int, default=33)
+    parser.add_argument("--template", default=TEMPLATE_TOURNAMENT, help="Torneo de Cuescore usado como plantilla")
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.output_dir, args.scale, args.seed, args.template)
+    print(f"✅ Torneo sintético x{dataset['scale']} en {args.output_dir}")
+    print(f"   {dataset['leagues']} ligas, {dataset['ranking_players']} jugadores de ranking, "
+          f"{dataset['participants']} participantes, {dataset['matches']} partidas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén SQLite de torneos, partidas, jugadores y rankings
+
+Opcional (config.TOURNAMENT_DB / variable TOURNAMENT_DB o --db en los
+scripts): los JSON siguen siendo lo que se publica, y la base de datos es
+una copia indexada que se actualiza con upserts, partida a partida:
+
+- extract_ranking.py --db: rankings de cada liga (tablas leagues y rankings)
+- analyze_players.py --db: análisis de participantes (tabla analysis)
+- create_extended_tournament.py --db: torneo extendido completo (tablas
+  tournaments, matches y players)
+- refresh_tournament.py --db: solo las partidas del delta de cada actualización
+
+Cada fila guarda el objeto JSON original (columna data) además de las
+columnas indexadas (torneo, jugador, ronda, estado), así que el JSON del
+visor se exporta desde las vistas SQL con los mismos bytes:
+
+    python scripts/tournament_store.py import --db torneos.db
+    python scripts/tournament_store.py export --db torneos.db --tournament-id 63505243 -o tournament_extended.json
+    python scripts/tournament_store.py player --db torneos.db "Rafael Sarmiento"
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(__file__))
+from config import TOURNAMENT_ID, TOURNAMENT_FILE
+from json_io import load, loads, dumps, write_json
+from analyze_players import normalize_name, load_all_rankings
+from bracket import WALKOVER_PLAYER_ID
+
+STORE_SCHEMA_VERSION = 1
+ANALYSIS_NAME = "gallego"  # analisis_participantes_gallego.json
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS leagues (
+    liga TEXT PRIMARY KEY,
+    torneo TEXT,
+    jugadores INTEGER NOT NULL,
+    layout TEXT NOT NULL,          -- claves del JSON en orden
+    header TEXT NOT NULL,          -- resto de campos del JSON
+    content_hash TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rankings (
+    liga TEXT NOT NULL REFERENCES leagues(liga) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    posicion INTEGER,
+    agp TEXT,
+    nombre TEXT,
+    nombre_normalizado TEXT,
+    puntos_totales REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (liga, row)
+);
+CREATE INDEX IF NOT EXISTS rankings_nombre ON rankings(nombre_normalizado);
+CREATE INDEX IF NOT EXISTS rankings_agp ON rankings(agp);
+
+CREATE TABLE IF NOT EXISTS analysis (
+    name TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    player_id INTEGER,
+    liga TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (name, row)
+);
+CREATE INDEX IF NOT EXISTS analysis_player ON analysis(player_id);
+
+CREATE TABLE IF NOT EXISTS tournaments (
+    tournament_id TEXT PRIMARY KEY,
+    name TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    last_updated TEXT,
+    layout TEXT NOT NULL,
+    header TEXT NOT NULL,
+    players_format TEXT NOT NULL,  -- list o dict (clave en players.player_key)
+    players_hash TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    tournament_id TEXT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
+    match_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    matchno INTEGER,
+    round_name TEXT,
+    status TEXT,
+    player_a_id INTEGER,
+    player_b_id INTEGER,
+    score_a INTEGER,
+    score_b INTEGER,
+    race_to INTEGER,
+    cur_version INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, match_id)
+);
+CREATE INDEX IF NOT EXISTS matches_position ON matches(tournament_id, position);
+CREATE INDEX IF NOT EXISTS matches_round ON matches(tournament_id, round_name);
+CREATE INDEX IF NOT EXISTS matches_status ON matches(tournament_id, status);
+CREATE INDEX IF NOT EXISTS matches_player_a ON matches(player_a_id);
+CREATE INDEX IF NOT EXISTS matches_player_b ON matches(player_b_id);
+
+CREATE TABLE IF NOT EXISTS players (
+    tournament_id TEXT NOT NULL REFERENCES tournaments(tournament_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    player_key TEXT,
+    player_id INTEGER,
+    nombre TEXT,
+    liga TEXT,
+    posicion INTEGER,
+    puntos_totales REAL,
+    clasificado INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE INDEX IF NOT EXISTS players_player ON players(player_id);
+CREATE INDEX IF NOT EXISTS players_liga ON players(liga);
+
+-- Partidas en el orden del JSON publicado (export_tournament)
+CREATE VIEW IF NOT EXISTS v_tournament_matches AS
+    SELECT tournament_id, position, match_id, data FROM matches;
+
+-- Una fila por jugador y partida, con el resultado desde su lado
+CREATE VIEW IF NOT EXISTS v_player_matches AS
+    SELECT tournament_id, match_id, matchno, round_name, status, race_to,
+           player_a_id AS player_id, player_b_id AS opponent_id,
+           score_a AS frames_for, score_b AS frames_against
+    FROM matches WHERE player_a_id > 0
+    UNION ALL
+    SELECT tournament_id, match_id, matchno, round_name, status, race_to,
+           player_b_id, player_a_id, score_b, score_a
+    FROM matches WHERE player_b_id > 0;
+
+-- Balance de cada jugador en todos los torneos (sin walkovers ni huecos por decidir)
+CREATE VIEW IF NOT EXISTS v_player_records AS
+    SELECT player_id,
+           COUNT(DISTINCT tournament_id) AS tournaments,
+           COUNT(*) AS played,
+           SUM(frames_for > frames_against) AS won,
+           SUM(frames_for < frames_against) AS lost,
+           SUM(frames_for) AS frames_won,
+           SUM(frames_against) AS frames_lost
+    FROM v_player_matches
+    WHERE status = 'finished' AND opponent_id > 0 AND opponent_id != {WALKOVER_PLAYER_ID}
+          AND player_id != {WALKOVER_PLAYER_ID}
+    GROUP BY player_id;
+"""
+
+def _encode(data: Any) -> str:
+    return dumps(data, separators=(",", ":")).decode("utf-8")
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _split_document(data: Dict[str, Any], list_keys: Tuple[str, ...]) -> Tuple[str, str]:
+    # Orden de las claves y resto de campos; las listas van en sus tablas
+    layout = list(data)
+    header = {key: value for key, value in data.items() if key not in list_keys}
+    return _encode(layout), _encode(header)
+
+def _join_document(layout: str, header: str, lists: Dict[str, Any]) -> Dict[str, Any]:
+    fields = loads(header)
+    return {key: lists[key] if key in lists else fields[key] for key in loads(layout)}
+
+def _player_id(player: Any) -> Optional[int]:
+    return _int(player.get("playerId")) if isinstance(player, dict) else None
+
+def _match_row(tournament_id: str, position: int, match: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        tournament_id, match.get("matchId"), position, _int(match.get("matchno")),
+        match.get("roundName"), match.get("matchstatus"),
+        _player_id(match.get("playerA")), _player_id(match.get("playerB")),
+        _int(match.get("scoreA")), _int(match.get("scoreB")), _int(match.get("raceTo")),
+        _int(match.get("curVersion")), _encode(match),
+    )
+
+def _player_row(tournament_id: str, position: int, key: Optional[str], player: Dict[str, Any]) -> Tuple[Any, ...]:
+    clasificado = player.get("clasificado")
+    return (
+        tournament_id, position, key,
+        _int(player.get("player_id") or player.get("playerId") or player.get("id")),
+        player.get("nombre_gallego") or player.get("name"), player.get("liga"),
+        _int(player.get("posicion")), player.get("puntos_totales"),
+        None if clasificado is None else int(bool(clasificado)),
+        _encode(player),
+    )
+
+class TournamentStore:
+    """Conexión al almacén SQLite (se crea el esquema si no existe)"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self._migrate()
+
+    def _migrate(self):
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?) "
+                              "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                              (str(STORE_SCHEMA_VERSION),))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "TournamentStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Rankings de las ligas
+
+    def upsert_ranking(self, liga: str, ranking: Dict[str, Any]) -> bool:
+        """
+        Guarda el ranking de una liga (JSON de extract_ranking.py).
+        Devuelve False si el contenido no ha cambiado.
+        """
+        players = ranking.get("jugadores", [])
+        layout, header = _split_document(ranking, ("jugadores",))
+        rows = [_encode(player) for player in players]
+        content_hash = _hash(layout + header + "\n".join(rows))
+
+        current = self.conn.execute("SELECT content_hash FROM leagues WHERE liga = ?", (liga,)).fetchone()
+        if current and current[0] == content_hash:
+            return False
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO leagues (liga, torneo, jugadores, layout, header, content_hash, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(liga) DO UPDATE SET "
+                "torneo = excluded.torneo, jugadores = excluded.jugadores, layout = excluded.layout, "
+                "header = excluded.header, content_hash = excluded.content_hash, updated = excluded.updated",
+                (liga, ranking.get("torneo"), len(players), layout, header, content_hash,
+                 datetime.now().isoformat()),
+            )
+            self.conn.execute("DELETE FROM rankings WHERE liga = ?", (liga,))
+            self.conn.executemany(
+                "INSERT INTO rankings (liga, row, posicion, agp, nombre, nombre_normalizado, puntos_totales, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(liga, row, _int(player.get("posicion")), player.get("agp"), player.get("nombre"),
+                  normalize_name(player.get("nombre") or ""), (player.get("puntos") or {}).get("pt"), data)
+                 for row, (player, data) in enumerate(zip(players, rows))],
+            )
+        return True
+
+    def load_rankings(self) -> Dict[str, Dict[str, Any]]:
+        """Rankings por liga con el mismo formato que analyze_players.load_all_rankings"""
+        players: Dict[str, List[Any]] = {}
+        for liga, data in self.conn.execute("SELECT liga, data FROM rankings ORDER BY liga, row"):
+            players.setdefault(liga, []).append(loads(data))
+        return {liga: _join_document(layout, header, {"jugadores": players.get(liga, [])})
+                for liga, layout, header in self.conn.execute(
+                    "SELECT liga, layout, header FROM leagues ORDER BY liga")}
+
+    # Análisis de participantes
+
+    def save_analysis(self, records: List[Dict[str, Any]], name: str = ANALYSIS_NAME):
+        """Reemplaza el análisis de participantes (analyze_players.py)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM analysis WHERE name = ?", (name,))
+            self.conn.executemany(
+                "INSERT INTO analysis (name, row, player_id, liga, data) VALUES (?, ?, ?, ?, ?)",
+                [(name, row, _int(record.get("player_id")), record.get("liga"), _encode(record))
+                 for row, record in enumerate(records)],
+            )
+
+    def load_analysis(self, name: str = ANALYSIS_NAME) -> List[Dict[str, Any]]:
+        return [loads(data) for (data,) in self.conn.execute(
+            "SELECT data FROM analysis WHERE name = ? ORDER BY row", (name,))]
+
+    # Torneos
+
+    def upsert_tournament(self, tournament_id: str, data: Dict[str, Any],
+                          match_delta: Optional[Dict[str, List[Any]]] = None) -> Dict[str, int]:
+        """
+        Guarda el torneo extendido. Con match_delta (refresh_tournament.py)
+        solo se escriben las partidas modificadas; sin él se comparan todas y
+        solo se actualizan las que han cambiado. Devuelve las filas escritas.
+        """
+        tournament_id = str(tournament_id)
+        matches = data.get("matches", [])
+        players = data.get("players", [])
+        layout, header = _split_document(data, ("matches", "players"))
+        players_format = "dict" if isinstance(players, dict) else "list"
+        player_items = list(players.items()) if isinstance(players, dict) else [(None, player) for player in players]
+        player_rows = [_player_row(tournament_id, position, key, player)
+                       for position, (key, player) in enumerate(player_items)]
+        players_hash = _hash("\n".join(row[-1] for row in player_rows))
+
+        counts = {"matches": 0, "removed": 0, "players": 0}
+        with self.conn:
+            current = self.conn.execute("SELECT players_hash FROM tournaments WHERE tournament_id = ?",
+                                        (tournament_id,)).fetchone()
+            self.conn.execute(
+                "INSERT INTO tournaments (tournament_id, name, start_date, end_date, last_updated, layout, header, "
+                "players_format, players_hash, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(tournament_id) DO UPDATE SET name = excluded.name, start_date = excluded.start_date, "
+                "end_date = excluded.end_date, last_updated = excluded.last_updated, layout = excluded.layout, "
+                "header = excluded.header, players_format = excluded.players_format, "
+                "players_hash = excluded.players_hash, updated = excluded.updated",
+                (tournament_id, (data.get("tournament_info") or {}).get("name"),
+                 data.get("tournament_start_date"), data.get("tournament_end_date"), data.get("last_updated"),
+                 layout, header, players_format, players_hash, datetime.now().isoformat()),
+            )
+
+            # Si cambia el número de partidas cambian las posiciones: se comparan todas
+            partial = (match_delta is not None and current is not None
+                       and not match_delta.get("added") and not match_delta.get("removed"))
+            if partial:
+                changed = set(match_delta.get("changed", []))
+                rows = [_match_row(tournament_id, position, match)
+                        for position, match in enumerate(matches) if match.get("matchId") in changed]
+            else:
+                rows = [_match_row(tournament_id, position, match) for position, match in enumerate(matches)]
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO matches (tournament_id, match_id, position, matchno, round_name, status, player_a_id, "
+                "player_b_id, score_a, score_b, race_to, cur_version, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(tournament_id, match_id) DO UPDATE SET "
+                "position = excluded.position, matchno = excluded.matchno, round_name = excluded.round_name, "
+                "status = excluded.status, player_a_id = excluded.player_a_id, player_b_id = excluded.player_b_id, "
+                "score_a = excluded.score_a, score_b = excluded.score_b, race_to = excluded.race_to, "
+                "cur_version = excluded.cur_version, data = excluded.data "
+                "WHERE matches.data != excluded.data OR matches.position != excluded.position",
+                rows,
+            )
+            counts["matches"] = self.conn.total_changes - before
+            if not partial:
+                cursor = self.conn.execute(
+                    "DELETE FROM matches WHERE tournament_id = ? AND match_id NOT IN (SELECT value FROM json_each(?))",
+                    (tournament_id, _encode([match.get("matchId") for match in matches])),
+                )
+                counts["removed"] = cursor.rowcount
+
+            if current is None or current[0] != players_hash:
+                self.conn.execute("DELETE FROM players WHERE tournament_id = ?", (tournament_id,))
+                self.conn.executemany(
+                    "INSERT INTO players (tournament_id, position, player_key, player_id, nombre, liga, posicion, "
+                    "puntos_totales, clasificado, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    player_rows,
+                )
+                counts["players"] = len(player_rows)
+        return counts
+
+    def export_tournament(self, tournament_id: str) -> Optional[Dict[str, Any]]:
+        """Reconstruye el JSON extendido del torneo desde las vistas (None si no existe)"""
+        tournament_id = str(tournament_id)
+        row = self.conn.execute("SELECT layout, header, players_format FROM tournaments WHERE tournament_id = ?",
+                                (tournament_id,)).fetchone()
+        if row is None:
+            return None
+        layout, header, players_format = row
+
+        matches = [loads(data) for (data,) in self.conn.execute(
+            "SELECT data FROM v_tournament_matches WHERE tournament_id = ? ORDER BY position", (tournament_id,))]
+        player_rows = self.conn.execute(
+            "SELECT player_key, data FROM players WHERE tournament_id = ? ORDER BY position", (tournament_id,))
+        if players_format == "dict":
+            players: Any = {key: loads(data) for key, data in player_rows}
+        else:
+            players = [loads(data) for _, data in player_rows]
+        return _join_document(layout, header, {"matches": matches, "players": players})
+
+    # Consultas
+
+    def find_player_ids(self, query: str) -> List[int]:
+        """playerId de los jugadores cuyo nombre contiene la consulta (sin acentos) o con ese playerId"""
+        if query.isdigit():
+            return [int(query)]
+        needle = normalize_name(query)
+        return sorted({player_id for player_id, name in self.conn.execute(
+            "SELECT DISTINCT player_id, nombre FROM players WHERE player_id IS NOT NULL")
+            if name and needle in normalize_name(name)})
+
+    def player_report(self, player_id: int) -> Dict[str, Any]:
+        """Balance en todos los torneos, partidas y posición en los rankings de un jugador"""
+        record = self.conn.execute(
+            "SELECT tournaments, played, won, lost, frames_won, frames_lost FROM v_player_records WHERE player_id = ?",
+            (player_id,)).fetchone()
+        matches = self.conn.execute(
+            "SELECT tournament_id, matchno, round_name, status, opponent_id, frames_for, frames_against "
+            "FROM v_player_matches WHERE player_id = ? ORDER BY tournament_id, matchno", (player_id,)).fetchall()
+        entries = self.conn.execute(
+            "SELECT DISTINCT p.nombre, p.liga, p.posicion, p.puntos_totales FROM players p "
+            "WHERE p.player_id = ?", (player_id,)).fetchall()
+        return {"record": record, "matches": matches, "entries": entries}
+
+    def stats(self) -> Dict[str, int]:
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("leagues", "rankings", "analysis", "tournaments", "matches", "players")}
+
+def open_store(path: Optional[str]) -> Optional[TournamentStore]:
+    """Abre el almacén si hay ruta configurada (None si está desactivado)"""
+    return TournamentStore(path) if path else None
+
+def import_files(store: TournamentStore, jsons_dir: str, analysis_file: str,
+                 tournament_file: str, tournament_id: str):
+    """Importa los JSON existentes (rankings, análisis y torneo extendido)"""
+    rankings = load_all_rankings(jsons_dir)
+    for liga, ranking in rankings.items():
+        store.upsert_ranking(liga, ranking)
+    print(f"🏆 {len(rankings)} rankings importados")
+
+    if os.path.exists(analysis_file):
+        store.save_analysis(load(analysis_file))
+        print(f"🔍 Análisis importado: {analysis_file}")
+
+    if os.path.exists(tournament_file):
+        counts = store.upsert_tournament(tournament_id, load(tournament_file))
+        print(f"🎱 Torneo {tournament_id}: {counts['matches']} partidas y {counts['players']} jugadores escritos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén SQLite de torneos y rankings")
+    parser.add_argument("command", choices=["import", "export", "player", "stats"])
+    parser.add_argument("query", nargs="?", help="Nombre o playerId (comando player)")
+    parser.add_argument("--db", default=os.environ.get("TOURNAMENT_DB") or "tournaments.db",
+                        help="Archivo SQLite (por defecto $TOURNAMENT_DB o tournaments.db)")
+    parser.add_argument("--tournament-id", default=TOURNAMENT_ID)
+    parser.add_argument("--rankings", default="jsons-agp", help="Directorio de rankings (import)")
+    parser.add_argument("--analysis", default="analisis_participantes_gallego.json", help="Análisis (import)")
+    parser.add_argument("--tournament-file", default=TOURNAMENT_FILE, help="JSON extendido (import)")
+    parser.add_argument("-o", "--output", default=None, help="Archivo de salida (export)")
+    args = parser.parse_intermixed_args()
+
+    with TournamentStore(args.db) as store:
+        if args.command == "import":
+            import_files(store, args.rankings, args.analysis, args.tournament_file, args.tournament_id)
+        elif args.command == "export":
+            data = store.export_tournament(args.tournament_id)
+            if data is None:
+                print(f"❌ Torneo no encontrado: {args.tournament_id}")
+                sys.exit(1)
+            output = args.output or TOURNAMENT_FILE
+            write_json(output, data)
+            print(f"✅ {len(data.get('matches', []))} partidas exportadas a {output}")
+        elif args.command == "player":
+            if not args.query:
+                parser.error("player necesita un nombre o playerId")
+            for player_id in store.find_player_ids(args.query):
+                report = store.player_report(player_id)
+                names = ", ".join(f"{name} ({liga or 'sin liga'} #{position})" for name, liga, position, _ in report["entries"])
+                print(f"\n👤 {player_id}: {names}")
+                if report["record"]:
+                    tournaments, played, won, lost, frames_won, frames_lost = report["record"]
+                    print(f"   {tournaments} torneos, {played} partidas: {won}-{lost}, frames {frames_won}-{frames_lost}")
+                for tournament_id, matchno, round_name, status, opponent, frames_for, frames_against in report["matches"]:
+                    print(f"   [{tournament_id}] #{matchno} {round_name}: {frames_for}-{frames_against} contra {opponent} ({status})")
+        else:
+            for table, count in store.stats().items():
+                print(f"   {table:<12} {count}")
+
+if __name__ == "__main__":
+    main()
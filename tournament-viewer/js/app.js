@@ -3,12 +3,202 @@
 // Variable global para los datos del torneo
 let tournamentData = null;
 
+// Tablas del formato compacto (jugadores, rondas) para expandir los shards
+let compactTables = null;
+
+// Índice de shards de partidas por ronda (null si se cargó el archivo completo)
+let matchShardIndex = null;
+let matchShardBase = "";
+
+// Partidas compactas ya descargadas por shard: { id: { version, matches } }
+const loadedMatchShards = {};
+
+// Artefacto del índice de búsqueda indicado por el manifest (ver filters.js)
+let searchArtifact = null;
+
+// Versión máxima del esquema compacto que entiende el visor
+const COMPACT_SCHEMA = "torneo-gallego-compact";
+const COMPACT_SCHEMA_VERSION = 1;
+
+// Construye el bloque ranking_info de un jugador de la tabla compacta
+function buildRankingInfo(player) {
+  return {
+    liga: player.liga,
+    posicion_liga: player.posicion,
+    puntos_totales: player.puntos_totales,
+    puntos_base: player.puntos_base,
+    partidas_favor: player.partidas_favor,
+    partidas_contra: player.partidas_contra,
+    diferencia_partidas: player.diferencia_partidas,
+    clasificado: player.clasificado,
+    agp: player.agp,
+    pruebas_jugadas: player.pruebas_jugadas,
+  };
+}
+
+// Reconstruye un jugador de partida a partir de su playerId
+function expandMatchPlayer(match, side, players) {
+  const playerId = match[side] || 0;
+  const entry = playerId ? players[playerId] : null;
+  const name = match[`${side}Name`] || (entry ? entry.name : "");
+
+  return {
+    playerId: playerId,
+    name: name,
+    ranking_info: entry && "liga" in entry ? buildRankingInfo(entry) : null,
+    elo: entry && entry.elo !== undefined ? entry.elo : null,
+  };
+}
+
+// Reconstruye una partida compacta usando las tablas de jugadores y rondas
+function expandCompactMatch(match, tables) {
+  const { a, b, aName, bName, ...fields } = match;
+  return {
+    ...fields,
+    roundName: tables.rounds[match.round] || "",
+    discipline: tables.discipline,
+    playerA: expandMatchPlayer(match, "a", tables.players),
+    playerB: expandMatchPlayer(match, "b", tables.players),
+  };
+}
+
+// Reconstruye la vista combinada a partir del formato compacto
+function expandCompactTournament(compact) {
+  if (
+    compact.schema !== COMPACT_SCHEMA ||
+    compact.schema_version > COMPACT_SCHEMA_VERSION
+  ) {
+    throw new Error("Esquema de datos no soportado");
+  }
+
+  const players = compact.participants.map((playerId) => {
+    const { name, ...entry } = compact.players[playerId];
+    return { player_id: playerId, nombre_gallego: name, ...entry };
+  });
+
+  const matches = compact.matches.map((match) =>
+    expandCompactMatch(match, compact)
+  );
+
+  const {
+    schema,
+    schema_version,
+    discipline,
+    rounds,
+    participants,
+    ...rest
+  } = compact;
+  return { ...rest, players: players, matches: matches };
+}
+
+// Descarga el manifest que apunta al artefacto de datos actual
+async function fetchManifest() {
+  const response = await fetch("./data/manifest.json", { cache: "no-cache" });
+  if (!response.ok) {
+    throw new Error("Manifest no disponible");
+  }
+  return response.json();
+}
+
+// Carga los datos del torneo, usando el formato compacto si está disponible
+async function loadTournamentData(fetchOptions = {}, manifest = null) {
+  try {
+    const currentManifest = manifest || (await fetchManifest());
+    const core = currentManifest.artifacts && currentManifest.artifacts.core;
+    searchArtifact =
+      (currentManifest.artifacts && currentManifest.artifacts.search) || null;
+
+    // Con shards solo se descarga el core; las partidas se cargan por ronda
+    if (core && currentManifest.shards) {
+      const [coreResponse, indexResponse] = await Promise.all([
+        fetch(`./data/${core.file}`),
+        fetch(
+          `./data/${currentManifest.shards.index}?v=${currentManifest.shards.version}`
+        ),
+      ]);
+      if (coreResponse.ok && indexResponse.ok) {
+        compactTables = await coreResponse.json();
+        matchShardIndex = await indexResponse.json();
+        matchShardBase = currentManifest.shards.index.replace(/[^/]*$/, "");
+        return expandCompactTournament({ ...compactTables, matches: [] });
+      }
+    }
+
+    // Los artefactos con hash son inmutables, se aprovecha la caché del navegador
+    const response = await fetch(`./data/${currentManifest.current}`);
+    if (response.ok) {
+      matchShardIndex = null;
+      return expandCompactTournament(await response.json());
+    }
+  } catch (error) {
+    console.log("Manifest no disponible:", error);
+  }
+
+  matchShardIndex = null;
+  searchArtifact = null;
+
+  try {
+    const response = await fetch("./data/tournament.min.json", fetchOptions);
+    if (response.ok) {
+      return expandCompactTournament(await response.json());
+    }
+  } catch (error) {
+    console.log("Formato compacto no disponible:", error);
+  }
+
+  const response = await fetch("./data/tournament_extended.json", fetchOptions);
+  if (!response.ok) {
+    throw new Error("Error al cargar datos");
+  }
+  return response.json();
+}
+
+// Descarga los shards necesarios para una ronda (todas si roundName está vacío)
+async function ensureMatchShards(roundName) {
+  if (!matchShardIndex) return;
+
+  const shards = matchShardIndex.shards.filter(
+    (shard) => !roundName || shard.roundName === roundName
+  );
+  const missing = shards.filter(
+    (shard) =>
+      !loadedMatchShards[shard.id] ||
+      loadedMatchShards[shard.id].version !== shard.version
+  );
+
+  await Promise.all(
+    missing.map(async (shard) => {
+      const response = await fetch(
+        `./data/${matchShardBase}${shard.file}?v=${shard.version}`
+      );
+      if (!response.ok) {
+        throw new Error(`Error al cargar el shard ${shard.id}`);
+      }
+      const data = await response.json();
+      loadedMatchShards[shard.id] = {
+        version: shard.version,
+        matches: data.matches,
+      };
+    })
+  );
+
+  // Descartar shards que ya no aparecen en el índice
+  const currentIds = new Set(matchShardIndex.shards.map((shard) => shard.id));
+  Object.keys(loadedMatchShards).forEach((id) => {
+    if (!currentIds.has(id)) delete loadedMatchShards[id];
+  });
+
+  tournamentData.matches = Object.values(loadedMatchShards)
+    .flatMap((shard) => shard.matches)
+    .sort((a, b) => a.matchno - b.matchno)
+    .map((match) => expandCompactMatch(match, compactTables));
+}
+
 // Función de inicialización
 async function initApp() {
   try {
     // Cargar datos del torneo
-    const response = await fetch("./data/tournament_extended.json");
-    tournamentData = await response.json();
+    tournamentData = await loadTournamentData();
 
     // Inicializar la aplicación
     populateFilterOptions();
@@ -117,8 +307,15 @@ function renderPlayersTab() {
 }
 
 // Función para renderizar tab de partidas
-function renderMatchesTab() {
+async function renderMatchesTab() {
   const matchesContainer = document.getElementById("matchesContainer");
+
+  try {
+    await ensureMatchShards(currentMatchFilters.round);
+  } catch (error) {
+    console.error("Error al cargar partidas:", error);
+  }
+
   const filteredMatches = filterMatches(tournamentData.matches);
 
   if (filteredMatches.length === 0) {
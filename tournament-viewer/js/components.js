@@ -67,8 +67,8 @@ function renderPlayerCard(player) {
 
 // Componente para renderizar tarjeta de partida
 function renderMatchCard(match) {
-  const playerA = findPlayerByName(match.playerA.name);
-  const playerB = findPlayerByName(match.playerB.name);
+  const playerA = findPlayerById(match.playerA.playerId);
+  const playerB = findPlayerById(match.playerB.playerId);
   const rankInfoA = playerA ? getPlayerRank(playerA) : null;
   const rankInfoB = playerB ? getPlayerRank(playerB) : null;
 
@@ -89,13 +89,13 @@ function renderMatchCard(match) {
                         <div class="player-name-clickable ${
                           rankInfoA ? "has-ranking" : ""
                         }" 
-                             onmouseover="if(window.innerWidth > 768) showPlayerTooltip(event, '${escapeHtml(
-                               match.playerA.name
-                             )}')" 
+                             onmouseover="if(window.innerWidth > 768) showPlayerTooltip(event, ${
+                               match.playerA.playerId
+                             })" 
                              onmouseout="if(window.innerWidth > 768) hidePlayerTooltip()" 
-                             onclick="showPlayerModal('${escapeHtml(
-                               match.playerA.name
-                             )}')" 
+                             onclick="showPlayerModal(${
+                               match.playerA.playerId
+                             })" 
                              style="font-weight: bold;">
                             ${rankInfoA ? `${rankInfoA.crown} ` : ""}
                             ${escapeHtml(match.playerA.name)}
@@ -109,6 +109,15 @@ function renderMatchCard(match) {
                         `
                             : ""
                         }
+                        ${
+                          match.playerA.elo
+                            ? `
+                            <div style="font-size: 0.8em; color: #666;">
+                                Elo ${match.playerA.elo}
+                            </div>
+                        `
+                            : ""
+                        }
                     </div>
                 </div>
                 
@@ -119,13 +128,13 @@ function renderMatchCard(match) {
                         <div class="player-name-clickable ${
                           rankInfoB ? "has-ranking" : ""
                         }" 
-                             onmouseover="if(window.innerWidth > 768) showPlayerTooltip(event, '${escapeHtml(
-                               match.playerB.name
-                             )}')" 
+                             onmouseover="if(window.innerWidth > 768) showPlayerTooltip(event, ${
+                               match.playerB.playerId
+                             })" 
                              onmouseout="if(window.innerWidth > 768) hidePlayerTooltip()" 
-                             onclick="showPlayerModal('${escapeHtml(
-                               match.playerB.name
-                             )}')" 
+                             onclick="showPlayerModal(${
+                               match.playerB.playerId
+                             })" 
                              style="font-weight: bold;">
                             ${rankInfoB ? `${rankInfoB.crown} ` : ""}
                             ${escapeHtml(match.playerB.name)}
@@ -139,6 +148,15 @@ function renderMatchCard(match) {
                         `
                             : ""
                         }
+                        ${
+                          match.playerB.elo
+                            ? `
+                            <div style="font-size: 0.8em; color: #666;">
+                                Elo ${match.playerB.elo}
+                            </div>
+                        `
+                            : ""
+                        }
                     </div>
                 </div>
             </div>
@@ -180,8 +198,8 @@ function renderLigaCard(liga, stats) {
 }
 
 // Función para mostrar tooltip de jugador
-function showPlayerTooltip(event, playerName) {
-  const player = findPlayerByName(playerName);
+function showPlayerTooltip(event, playerId) {
+  const player = findPlayerById(playerId);
   if (!player || !player.liga) return;
 
   const tooltip = document.getElementById("playerTooltip");
@@ -220,9 +238,141 @@ function hidePlayerTooltip() {
   tooltip.classList.remove("show");
 }
 
+// Nombre de un jugador del cuadro a partir de su playerId
+function getBracketPlayerName(bracket, playerId) {
+  return bracket.names[playerId] || (playerId === 1000615 ? "Walk Over" : `#${playerId}`);
+}
+
+// Próxima partida, rivales y camino del jugador según el cuadro precalculado
+function renderPlayerBracket(playerId) {
+  const bracket = tournamentData.bracket;
+  const view = bracket && bracket.players[playerId];
+  if (!view) return "";
+
+  const statusText = {
+    champion: "🏆 Campeón",
+    qualified: "✓ Clasificado para el cuadro final",
+    eliminated: "Eliminado",
+  };
+  if (!view.match) {
+    return `
+            <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+                <h4 style="margin: 0 0 10px 0; color: #1e3c72;">Cuadro</h4>
+                <div>${statusText[view.status] || view.status}</div>
+            </div>
+        `;
+  }
+
+  let opponentText = "Por decidir";
+  if (view.opponent) {
+    opponentText = escapeHtml(getBracketPlayerName(bracket, view.opponent));
+  } else if (view.candidates && view.candidates.length) {
+    opponentText = view.candidates
+      .map((id) => escapeHtml(getBracketPlayerName(bracket, id)))
+      .join(" / ");
+  } else if (view.candidateCount) {
+    opponentText = `Uno de ${view.candidateCount} jugadores`;
+  }
+
+  return `
+            <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+                <h4 style="margin: 0 0 10px 0; color: #1e3c72;">Próxima Partida</h4>
+                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 10px;">
+                    <div>
+                        <strong>Partida:</strong> #${view.match} (${escapeHtml(
+    view.roundName
+  )})
+                    </div>
+                    <div>
+                        <strong>Rival:</strong> ${opponentText}
+                    </div>
+                    <div>
+                        <strong>Si gana:</strong> ${
+                          view.ifWin ? `#${view.ifWin}` : "Fin del cuadro"
+                        }
+                    </div>
+                    <div>
+                        <strong>Si pierde:</strong> ${
+                          view.ifLose ? `#${view.ifLose}` : "Eliminado"
+                        }
+                    </div>
+                </div>
+                <div style="margin-top: 10px; color: #666;">
+                    <strong>Camino:</strong> ${view.path
+                      .map((matchno) => `#${matchno}`)
+                      .join(" → ")}
+                </div>
+            </div>
+        `;
+}
+
+// Fichas de jugador ya descargadas: { playerId: { version, detail } }
+const loadedPlayerDetails = {};
+
+// Descarga la ficha de un jugador (data/players/<id>.json) solo cuando se necesita
+async function loadPlayerDetail(player) {
+  const cached = loadedPlayerDetails[player.player_id];
+  if (cached && cached.version === player.v) {
+    return cached.detail;
+  }
+
+  const response = await fetch(
+    `./data/players/${player.player_id}.json?v=${player.v}`
+  );
+  if (!response.ok) {
+    throw new Error(`Error al cargar la ficha del jugador ${player.player_id}`);
+  }
+  const detail = await response.json();
+  loadedPlayerDetails[player.player_id] = { version: player.v, detail: detail };
+  return detail;
+}
+
+// Historial de partidas de la ficha del jugador
+function renderPlayerHistory(detail) {
+  if (!detail.history.length) {
+    return '<div style="color: #999; font-style: italic;">Sin partidas</div>';
+  }
+
+  return detail.history
+    .map(
+      (entry) => `
+            <div style="display: flex; justify-content: space-between; padding: 4px 0; border-bottom: 1px solid #eee;">
+                <span>#${entry.matchno} ${escapeHtml(entry.roundName)}</span>
+                <span>${escapeHtml(entry.opponentName || "Por decidir")}</span>
+                <span>${
+                  entry.result
+                    ? `${entry.result === "W" ? "✓" : "✗"} ${entry.score[0]}-${
+                        entry.score[1]
+                      }`
+                    : getStatusText(entry.status)
+                }</span>
+            </div>
+        `
+    )
+    .join("");
+}
+
+// Rellena el historial del modal cuando llega la ficha del jugador
+async function fillPlayerHistory(player) {
+  const container = document.getElementById("playerHistory");
+  if (!container) return;
+
+  try {
+    const detail = await loadPlayerDetail(player);
+    // El usuario puede haber abierto otro jugador mientras tanto
+    if (container.dataset.playerId === String(player.player_id)) {
+      container.innerHTML = renderPlayerHistory(detail);
+    }
+  } catch (error) {
+    console.error("Error al cargar la ficha del jugador:", error);
+    container.innerHTML =
+      '<div style="color: #999; font-style: italic;">Historial no disponible</div>';
+  }
+}
+
 // Función para mostrar modal de jugador
-function showPlayerModal(playerName) {
-  const player = findPlayerByName(playerName);
+function showPlayerModal(playerId) {
+  const player = findPlayerById(playerId);
   if (!player) return;
 
   const modal = document.getElementById("playerModal");
@@ -316,9 +466,32 @@ function showPlayerModal(playerName) {
             </div>
         `
         }
+
+        ${renderPlayerBracket(player.player_id)}
+
+        ${
+          player.v
+            ? `
+            <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+                <h4 style="margin: 0 0 10px 0; color: #1e3c72;">Partidas en el torneo (${
+                  player.won
+                }-${player.lost}, frames ${player.framesWon}-${
+                player.framesLost
+              }${player.elo ? `, Elo ${player.elo}` : ""})</h4>
+                <div id="playerHistory" data-player-id="${player.player_id}">
+                    <div style="color: #999; font-style: italic;">Cargando historial...</div>
+                </div>
+            </div>
+        `
+            : ""
+        }
     `;
 
   modal.classList.add("show");
+
+  if (player.v) {
+    fillPlayerHistory(player);
+  }
 }
 
 // Función para cerrar modal
@@ -14,33 +14,154 @@ let currentMatchFilters = {
   status: "",
 };
 
+// Índice de búsqueda precalculado (search.<sha>.json) y artefacto del que viene
+let searchIndex = null;
+let searchIndexFile = null;
+
+// Normaliza un texto igual que analyze_players.normalize_name en Python
+function foldText(text) {
+  return (text || "")
+    .toLowerCase()
+    .normalize("NFD")
+    .replace(/[\u0300-\u036f]/g, "")
+    .replace(/[^\p{L}\p{N}_\s]/gu, "")
+    .replace(/\s+/g, " ")
+    .trim();
+}
+
+// Descarga el índice de búsqueda la primera vez que se usa un filtro
+async function ensureSearchIndex() {
+  if (!searchArtifact) {
+    searchIndex = null;
+    return;
+  }
+  if (searchIndexFile === searchArtifact.file) return;
+
+  try {
+    const response = await fetch(`./data/${searchArtifact.file}`);
+    if (!response.ok) throw new Error("Índice de búsqueda no disponible");
+    searchIndex = await response.json();
+    searchIndexFile = searchArtifact.file;
+  } catch (error) {
+    // Sin índice se filtra comparando los textos normalizados
+    console.log("Índice de búsqueda no disponible:", error);
+    searchIndex = null;
+  }
+}
+
+// Intersección de dos conjuntos (null representa "sin filtro")
+function intersectSets(a, b) {
+  if (a === null) return b;
+  if (b === null) return a;
+  const [small, large] = a.size <= b.size ? [a, b] : [b, a];
+  return new Set([...small].filter((value) => large.has(value)));
+}
+
+// Documentos del índice cuyo nombre o liga tiene un token que empieza por token
+function searchToken(token) {
+  const docs = searchIndex.tokens[token.slice(0, searchIndex.prefixMax)] || [];
+  if (token.length <= searchIndex.prefixMax) return new Set(docs);
+  return new Set(
+    docs.filter((doc) =>
+      searchIndex.keys[doc].split(" ").some((word) => word.startsWith(token))
+    )
+  );
+}
+
+// Documentos que cumplen todos los tokens de la consulta (null si está vacía)
+function searchPeopleDocs(query) {
+  return foldText(query)
+    .split(" ")
+    .filter((token) => token)
+    .reduce((result, token) => intersectSets(result, searchToken(token)), null);
+}
+
+// playerId de los jugadores que cumplen búsqueda, liga y estado
+function searchPeople(filters) {
+  let docs = searchPeopleDocs(filters.search);
+  if (filters.liga) {
+    docs = intersectSets(docs, new Set(searchIndex.facets.liga[filters.liga]));
+  }
+  if (filters.status) {
+    docs = intersectSets(
+      docs,
+      new Set(searchIndex.facets.status[filters.status])
+    );
+  }
+  return docs === null
+    ? null
+    : new Set([...docs].map((doc) => searchIndex.people[doc]));
+}
+
+// matchno de las partidas que cumplen búsqueda, ronda y estado
+function searchMatches(filters) {
+  const index = searchIndex.matches;
+  let result = null;
+
+  foldText(filters.search)
+    .split(" ")
+    .filter((token) => token)
+    .forEach((token) => {
+      // Partidas de los jugadores que coinciden más las de las rondas que coinciden
+      const matchnos = new Set();
+      searchToken(token).forEach((doc) =>
+        index.byPerson[doc].forEach((matchno) => matchnos.add(matchno))
+      );
+      (index.roundTokens[token.slice(0, searchIndex.prefixMax)] || [])
+        .filter((roundName) =>
+          foldText(roundName)
+            .split(" ")
+            .some((word) => word.startsWith(token))
+        )
+        .forEach((roundName) =>
+          (index.round[roundName] || []).forEach((matchno) =>
+            matchnos.add(matchno)
+          )
+        );
+      result = intersectSets(result, matchnos);
+    });
+
+  if (filters.round) {
+    result = intersectSets(result, new Set(index.round[filters.round] || []));
+  }
+  if (filters.status) {
+    result = intersectSets(result, new Set(index.status[filters.status] || []));
+  }
+  return result;
+}
+
 // Función para filtrar jugadores
 function filterPlayers(players) {
-  return players.filter((player) => {
-    // Filtro de búsqueda
-    if (currentPlayerFilters.search) {
-      const searchTerm = currentPlayerFilters.search.toLowerCase();
-      const playerName = player.nombre_gallego.toLowerCase();
-      const playerLiga = (player.liga || "").toLowerCase();
+  const allowed = searchIndex ? searchPeople(currentPlayerFilters) : null;
+  const searchTerm = foldText(currentPlayerFilters.search);
 
+  return players.filter((player) => {
+    if (searchIndex) {
+      if (allowed && !allowed.has(player.player_id)) {
+        return false;
+      }
+    } else {
+      // Filtro de búsqueda sin índice: texto normalizado (sin acentos)
       if (
-        !playerName.includes(searchTerm) &&
-        !playerLiga.includes(searchTerm)
+        searchTerm &&
+        !foldText(`${player.nombre_gallego} ${player.liga || ""}`).includes(
+          searchTerm
+        )
       ) {
         return false;
       }
-    }
 
-    // Filtro de liga
-    if (
-      currentPlayerFilters.liga &&
-      player.liga !== currentPlayerFilters.liga
-    ) {
-      return false;
+      // Filtro de liga
+      if (
+        currentPlayerFilters.liga &&
+        player.liga !== currentPlayerFilters.liga
+      ) {
+        return false;
+      }
     }
 
     // Filtro de estado (clasificado/no clasificado)
-    if (currentPlayerFilters.status) {
+    if (!searchIndex && currentPlayerFilters.status) {
       if (
         currentPlayerFilters.status === "clasificado" &&
         !player.clasificado
@@ -69,21 +190,24 @@ function filterPlayers(players) {
 
 // Función para filtrar partidas
 function filterMatches(matches) {
-  return matches.filter((match) => {
-    // Filtro de búsqueda
-    if (currentMatchFilters.search) {
-      const searchTerm = currentMatchFilters.search.toLowerCase();
-      const playerAName = match.playerA.name.toLowerCase();
-      const playerBName = match.playerB.name.toLowerCase();
-      const roundName = match.roundName.toLowerCase();
+  if (searchIndex) {
+    const allowed = searchMatches(currentMatchFilters);
+    return allowed === null
+      ? matches
+      : matches.filter((match) => allowed.has(match.matchno));
+  }
 
-      if (
-        !playerAName.includes(searchTerm) &&
-        !playerBName.includes(searchTerm) &&
-        !roundName.includes(searchTerm)
-      ) {
-        return false;
-      }
+  const searchTerm = foldText(currentMatchFilters.search);
+
+  return matches.filter((match) => {
+    // Filtro de búsqueda sin índice: texto normalizado (sin acentos)
+    if (
+      searchTerm &&
+      !foldText(
+        `${match.playerA.name} ${match.playerB.name} ${match.roundName}`
+      ).includes(searchTerm)
+    ) {
+      return false;
     }
 
     // Filtro de ronda
@@ -107,22 +231,24 @@ function filterMatches(matches) {
 }
 
 // Función para actualizar filtros de jugadores
-function updatePlayerFilters() {
+async function updatePlayerFilters() {
   currentPlayerFilters.search = document.getElementById("playerSearch").value;
   currentPlayerFilters.liga = document.getElementById("ligaFilter").value;
   currentPlayerFilters.status = document.getElementById("statusFilter").value;
   currentPlayerFilters.rank = document.getElementById("rankFilter").value;
 
+  await ensureSearchIndex();
   renderPlayersTab();
 }
 
 // Función para actualizar filtros de partidas
-function updateMatchFilters() {
+async function updateMatchFilters() {
   currentMatchFilters.search = document.getElementById("matchSearch").value;
   currentMatchFilters.round = document.getElementById("roundFilter").value;
   currentMatchFilters.status =
     document.getElementById("matchStatusFilter").value;
 
+  await ensureSearchIndex();
   renderMatchesTab();
 }
 
@@ -148,9 +274,9 @@ function populateFilterOptions() {
 
   // Poblar filtro de rondas
   const roundFilter = document.getElementById("roundFilter");
-  const rounds = [
-    ...new Set(tournamentData.matches.map((m) => m.roundName).sort()),
-  ];
+  const rounds = matchShardIndex
+    ? [...new Set(matchShardIndex.shards.map((shard) => shard.roundName))]
+    : [...new Set(tournamentData.matches.map((m) => m.roundName).sort())];
 
   rounds.forEach((round) => {
     const option = document.createElement("option");
@@ -158,6 +284,17 @@ function populateFilterOptions() {
     option.textContent = round;
     roundFilter.appendChild(option);
   });
+
+  // Con shards se muestra por defecto la ronda en juego para no cargar todas
+  if (matchShardIndex) {
+    const current = matchShardIndex.shards.find(
+      (shard) => shard.id === matchShardIndex.current
+    );
+    if (current) {
+      roundFilter.value = current.roundName;
+      currentMatchFilters.round = current.roundName;
+    }
+  }
 }
 
 // Función para limpiar filtros de jugadores
@@ -6,6 +6,7 @@
 class TournamentRefresher {
   constructor() {
     this.lastModified = null;
+    this.currentArtifact = null; // Artefacto con hash indicado por manifest.json
     this.isUpdating = false;
     this.updateInterval = null;
     this.checkInterval = 30000; // 30 segundos
@@ -69,6 +70,22 @@ class TournamentRefresher {
   async checkForUpdates() {
     if (this.isUpdating) return;
 
+    // Con manifest solo se descargan unos cientos de bytes por consulta
+    try {
+      const manifest = await fetchManifest();
+
+      if (manifest.current !== this.currentArtifact) {
+        if (this.currentArtifact) {
+          console.log("Cambios detectados en el torneo, actualizando...");
+          await this.refreshData(manifest);
+        }
+        this.currentArtifact = manifest.current;
+      }
+      return;
+    } catch (error) {
+      console.log("Manifest no disponible, usando Last-Modified:", error);
+    }
+
     try {
       const response = await fetch("data/tournament_extended.json", {
         method: "HEAD",
@@ -112,27 +129,17 @@ class TournamentRefresher {
     this.hideLoadingState();
   }
 
-  async refreshData() {
+  async refreshData(manifest = null) {
     if (this.isUpdating) return;
 
     this.isUpdating = true;
     this.showLoadingState();
 
     try {
-      const response = await fetch("data/tournament_extended.json", {
-        cache: "no-cache",
-      });
+      const newData = await loadTournamentData({ cache: "no-cache" }, manifest);
 
-      if (!response.ok) {
-        throw new Error("Error al cargar datos");
-      }
-
-      const newData = await response.json();
-
-      // Actualizar datos globales
-      if (window.tournamentData) {
-        window.tournamentData = newData;
-      }
+      // Actualizar datos globales (declarados en app.js)
+      tournamentData = newData;
 
       // Refrescar la vista actual
       this.refreshCurrentView(newData);
@@ -171,20 +178,20 @@ class TournamentRefresher {
   }
 
   refreshPlayersView(data) {
-    if (window.renderPlayers) {
-      window.renderPlayers(data.players || {});
+    if (typeof renderPlayersTab === "function") {
+      renderPlayersTab();
     }
   }
 
   refreshMatchesView(data) {
-    if (window.renderMatches) {
-      window.renderMatches(data.matches || []);
+    if (typeof renderMatchesTab === "function") {
+      renderMatchesTab();
     }
   }
 
   refreshSummaryView(data) {
-    if (window.renderSummary) {
-      window.renderSummary(data);
+    if (typeof renderSummaryTab === "function") {
+      renderSummaryTab();
     }
   }
 
@@ -220,6 +227,14 @@ class TournamentRefresher {
   }
 
   async initializeTimestamp() {
+    try {
+      const manifest = await fetchManifest();
+      this.updateLastRefresh(manifest.last_updated);
+      return;
+    } catch (error) {
+      console.log("Manifest no disponible para el timestamp:", error);
+    }
+
     try {
       const response = await fetch("data/tournament_extended.json", {
         cache: "no-cache",
@@ -293,9 +308,14 @@ class TournamentRefresher {
     // Cargar fechas del torneo desde el JSON
     if (!this.tournamentStartDate || !this.tournamentEndDate) {
       try {
-        const response = await fetch("data/tournament_extended.json", {
+        let response = await fetch("data/manifest.json", {
           cache: "no-cache",
         });
+        if (!response.ok) {
+          response = await fetch("data/tournament_extended.json", {
+            cache: "no-cache",
+          });
+        }
         if (response.ok) {
           const data = await response.json();
           // Usar fechas del torneo desde la API de Cuescore
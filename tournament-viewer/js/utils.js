@@ -49,6 +49,21 @@ function findPlayerByName(name) {
   );
 }
 
+// Índice de jugadores por playerId, construido una vez por cada carga de datos
+function getPlayersById() {
+  if (!tournamentData.playersById) {
+    tournamentData.playersById = new Map(
+      tournamentData.players.map((player) => [player.player_id, player])
+    );
+  }
+  return tournamentData.playersById;
+}
+
+// Función para encontrar un jugador por playerId (consulta directa)
+function findPlayerById(playerId) {
+  return getPlayersById().get(Number(playerId));
+}
+
 // Función para formatear números
 function formatNumber(num) {
   return num ? num.toLocaleString() : "N/A";